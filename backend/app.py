@@ -1,3 +1,5 @@
+import gc
+import importlib
 import os
 from dotenv import load_dotenv
 from flask import Flask
@@ -5,35 +7,71 @@ from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from database import db
 
-from routes.product_routes import product_routes_bp
-from routes.ingredient_routes import ingredient_routes_bp
-from routes.order_routes import order_routes_bp
-from routes.report_routes import report_routes_bp
-from routes.employee_routes import employee_routes_bp
-from routes.sales_report_routes import sales_report_routes_bp
-from routes.charts_routes import charts_routes_bp
-from routes.auth_routes import auth_routes_bp
-from routes.translation_routes import translation_routes_bp
-from routes.review_routes import review_routes_bp
-
-load_dotenv()
-
-app = Flask(__name__)
-# Configure CORS
-CORS(app, supports_credentials=True)
-
-# Configure database
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config["JWT_SECRET_KEY"] = os.environ.get('JWT_SECERT')
-
-db.init_app(app)
-jwt = JWTManager(app)
-
-# Initialize app with blueprints
-with app.app_context():
-    db.create_all()
-    
+from services.json_provider import FastJSONProvider
+from services.read_replica import replica_binds
+
+# loaded by workers on first use, the master imports them before forking so every worker shares them
+PRELOAD_MODULES = ('requests.adapters', 'urllib3.util.retry')
+
+
+def create_app(config=None):
+    """
+    build the app, with config overriding the settings read from the environment
+
+    nothing here touches the database, so importing or creating the app is cheap for every worker
+    and test. flask seed-db --schema-only creates missing tables
+    """
+    load_dotenv()
+
+    app = Flask(__name__)
+    # encode UUID, Decimal and dates directly, with orjson when it is installed
+    app.json = FastJSONProvider(app)
+    # Configure CORS, the report pages read Retry-After to wait out a busy server and X-Data-Stale
+    CORS(app, supports_credentials=True, expose_headers=['Retry-After', 'X-Request-Id', 'X-Data-Lag-Seconds', 'X-Data-Stale'])
+
+    # Configure database
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config["JWT_SECRET_KEY"] = os.environ.get('JWT_SECERT')
+    # the report replica, when REPORT_DATABASE_URL is set, gets its own engine and pool
+    app.config['SQLALCHEMY_BINDS'] = replica_binds()
+    app.config.update(config or {})
+
+    db.init_app(app)
+    JWTManager(app)
+
+    # imported with the app rather than the module, so the flask CLI and tools that only need the
+    # factory don't load every route
+    from routes.product_routes import product_routes_bp
+    from routes.ingredient_routes import ingredient_routes_bp
+    from routes.order_routes import order_routes_bp
+    from routes.report_routes import report_routes_bp
+    from routes.employee_routes import employee_routes_bp
+    from routes.sales_report_routes import sales_report_routes_bp
+    from routes.charts_routes import charts_routes_bp
+    from routes.auth_routes import auth_routes_bp
+    from routes.translation_routes import translation_routes_bp
+    from routes.review_routes import review_routes_bp
+    from services.admission import init_admission
+    from services.metrics import init_metrics
+    from services.profiler import init_profiling
+    from services.read_replica import init_read_replica
+    from services.sales_rollup import backfill_rollups_command
+    from services.structured_logging import init_logging
+    from services.seed_loader import export_data_command, schema_sql_command, seed_db_command
+
+    # log records are queued with the request id, endpoint and duration and written by a background
+    # thread. registered first so every other hook sees the request id
+    init_logging(app)
+
+    # flask backfill-rollups rebuilds the hourly sales rollups from order history
+    app.cli.add_command(backfill_rollups_command)
+    # flask seed-db bulk loads seed/data or an export-data directory, flask schema-sql prints the schema
+    app.cli.add_command(seed_db_command)
+    app.cli.add_command(export_data_command)
+    app.cli.add_command(schema_sql_command)
+
+    # Initialize app with blueprints
     app.register_blueprint(product_routes_bp)
     app.register_blueprint(ingredient_routes_bp)
     app.register_blueprint(order_routes_bp)
@@ -45,9 +83,35 @@ with app.app_context():
     app.register_blueprint(translation_routes_bp)
     app.register_blueprint(review_routes_bp)
 
-@app.route('/')
+    # per endpoint latency, SQL and pool metrics at /metrics, and a log of slow requests
+    init_metrics(app, db)
+    # off unless PROFILE_SAMPLE_RATE or PROFILE_TOKEN is set
+    init_profiling(app, db)
+    # reports run in a bounded lane and answer 503 when it is full, so orders keep their workers
+    init_admission(app)
+    # GET reports read from the replica while it is reachable and close enough to the primary
+    init_read_replica(app, db)
+
+    app.add_url_rule('/', 'home', home)
+    return app
+
+
 def home():
     return "Hello World"
 
+
+def preload():
+    """
+    prepare a master process that forks its workers after creating the app (gunicorn --preload)
+
+    the modules workers would otherwise each load on first use are imported once here, and the heap
+    is frozen so the garbage collector doesn't touch, and copy, the shared pages in every worker
+    """
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+    gc.freeze()
+
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+    create_app().run(debug=True, port=5001)
@@ -0,0 +1,110 @@
+'''
+Report admission control benchmark
+
+Measures /submitorder latency while managers hammer the report endpoints, with the report
+lane turned off and on. Report clients request monthly X-Reports and yearly charts in a
+loop for the whole run, and the orders are measured like run_benchmarks.py does.
+
+Usage:
+    python benchmarks/bench_admission.py [--orders 50000] [--report-clients 8] [--requests 300]
+'''
+import argparse
+import logging
+import threading
+
+import requests
+from common import bench_database_url, create_app
+from werkzeug.serving import make_server
+
+from database import db
+from generate_data import generate
+from routes.charts_routes import charts_routes_bp
+from routes.order_routes import order_routes_bp
+from routes.report_routes import report_routes_bp
+from routes.sales_report_routes import sales_report_routes_bp
+from run_benchmarks import load_store, run_scenario, scenarios
+from services import admission
+from services.admission import init_admission
+
+REPORT_PATHS = ['/getxreport?timeRange=monthly', '/getproductsusedchart?interval=year',
+                '/getsalesreport?interval=thisYear']
+
+
+def hammer_reports(base_url, clients, stop):
+    """request reports in a loop from clients threads until stop is set, counting the outcomes"""
+    counts = {'ok': 0, 'shed': 0, 'error': 0}
+    lock = threading.Lock()
+
+    def client(offset):
+        session = requests.Session()
+        index = offset
+        while not stop.is_set():
+            response = session.get(base_url + REPORT_PATHS[index % len(REPORT_PATHS)])
+            index += 1
+            outcome = 'ok' if response.ok else 'shed' if response.status_code == 503 else 'error'
+            with lock:
+                counts[outcome] += 1
+            if outcome == 'shed':
+                # like the report pages, wait as long as the server asks
+                stop.wait(int(response.headers['Retry-After']))
+        session.close()
+
+    threads = [threading.Thread(target=client, args=(offset,)) for offset in range(clients)]
+    for thread in threads:
+        thread.start()
+    return threads, counts
+
+
+def measure(app, store, args):
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    stop = threading.Event()
+    threads, counts = hammer_reports(base_url, args.report_clients, stop) if args.report_clients else ([], {})
+    method, path, payload = scenarios(store)['submitorder']
+    result = run_scenario(base_url, method, path, payload, args.requests, args.concurrency, warmup=2)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    return result, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--report-clients', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=300, help='measured orders')
+    parser.add_argument('--concurrency', type=int, default=4, help='registers submitting orders')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    # failed requests are counted, their tracebacks would drown the results
+    logging.getLogger('routes').setLevel(logging.CRITICAL)
+    database_url = bench_database_url()
+    blueprints = (order_routes_bp, report_routes_bp, sales_report_routes_bp, charts_routes_bp)
+
+    app = create_app(database_url, *blueprints)
+    with app.app_context():
+        generate(orders=args.orders, days=args.days, log=lambda message: None)
+        store = load_store()
+        db.session.remove()
+
+    limited = create_app(database_url, *blueprints)
+    init_admission(limited)
+    lane = next(iter(admission._lanes.values()))
+
+    runs = [('no reports', app, 0), ('reports, no lane', app, args.report_clients),
+            (f'reports, lane of {lane.limit}+{lane.max_waiting}', limited, args.report_clients)]
+    print(f"{args.orders:,} orders, {args.report_clients} report clients, {args.concurrency} registers")
+    print(f"{'run':<28}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'orders/s':>10}{'errors':>8}{'reports':>9}{'shed':>7}")
+    for name, run_app, clients in runs:
+        result, counts = measure(run_app, store, argparse.Namespace(**{**vars(args), 'report_clients': clients}))
+        print(f"{name:<28}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['throughput_rps']:>10.1f}{result['errors']:>8}{counts.get('ok', 0):>9}{counts.get('shed', 0):>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+'''
+Benchmark for the /getorders kitchen queue endpoint
+
+Seeds an increasing number of open orders and records how many SQL statements and how
+long a single /getorders call takes at each size. The statement count must not grow with
+the number of open orders; the script exits non-zero if it does.
+
+Usage:
+    python benchmarks/bench_get_orders.py [--sizes 5 25 100 400] [--items 3]
+'''
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from common import StatementCounter, bench_database_url, create_app, seed_store
+
+from database import db, OrderTable, ProductOrder
+from routes.order_routes import order_routes_bp
+
+
+def add_open_orders(count, employee_id, product_ids, items_per_order):
+    now = datetime.now()
+    for i in range(count):
+        order_id = uuid.uuid4()
+        db.session.add(OrderTable(id=order_id, employeeid=employee_id, total=10,
+                                  order_date=now - timedelta(minutes=i), completed=False))
+        db.session.add_all([
+            ProductOrder(id=uuid.uuid4(), orderid=order_id, productid=product_id, quantity=1)
+            for product_id in random.choices(product_ids, k=items_per_order)
+        ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 25, 100, 400])
+    parser.add_argument('--items', type=int, default=3, help='line items per order')
+    args = parser.parse_args()
+
+    app = create_app(bench_database_url(), order_routes_bp)
+    results = []
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        employee, _, products, _ = seed_store(12, 20)
+        employee_id = employee.id
+        product_ids = [product.id for product in products]
+        counter = StatementCounter(db.engine)
+        client = app.test_client()
+
+        open_orders = 0
+        for size in sorted(args.sizes):
+            add_open_orders(size - open_orders, employee_id, product_ids, args.items)
+            open_orders = size
+
+            db.session.remove()
+            counter.reset()
+            start = time.perf_counter()
+            response = client.get('/getorders')
+            elapsed = time.perf_counter() - start
+
+            assert len(response.get_json()['orders']) == size
+            results.append((size, counter.statements, elapsed * 1000))
+
+        db.drop_all()
+
+    print(f"{'open orders':>12}{'statements':>12}{'ms':>10}")
+    for size, statements, ms in results:
+        print(f"{size:>12}{statements:>12}{ms:>10.1f}")
+
+    if len({statements for _, statements, _ in results}) != 1:
+        print('statement count grows with the number of open orders')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+'''
+Microbenchmark for JSON response encoding
+
+Compares the previous jsonify path (routes converting every UUID, Decimal and date with
+str(), float() and isoformat() before Flask's default provider encodes the result) against
+FastJSONProvider encoding the raw column values, for menu, X-Report and open order sized
+payloads. No database is needed, the payloads are built in memory.
+
+Usage:
+    python benchmarks/bench_json.py [--products 60] [--orders 200] [--repeat 200]
+'''
+import argparse
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from common import create_app
+from flask import Flask
+
+from services.json_provider import orjson
+
+
+def money():
+    return Decimal(random.randint(100, 2000)) / 100
+
+
+def menu_payload(products):
+    return {'data': [
+        {
+            'id': uuid.uuid4(),
+            'name': f'Product {index}',
+            'description': 'Black tea with milk and brown sugar pearls',
+            'price': money(),
+            'customizations': ['less ice', 'half sugar'],
+            'has_boba': True,
+            'is_seasonal': False,
+            'image_url': f'/images/product{index}.png',
+            'alerts': ['dairy'],
+            'review_count': random.randint(0, 500),
+            'ingredients': [
+                {
+                    'id': uuid.uuid4(),
+                    'name': f'Ingredient {index}-{item}',
+                    'quantity': random.randint(0, 1000),
+                    'supplier': 'Supplier',
+                    'expiration': date.today() + timedelta(days=item)
+                }
+                for item in range(6)
+            ]
+        }
+        for index in range(products)
+    ]}
+
+
+def report_payload(products):
+    return {'data': {
+        'totalOrders': 1200,
+        'subtotal': 6400.5,
+        'startDate': date.today(),
+        'endDate': date.today(),
+        'hourlySales': [{'hour': f'{hour:02d}:00 PM', 'total': 320.25} for hour in range(12)],
+        'productSales': [
+            {'name': f'Product {index}', 'quantity': random.randint(1, 90), 'total': money()}
+            for index in range(products)
+        ],
+        'employeePerformance': [
+            {'name': f'Employee {index}', 'orders': random.randint(1, 200), 'sales': money()}
+            for index in range(12)
+        ]
+    }}
+
+
+def orders_payload(orders):
+    return {'data': [
+        {
+            'id': uuid.uuid4(),
+            'employee_id': uuid.uuid4(),
+            'total': money(),
+            'order_date': datetime.now(),
+            'products': [
+                {
+                    'id': uuid.uuid4(),
+                    'name': 'Product',
+                    'description': 'Black tea with milk',
+                    'price': money(),
+                    'ingredients': [{'id': uuid.uuid4(), 'name': 'Ingredient'} for _ in range(4)]
+                }
+                for _ in range(3)
+            ]
+        }
+        for _ in range(orders)
+    ]}
+
+
+def preconverted(value):
+    """what the routes used to do before handing a payload to jsonify"""
+    if isinstance(value, dict):
+        return {key: preconverted(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [preconverted(item) for item in value]
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def run(app, build, repeat):
+    with app.test_request_context():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            body = app.json.response(build()).get_data()
+        elapsed = time.perf_counter() - start
+    return elapsed / repeat * 1000, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=60)
+    parser.add_argument('--orders', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    legacy_app = Flask(__name__)
+    fast_app = create_app('sqlite://')
+
+    payloads = {
+        'menu': menu_payload(args.products),
+        'x-report': report_payload(args.products),
+        'open orders': orders_payload(args.orders)
+    }
+
+    print(f"encoder: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    print(f"{'payload':<14}{'bytes':>10}{'jsonify ms':>13}{'fast ms':>10}{'speedup':>10}")
+    for name, payload in payloads.items():
+        legacy_ms, size = run(legacy_app, lambda: preconverted(payload), args.repeat)
+        fast_ms, _ = run(fast_app, lambda: payload, args.repeat)
+        print(f"{name:<14}{size:>10}{legacy_ms:>13.3f}{fast_ms:>10.3f}{legacy_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
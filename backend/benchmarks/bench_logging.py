@@ -0,0 +1,172 @@
+'''
+Logging overhead benchmark
+
+Serves a route that writes --records log lines per request from --concurrency threads, and
+compares the time handlers spend on them:
+  off     no logging, the baseline
+  print   print() to stdout, as the routes used to
+  sync    a logging handler that formats and writes in the request thread
+  queued  the structured logging pipeline, handlers only queue records
+
+Output goes to a file, and --sink-latency-ms adds a delay to every write to model a slow or
+blocked stdout pipe. Each mode runs in its own process so logging state never carries over.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 2000] [--records 20] [--concurrency 8]
+                                       [--sink-latency-ms 0.05]
+'''
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import create_app
+from flask import jsonify, request
+
+from services import structured_logging
+from services.structured_logging import JSONFormatter, add_request_context, init_logging
+
+MODES = ('off', 'print', 'sync', 'queued')
+
+
+class SlowSink(io.TextIOBase):
+    """a text stream that writes to a file and waits latency seconds on every write"""
+
+    def __init__(self, path, latency):
+        self.file = open(path, 'w')
+        self.latency = latency
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        # one writer at a time, like a pipe
+        with self.lock:
+            if self.latency:
+                time.sleep(self.latency)
+            return self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+
+def build_app(mode, records, sink):
+    app = create_app('sqlite://')
+    log = logging.getLogger('bench')
+
+    if mode == 'print':
+        sys.stdout = sink
+    elif mode == 'sync':
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(JSONFormatter())
+        handler.addFilter(add_request_context)
+        logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.INFO)
+        app.before_request(structured_logging._before_request)
+        app.after_request(structured_logging._after_request)
+    elif mode == 'queued':
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(JSONFormatter())
+        init_logging(app, handlers=[handler])
+
+    @app.route('/work')
+    def work():
+        for step in range(records):
+            if mode == 'print':
+                print(f"step {step} of {request.path} for {request.remote_addr}")
+            elif mode != 'off':
+                log.info("step %d of %s for %s", step, request.path, request.remote_addr)
+        return jsonify({'ok': True})
+
+    return app
+
+
+def run_mode(mode, total_requests, records, concurrency, sink_latency):
+    path = os.path.join(tempfile.mkdtemp(), 'log.txt')
+    sink = SlowSink(path, sink_latency)
+    app = build_app(mode, records, sink)
+    stdout = sys.__stdout__
+
+    latencies = []
+    lock = threading.Lock()
+    per_client = total_requests // concurrency
+
+    def client():
+        test_client = app.test_client()
+        times = []
+        for _ in range(per_client):
+            start = time.perf_counter()
+            test_client.get('/work')
+            times.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(times)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    # queued records are still being written, time how long the listener takes to catch up
+    flush_started = time.perf_counter()
+    if structured_logging._pipeline is not None:
+        structured_logging._pipeline.stop()
+    flush = time.perf_counter() - flush_started
+    sink.flush()
+    sys.stdout = stdout
+
+    with open(path) as file:
+        lines = sum(1 for _ in file)
+    latencies.sort()
+    return {
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'throughput_rps': len(latencies) / wall,
+        'flush_ms': flush * 1000,
+        'lines': lines
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--records', type=int, default=20, help='log records per request')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--sink-latency-ms', type=float, default=0.05, help='delay added to every write')
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        result = run_mode(args.mode, args.requests, args.records, args.concurrency, args.sink_latency_ms / 1000)
+        print(json.dumps(result))
+        return
+
+    print(f"{args.requests} requests, {args.records} records each, concurrency {args.concurrency}, "
+          f"{args.sink_latency_ms} ms per write")
+    results = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--requests', str(args.requests), '--records',
+             str(args.records), '--concurrency', str(args.concurrency), '--sink-latency-ms', str(args.sink_latency_ms)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    baseline = results['off']['mean_ms']
+    print(f"{'mode':<8}{'p50 ms':>9}{'p95 ms':>9}{'req/s':>9}{'us/record':>11}{'flush ms':>10}{'lines':>9}")
+    for mode, result in results.items():
+        per_record = (result['mean_ms'] - baseline) * 1000 / args.records if mode != 'off' else 0
+        print(f"{mode:<8}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['throughput_rps']:>9.0f}"
+              f"{per_record:>11.1f}{result['flush_ms']:>10.1f}{result['lines']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+'''
+Benchmark for the Google login routes against the local fake OAuth server
+
+Signs customers and employees in through /google_customer_login and
+/google_employee_login with the previous implementation (sequential, unpooled requests
+without timeouts), with the pooled client that fetches userinfo and the People API
+concurrently, and with ID token verification, which skips userinfo. Reports the median
+and worst login latency for each.
+
+Usage:
+    python benchmarks/bench_login.py [--logins 50] [--latency-ms 80]
+'''
+import argparse
+import logging
+import os
+import statistics
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from fake_google_oauth import create_fake_google_app
+
+CLIENT_ID = 'test-client'
+
+
+def start_fake_google(latency_ms):
+    server = make_server('127.0.0.1', 0, create_fake_google_app(latency_ms, CLIENT_ID), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    # the google client reads these when it is imported
+    os.environ.update({
+        'GOOGLE_CLIENT_ID': CLIENT_ID,
+        'GOOGLE_SECRET_KEY': 'test-secret',
+        'GOOGLE_TOKEN_URL': f"{base}/token",
+        'GOOGLE_USERINFO_URL': f"{base}/userinfo",
+        'GOOGLE_PEOPLE_URL': f"{base}/people/me",
+        'GOOGLE_CERTS_URL': f"{base}/certs"
+    })
+    return server
+
+
+def legacy_user_info(auth_code, with_birthday=True):
+    # the previous implementation, three sequential requests on fresh connections
+    import requests
+    from services import google_oauth
+
+    token_response = requests.post(google_oauth.GOOGLE_TOKEN_URL, data={
+        'code': auth_code,
+        'client_id': CLIENT_ID,
+        'client_secret': 'test-secret',
+        'redirect_uri': 'postmessage',
+        'grant_type': 'authorization_code'
+    }).json()
+    headers = {'Authorization': f'Bearer {token_response["access_token"]}'}
+    user_info = requests.get(google_oauth.GOOGLE_USERINFO_URL, headers=headers).json()
+    if not with_birthday:
+        return user_info
+
+    people = requests.get(f"{google_oauth.GOOGLE_PEOPLE_URL}?personFields=birthdays", headers=headers).json()
+    birthdays = people.get('birthdays', [])
+    user_info['birthday'] = birthdays[0].get('date', {}) if birthdays else None
+    return user_info
+
+
+def measure(client, logins, role):
+    latencies = []
+    for index in range(logins):
+        start = time.perf_counter()
+        response = client.post(f'/google_{role}_login', json={'code': f'{role}{index}@example.com'})
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f'login failed: {response.get_json()}')
+    return statistics.median(latencies), max(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=50)
+    parser.add_argument('--latency-ms', type=int, default=80, help='fake google latency per request')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = start_fake_google(args.latency_ms)
+
+    from common import bench_database_url, create_app
+    from flask_jwt_extended import JWTManager
+
+    from database import db, Employee
+    from routes.auth_routes import auth_routes_bp
+    from services.google_oauth import google_oauth
+
+    app = create_app(bench_database_url(), auth_routes_bp)
+    app.config['JWT_SECRET_KEY'] = 'bench-secret-key-for-signing-login-tokens'
+    JWTManager(app)
+    client = app.test_client()
+
+    results = {}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Employee(name=f'Employee {index}', email=f'employee{index}@example.com')
+                            for index in range(args.logins)])
+        db.session.commit()
+
+        for role in ('customer', 'employee'):
+            # the route uses the module's client, the legacy run replaces its methods on the instance
+            google_oauth.exchange_code = lambda code: {'code': code}
+            google_oauth.user_info = lambda token_response: legacy_user_info(token_response['code'], with_birthday=False)
+            google_oauth.user_info_with_birthday = lambda token_response: legacy_user_info(token_response['code'])
+            measure(client, 3, role)
+            results[(role, 'legacy sequential')] = measure(client, args.logins, role)
+            del google_oauth.exchange_code
+            del google_oauth.user_info
+            del google_oauth.user_info_with_birthday
+
+            for name, verify_id_token in [('pooled concurrent', False), ('id token verified', True)]:
+                google_oauth.verify_id_token = verify_id_token
+                measure(client, 3, role)
+                results[(role, name)] = measure(client, args.logins, role)
+
+        db.drop_all()
+
+    server.shutdown()
+
+    print(f"{args.logins} logins per run, fake google latency {args.latency_ms} ms per request")
+    print(f"{'login':<10}{'path':<20}{'median ms':>11}{'max ms':>10}")
+    for (role, name), (median, worst) in results.items():
+        print(f"{role:<10}{name:<20}{median:>11.1f}{worst:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+'''
+Report cache benchmark
+
+Requests every report and chart with an empty cache, again with it warm, and again after an order
+was submitted, which drops the rows for today only. Each pass is checked against a fresh
+computation.
+
+Usage:
+    python benchmarks/bench_report_cache.py [--orders 200000] [--days 400] [--runs 5]
+'''
+import argparse
+import statistics
+import sys
+import time
+
+from common import bench_database_url, create_app
+
+from database import db, Employee, Product
+from generate_data import generate
+from routes.charts_routes import charts_routes_bp
+from routes.order_routes import order_routes_bp
+from routes.report_routes import report_routes_bp
+from routes.sales_report_routes import sales_report_routes_bp
+from services.metrics import metrics
+from services.report_cache import report_cache
+
+REPORT_PATHS = ['/getxreport?timeRange=daily', '/getxreport?timeRange=weekly', '/getxreport?timeRange=monthly',
+                '/getsalesreport?interval=thisMonth', '/getsalesreport?interval=thisYear',
+                '/getproductsusedchart?interval=year', '/getingredientsusedchart?interval=month']
+
+
+def fetch_all(client):
+    """every report's body, and the time taken for all of them"""
+    start = time.perf_counter()
+    bodies = {path: client.get(path).get_json() for path in REPORT_PATHS}
+    return bodies, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=400)
+    parser.add_argument('--runs', type=int, default=5, help='timed runs per pass, the median is shown')
+    args = parser.parse_args()
+
+    app = create_app(bench_database_url(), report_routes_bp, sales_report_routes_bp, charts_routes_bp,
+                     order_routes_bp)
+    with app.app_context():
+        generate(orders=args.orders, days=args.days, log=lambda message: None)
+        employee_id = str(db.session.query(Employee.id).first()[0])
+        product_id = str(db.session.query(Product.id).first()[0])
+        db.session.remove()
+
+    client = app.test_client()
+    order = {'products': [product_id], 'ingredients': [], 'employee_id': employee_id, 'total': 5}
+
+    def cold():
+        report_cache.clear()
+
+    def after_order():
+        client.post('/submitorder', json=order)
+
+    passes = [('cold', cold), ('warm', lambda: None), ('after an order', after_order)]
+    print(f"{args.orders:,} orders over {args.days} days, {len(REPORT_PATHS)} reports, median of {args.runs} runs")
+    print(f"{'pass':<16}{'ms':>9}")
+    mismatched = False
+    for name, prepare in passes:
+        times = []
+        for _ in range(args.runs):
+            prepare()
+            bodies, elapsed = fetch_all(client)
+            times.append(elapsed)
+        report_cache.clear()
+        same = bodies == fetch_all(client)[0]
+        mismatched |= not same
+        print(f"{name:<16}{statistics.median(times):>9.1f}{'' if same else '  differs'}")
+
+    print(' '.join(f"{part} {result}: {count:g}" for (part, result), count in sorted(metrics.report_cache._values.items())))
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+'''
+Report sub-query concurrency benchmark
+
+Times the X-Report for each range and a Z-Report for the month, with the sub-queries run one
+after another and then on the report pool, and checks both give the same report. The Z-Report
+is composed without storing a snapshot and the report cache is cleared before every run, so
+every run does the full work.
+
+Usage:
+    python benchmarks/bench_report_queries.py [--orders 200000] [--runs 10] [--threads 3]
+'''
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import date
+
+from common import bench_database_url, create_app
+
+from database import db
+from generate_data import generate
+from routes.report_routes import compose_z_report, report_routes_bp
+from services import report_pool
+from services.report_cache import report_cache
+
+
+def time_x_report(client, time_range, runs):
+    times, body = [], None
+    for _ in range(runs):
+        report_cache.clear()
+        start = time.perf_counter()
+        response = client.get(f'/getxreport?timeRange={time_range}')
+        times.append(time.perf_counter() - start)
+        body = response.get_json()['data']
+    return statistics.median(times) * 1000, body
+
+
+def time_z_report(app, runs):
+    start_date = date.today().replace(day=1)
+    times, result = [], None
+    for _ in range(runs):
+        report_cache.clear()
+        with app.test_request_context():
+            start = time.perf_counter()
+            result = compose_z_report(start_date, date.today())
+            times.append(time.perf_counter() - start)
+            db.session.remove()
+    return statistics.median(times) * 1000, result
+
+
+def measure(app, threads, runs):
+    report_pool.REPORT_QUERY_THREADS = threads
+    report_pool._executor = None
+    client = app.test_client()
+    results = {}
+    for time_range in ('daily', 'weekly', 'monthly'):
+        results[f'X-Report {time_range}'] = time_x_report(client, time_range, runs)
+    results['Z-Report monthly'] = time_z_report(app, runs)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=200000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--runs', type=int, default=10, help='timed runs per report, the median is shown')
+    parser.add_argument('--threads', type=int, default=3, help='report pool threads')
+    args = parser.parse_args()
+
+    app = create_app(bench_database_url(), report_routes_bp)
+    with app.app_context():
+        generate(orders=args.orders, days=args.days, log=lambda message: None)
+        db.session.remove()
+
+    serial = measure(app, 1, args.runs)
+    pooled = measure(app, args.threads, args.runs)
+
+    print(f"{args.orders:,} orders over {args.days} days, median of {args.runs} runs")
+    print(f"{'report':<20}{'serial ms':>11}{f'{args.threads} threads ms':>15}{'speedup':>9}")
+    mismatched = False
+    for name, (serial_ms, serial_result) in serial.items():
+        pooled_ms, pooled_result = pooled[name]
+        same = json.dumps(serial_result, sort_keys=True, default=str) == json.dumps(pooled_result, sort_keys=True, default=str)
+        mismatched |= not same
+        print(f"{name:<20}{serial_ms:>11.1f}{pooled_ms:>15.1f}{serial_ms / pooled_ms:>8.2f}x"
+              f"{'' if same else '  results differ'}")
+
+    if mismatched:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
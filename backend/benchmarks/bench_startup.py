@@ -0,0 +1,147 @@
+'''
+Startup benchmark
+
+Measures, in fresh interpreters:
+  - cold start: importing the app, creating it and serving its first request, and peak RSS
+  - worker memory: private (unshared) memory of forked workers after serving a few requests,
+    with each worker loading the app itself (lazy) and with the app preloaded in the master
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--workers 4]
+
+Pass --backend-dir to measure another checkout, e.g. the commit before a change:
+    git worktree add /tmp/before HEAD~1
+    python benchmarks/bench_startup.py --backend-dir /tmp/before/backend
+Older checkouts without create_app() are measured by importing app.app.
+'''
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import bench_database_url, create_app, seed_store
+
+from database import db
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ['/getproducts', '/getingredients', '/getemployees']
+
+CHILD = r'''
+import gc, json, os, resource, sys, time
+
+started = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+
+
+def load():
+    try:
+        from app import create_app
+    except ImportError:
+        from app import app
+        return app
+    return create_app()
+
+
+def memory():
+    fields = {}
+    with open('/proc/self/smaps_rollup') as file:
+        for line in file:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    return {'rss_mb': fields['Rss'] / 1024,
+            'private_mb': (fields['Private_Clean'] + fields['Private_Dirty']) / 1024}
+
+
+def serve(app, paths):
+    client = app.test_client()
+    return [client.get(path).status_code for path in paths]
+
+
+mode, workers, paths = sys.argv[1], int(sys.argv[2]), sys.argv[3:]
+
+if mode == 'cold':
+    app = load()
+    created = time.perf_counter()
+    status = serve(app, paths[:1])[0]
+    print(json.dumps({
+        'create_ms': (created - started) * 1000,
+        'first_request_ms': (time.perf_counter() - created) * 1000,
+        'status': status,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+    sys.exit()
+
+app = None
+if mode == 'preload':
+    app = load()
+    import app as app_module
+    if hasattr(app_module, 'preload'):
+        app_module.preload()
+
+results = []
+for _ in range(workers):
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        statuses = serve(app or load(), paths)
+        os.write(write_end, json.dumps({'statuses': statuses, **memory()}).encode())
+        os._exit(0)
+    os.close(write_end)
+    with os.fdopen(read_end) as pipe:
+        results.append(json.loads(pipe.read()))
+    os.waitpid(pid, 0)
+print(json.dumps({'master': memory(), 'workers': results}))
+'''
+
+
+def run_child(backend_dir, database_url, mode, workers=0):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    output = subprocess.run([sys.executable, '-c', CHILD, mode, str(workers), *PATHS], cwd=backend_dir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='cold starts to measure')
+    parser.add_argument('--workers', type=int, default=4, help='workers to fork per memory measurement')
+    parser.add_argument('--backend-dir', default=BACKEND_DIR)
+    args = parser.parse_args()
+
+    database_url = bench_database_url()
+    app = create_app(database_url)
+    with app.app_context():
+        db.create_all()
+        seed_store(num_products=40, num_ingredients=30)
+        db.session.remove()
+        db.engine.dispose()
+
+    backend_dir = os.path.abspath(args.backend_dir)
+    print(f"measuring {backend_dir}")
+
+    cold = [run_child(backend_dir, database_url, 'cold') for _ in range(args.runs)]
+    if any(run['status'] != 200 for run in cold):
+        print(f"  first request returned {cold[0]['status']}")
+    print(f"cold start, median of {args.runs}")
+    print(f"  import and create app  {statistics.median(run['create_ms'] for run in cold):8.1f} ms")
+    print(f"  first request          {statistics.median(run['first_request_ms'] for run in cold):8.1f} ms")
+    print(f"  peak RSS               {statistics.median(run['peak_rss_mb'] for run in cold):8.1f} MB")
+
+    print(f"worker memory, {args.workers} forked workers")
+    print(f"  {'mode':<10}{'master RSS':>12}{'worker RSS':>12}{'worker private':>16}{'total private':>15}")
+    for mode in ('lazy', 'preload'):
+        result = run_child(backend_dir, database_url, mode, args.workers)
+        workers = result['workers']
+        worker_rss = statistics.mean(worker['rss_mb'] for worker in workers)
+        worker_private = statistics.mean(worker['private_mb'] for worker in workers)
+        total = result['master']['private_mb'] + sum(worker['private_mb'] for worker in workers)
+        print(f"  {mode:<10}{result['master']['rss_mb']:>9.1f} MB{worker_rss:>9.1f} MB"
+              f"{worker_private:>13.1f} MB{total:>12.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+'''
+Benchmark for the /submitorder endpoint
+
+Compares the single-transaction submission path against the previous implementation
+(three commits, one SELECT per ingredient, one INSERT per line item) and reports the
+number of SQL statements, commits and orders per second for each.
+
+Usage:
+    python benchmarks/bench_submit_order.py [--orders 500] [--products 4] [--ingredients 12]
+
+Runs against a throwaway SQLite database unless BENCH_DATABASE_URL points at a scratch
+PostgreSQL database. Never point it at the store database, it creates and drops tables.
+'''
+import argparse
+import math
+import random
+import time
+import uuid
+from datetime import datetime
+
+from common import StatementCounter, bench_database_url, create_app, seed_store
+from flask import Blueprint, jsonify, request
+
+from database import db, Customer, Ingredient, OrderTable, ProductOrder
+from routes.order_routes import order_routes_bp
+
+legacy_bp = Blueprint('legacy_order_routes', __name__)
+
+
+@legacy_bp.route('/legacysubmitorder', methods=['POST'])
+def legacy_submit_order():
+    # copy of the original three-commit implementation, kept here as the baseline
+    data = request.get_json()
+
+    order_id = uuid.uuid4()
+    products = data.get('products')
+    ingredients = data.get('ingredients')
+    employee_id = data.get('employee_id')
+    customer_id = data.get('customer')
+    total = data.get('total')
+    discount = data.get('discount')
+    order_date = datetime.now()
+
+    try:
+        order = OrderTable(id=order_id, employeeid=uuid.UUID(employee_id), total=total, order_date=order_date)
+        customer = Customer.query.filter_by(id=str(customer_id)).first()
+
+        db.session.add(order)
+        db.session.commit()
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({'error': str(error)}), 500
+
+    try:
+        for product_id in products:
+            product_order = ProductOrder(id=uuid.uuid4(), orderid=order.id, productid=uuid.UUID(product_id), quantity=1)
+            db.session.add(product_order)
+        if customer:
+            if discount > 0:
+                if customer.points * 0.1 <= total:
+                    customer.points = 0
+                else:
+                    customer.points -= math.floor(discount) * 10
+            else:
+                customer.points += math.ceil(total)
+
+        db.session.commit()
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({'error': str(error)}), 500
+
+    try:
+        for ingredient_id in ingredients:
+            db_ingredient = Ingredient.query.filter_by(id=uuid.UUID(ingredient_id)).first()
+            if db_ingredient.quantity <= 0:
+                raise Exception("Invalid Ingredient Quantity")
+            db_ingredient.quantity -= 1
+
+        db.session.commit()
+    except Exception as error:
+        db.session.rollback()
+        return jsonify({'error': str(error)}), 500
+
+    return jsonify({'data': {'id': order.id, 'employee_id': order.employeeid, 'total': order.total, 'order_date': order.order_date}})
+
+
+def make_payloads(count, employee, customer, products, ingredients, items_per_order):
+    payloads = []
+    for _ in range(count):
+        items = random.choices(products, k=items_per_order)
+        # every drink pulls a few ingredients, with repeats across drinks in the same order
+        used = [random.choice(ingredients) for _ in range(items_per_order * 3)]
+        payloads.append({
+            'products': [str(p.id) for p in items],
+            'ingredients': [str(i.id) for i in used],
+            'employee_id': str(employee.id),
+            'customer': customer.id,
+            'total': round(5.25 * items_per_order, 2),
+            'discount': 0
+        })
+    return payloads
+
+
+def run(client, counter, path, payloads):
+    counter.reset()
+    start = time.perf_counter()
+    for payload in payloads:
+        response = client.post(path, json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} failed: {response.get_json()}')
+    elapsed = time.perf_counter() - start
+
+    return {
+        'statements_per_order': counter.statements / len(payloads),
+        'commits_per_order': counter.commits / len(payloads),
+        'orders_per_second': len(payloads) / elapsed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=500)
+    parser.add_argument('--products', type=int, default=4, help='line items per order')
+    parser.add_argument('--ingredients', type=int, default=12, help='distinct ingredients in the store')
+    args = parser.parse_args()
+
+    database_url = bench_database_url()
+    app = create_app(database_url, order_routes_bp, legacy_bp)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        employee, customer, products, ingredients = seed_store(10, args.ingredients)
+        payloads = make_payloads(args.orders, employee, customer, products, ingredients, args.products)
+
+        counter = StatementCounter(db.engine)
+        client = app.test_client()
+
+        # warm up both paths so connection setup is not measured
+        run(client, counter, '/legacysubmitorder', payloads[:10])
+        run(client, counter, '/submitorder', payloads[:10])
+
+        results = {
+            'legacy': run(client, counter, '/legacysubmitorder', payloads),
+            'single transaction': run(client, counter, '/submitorder', payloads)
+        }
+
+        db.drop_all()
+
+    print(f"{args.orders} orders, {args.products} line items each, {database_url.split(':')[0]}")
+    print(f"{'path':<20}{'statements/order':>18}{'commits/order':>15}{'orders/s':>12}")
+    for name, result in results.items():
+        print(f"{name:<20}{result['statements_per_order']:>18.1f}{result['commits_per_order']:>15.1f}{result['orders_per_second']:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+'''
+Load test for /translate against the local stub translator
+
+Translates a synthetic menu of 500 strings (names, descriptions and ingredients) with
+the previous implementation (one request for the whole list on a new connection) and
+with the chunked, concurrent translator over its pooled session, then requests the
+same menu through /translate with a cold and a warm translation cache. Reports the
+median and worst end-to-end latency and how many translator requests each run made.
+
+Usage:
+    python benchmarks/bench_translate.py [--texts 500] [--runs 10] [--latency-ms 50] [--per-text-ms 2]
+
+The stub translator and the translation table run locally, nothing is sent to Azure.
+'''
+import argparse
+import logging
+import random
+import statistics
+import threading
+import time
+
+import requests
+from common import bench_database_url, create_app
+from stub_translator import create_stub_app
+from werkzeug.serving import make_server
+
+from database import db, Translation
+from routes.translation_routes import translation_routes_bp
+from services.translation_cache import translation_cache
+from services.translator import Translator
+
+WORDS = ['brown', 'sugar', 'milk', 'tea', 'taro', 'matcha', 'mango', 'passion', 'fruit', 'jasmine',
+         'oolong', 'honeydew', 'lychee', 'jelly', 'pudding', 'cream', 'foam', 'fresh', 'roasted', 'pearls']
+
+
+def menu_texts(count):
+    """distinct menu strings, mostly short names with some longer descriptions"""
+    texts = []
+    for index in range(count):
+        length = random.choice([2, 3, 3, 4, 12, 20])
+        texts.append(f"{' '.join(random.choices(WORDS, k=length))} {index}")
+    return texts
+
+
+def legacy_translate(endpoint, texts, target_lang):
+    # the previous implementation, a single request on a fresh connection without a timeout
+    response = requests.post(
+        f"{endpoint}/translate?api-version=3.0&to={target_lang}",
+        headers={"Content-Type": "application/json"},
+        json=[{"Text": text} for text in texts]
+    )
+    response.raise_for_status()
+    return [item["translations"][0]["text"] for item in response.json()]
+
+
+def measure(runs, call, before=None):
+    latencies = []
+    for _ in range(runs):
+        if before:
+            before()
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies), max(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texts', type=int, default=500)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--latency-ms', type=int, default=50)
+    parser.add_argument('--per-text-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    stub = make_server('127.0.0.1', 0, create_stub_app(args.latency_ms, args.per_text_ms), threaded=True)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{stub.server_port}"
+
+    texts = menu_texts(args.texts)
+    # the /translate endpoint's cache sends its misses to the stub
+    translator = Translator(endpoint=endpoint)
+    cache = translation_cache
+    cache.translate_remote = translator.translate
+
+    app = create_app(bench_database_url(), translation_routes_bp)
+    client = app.test_client()
+    payload = {'texts': texts, 'target_lang': 'es'}
+
+    def stub_requests():
+        return requests.get(f"{endpoint}/stats").json()['requests']
+
+    def cold():
+        cache.clear()
+        with app.app_context():
+            db.session.query(Translation).delete()
+            db.session.commit()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        # warm up connections and check both paths agree
+        assert legacy_translate(endpoint, texts, 'es') == translator.translate(texts, 'es')
+
+        results = {}
+        for name, call, before in [
+            ('legacy single request', lambda: legacy_translate(endpoint, texts, 'es'), None),
+            ('chunked concurrent', lambda: translator.translate(texts, 'es'), None),
+            ('/translate cold cache', lambda: client.post('/translate', json=payload), cold),
+            ('/translate warm cache', lambda: client.post('/translate', json=payload), None)
+        ]:
+            requests.post(f"{endpoint}/stats/reset")
+            median, worst = measure(args.runs, call, before)
+            results[name] = (median, worst, stub_requests() / args.runs)
+
+        db.drop_all()
+
+    translator.close()
+    stub.shutdown()
+
+    print(f"{args.texts} texts, stub latency {args.latency_ms} ms + {args.per_text_ms} ms per text")
+    print(f"{'path':<24}{'median ms':>11}{'max ms':>10}{'translator requests':>21}")
+    for name, (median, worst, calls) in results.items():
+        print(f"{name:<24}{median:>11.1f}{worst:>10.1f}{calls:>21.1f}")
+
+
+if __name__ == '__main__':
+    main()
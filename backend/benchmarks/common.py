@@ -0,0 +1,80 @@
+'''
+Shared helpers for the benchmark scripts
+
+Every benchmark builds its own Flask app with only the blueprints it measures, so the
+scripts never import app.py or need the OAuth and translator environment variables.
+'''
+import os
+import sys
+import tempfile
+import uuid
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event
+
+from database import db, Customer, Employee, Ingredient, Product, ProductIngredient
+from services.json_provider import FastJSONProvider
+
+
+def bench_database_url():
+    """scratch database for a benchmark run, SQLite unless BENCH_DATABASE_URL is set"""
+    default = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    return os.environ.get('BENCH_DATABASE_URL', default)
+
+
+def create_app(database_url, *blueprints):
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint)
+    return app
+
+
+class StatementCounter:
+    """counts SQL statements and commits issued on an engine"""
+
+    def __init__(self, engine):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, 'before_cursor_execute', self._on_execute)
+        event.listen(engine, 'commit', self._on_commit)
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+def seed_store(num_products, num_ingredients, ingredients_per_product=3):
+    """create one employee, one customer and a small menu with plenty of stock"""
+    employee = Employee(id=uuid.uuid4(), name='Bench Cashier', is_manager=False, email='bench@example.com')
+    customer = Customer(id=str(uuid.uuid4()), name='Bench Customer', email='customer@example.com', points=100)
+    products = [
+        Product(id=uuid.uuid4(), name=f'Tea {i}', description='bench', price=5.25)
+        for i in range(num_products)
+    ]
+    ingredients = [
+        Ingredient(id=uuid.uuid4(), name=f'Ingredient {i}', quantity=10_000_000, supplier='bench',
+                   expiration=date.today() + timedelta(days=30))
+        for i in range(num_ingredients)
+    ]
+    recipes = [
+        ProductIngredient(id=uuid.uuid4(), productid=product.id,
+                          ingredientid=ingredients[(i + j) % num_ingredients].id, quantity=1)
+        for i, product in enumerate(products)
+        for j in range(ingredients_per_product)
+    ]
+    db.session.add_all([employee, customer, *products, *ingredients, *recipes])
+    db.session.commit()
+    return employee, customer, products, ingredients
@@ -0,0 +1,127 @@
+'''
+Local stand-in for the Google OAuth endpoints the login routes call
+
+Serves the token exchange, userinfo, People API and signing key endpoints. Every
+authorization code is accepted and returns an access token and an RS256 ID token
+signed with a key generated at startup and published at /certs.
+
+Usage:
+    python benchmarks/fake_google_oauth.py [--port 5003] [--latency-ms 80] [--client-id test-client]
+
+then start the backend with these in its environment:
+    GOOGLE_CLIENT_ID=test-client
+    GOOGLE_SECRET_KEY=test-secret
+    GOOGLE_TOKEN_URL=http://127.0.0.1:5003/token
+    GOOGLE_USERINFO_URL=http://127.0.0.1:5003/userinfo
+    GOOGLE_PEOPLE_URL=http://127.0.0.1:5003/people/me
+    GOOGLE_CERTS_URL=http://127.0.0.1:5003/certs
+
+The code is used as the user's email, so {"code": "manager@example.com"} signs in as
+that address.
+'''
+import argparse
+import json
+import time
+import uuid
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from flask import Flask, jsonify, request
+
+ISSUER = 'https://accounts.google.com'
+
+
+def user_for(email):
+    name = email.split('@')[0]
+    return {
+        'sub': str(uuid.uuid5(uuid.NAMESPACE_URL, email).int)[:21],
+        'name': name.title(),
+        'given_name': name.title(),
+        'family_name': 'Tester',
+        'picture': 'https://example.com/avatar.png',
+        'email': email,
+        'email_verified': True
+    }
+
+
+def create_fake_google_app(latency_ms=0, client_id='test-client'):
+    app = Flask(__name__)
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    kid = uuid.uuid4().hex
+    public_jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(key.public_key()))
+    public_jwk.update({'kid': kid, 'alg': 'RS256', 'use': 'sig'})
+    # access token -> email
+    tokens = {}
+    stats = {'token': 0, 'userinfo': 0, 'people': 0, 'certs': 0}
+
+    def respond(endpoint):
+        stats[endpoint] += 1
+        time.sleep(latency_ms / 1000)
+
+    def bearer_email():
+        token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        return tokens.get(token)
+
+    @app.route('/token', methods=['POST'])
+    def token():
+        respond('token')
+        code = request.form.get('code')
+        if not code or request.form.get('client_id') != client_id:
+            return jsonify({'error': 'invalid_grant'}), 400
+
+        access_token = uuid.uuid4().hex
+        tokens[access_token] = code
+        now = int(time.time())
+        id_token = jwt.encode(
+            {**user_for(code), 'iss': ISSUER, 'aud': client_id, 'iat': now, 'exp': now + 3600},
+            key,
+            algorithm='RS256',
+            headers={'kid': kid}
+        )
+        return jsonify({
+            'access_token': access_token,
+            'expires_in': 3599,
+            'token_type': 'Bearer',
+            'scope': 'openid email profile',
+            'id_token': id_token
+        })
+
+    @app.route('/userinfo', methods=['GET'])
+    def userinfo():
+        respond('userinfo')
+        email = bearer_email()
+        if not email:
+            return jsonify({'error': 'invalid_request'}), 401
+        return jsonify(user_for(email))
+
+    @app.route('/people/me', methods=['GET'])
+    def people():
+        respond('people')
+        if not bearer_email():
+            return jsonify({'error': {'code': 401}}), 401
+        return jsonify({'birthdays': [{'date': {'year': 1999, 'month': 4, 'day': 19}}]})
+
+    @app.route('/certs', methods=['GET'])
+    def certs():
+        respond('certs')
+        return jsonify({'keys': [public_jwk]})
+
+    @app.route('/stats', methods=['GET'])
+    def get_stats():
+        return jsonify(stats)
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=5003)
+    parser.add_argument('--latency-ms', type=int, default=80, help='delay added to every request')
+    parser.add_argument('--client-id', default='test-client')
+    args = parser.parse_args()
+
+    create_fake_google_app(args.latency_ms, args.client_id).run(port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+'''
+Synthetic store data generator
+
+Fills a scratch database with a menu, staff, customers and a configurable volume of
+order history, then rebuilds the hourly sales rollups so the report routes have data.
+Orders follow the shop's day: open 10am to 10pm with lunch and after-school peaks,
+busier Fridays and weekends, and slow growth over the period. Rows are generated in
+chunks and streamed with COPY on PostgreSQL, so millions of orders never sit in memory.
+
+Usage:
+    python benchmarks/generate_data.py [--orders 100000] [--days 365] [--items-per-order 3]
+                                       [--customers 5000] [--seed 331]
+
+For a year of a busy store, 5M orders and about 15M line items:
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/generate_data.py --orders 5000000
+
+Runs against BENCH_DATABASE_URL, or a throwaway SQLite file if it is not set. The tables are
+dropped and recreated first, never point it at the store database.
+'''
+import argparse
+import math
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import chain
+
+from common import bench_database_url, create_app
+
+from database import db, Customer, Employee, Ingredient, OrderTable, Product, ProductIngredient, ProductOrder
+from services.bulk_load import copy_rows
+from services.sales_rollup import rebuild_rollups
+
+# share of the day's orders in each opening hour, 10am to 9pm
+HOUR_WEIGHTS = {10: 3, 11: 6, 12: 11, 13: 10, 14: 7, 15: 9, 16: 11, 17: 10, 18: 9, 19: 8, 20: 6, 21: 4}
+# monday first
+WEEKDAY_WEIGHTS = (0.85, 0.85, 0.9, 0.95, 1.15, 1.3, 1.1)
+# order volume at the end of the period relative to the start
+YEARLY_GROWTH = 1.25
+# orders with a loyalty customer attached
+CUSTOMER_SHARE = 0.3
+# orders placed in the last hour and still open in the kitchen
+OPEN_ORDER_WINDOW = timedelta(hours=1)
+
+TEA_BASES = ['Black', 'Green', 'Oolong', 'Jasmine', 'Thai', 'Taro', 'Matcha', 'Honeydew', 'Mango', 'Strawberry']
+TEA_STYLES = ['Milk Tea', 'Fruit Tea', 'Slush', 'Latte', 'Smoothie']
+INGREDIENTS = ['Black Tea', 'Green Tea', 'Oolong Tea', 'Jasmine Tea', 'Milk', 'Oat Milk', 'Cream', 'Sugar Syrup',
+               'Brown Sugar', 'Honey', 'Tapioca Pearls', 'Popping Boba', 'Lychee Jelly', 'Grass Jelly', 'Pudding',
+               'Taro Powder', 'Matcha Powder', 'Mango Puree', 'Strawberry Puree', 'Honeydew Puree', 'Ice', 'Cups',
+               'Lids', 'Straws', 'Sealing Film', 'Cheese Foam', 'Coffee', 'Thai Tea Mix', 'Red Bean', 'Aloe Vera']
+
+
+def fast_uuid(rng):
+    """random uuid4 from the seeded generator, so runs with the same seed produce the same ids"""
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def item_count_weights(mean):
+    """weights for 1..8 line items, a poisson distribution shifted by one with the given mean"""
+    rate = max(mean - 1, 0.01)
+    return [math.exp(-rate) * rate ** k / math.factorial(k) for k in range(8)]
+
+
+def day_weights(start, days):
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        growth = 1 + (YEARLY_GROWTH - 1) * offset / max(days - 1, 1)
+        weights.append(WEEKDAY_WEIGHTS[day.weekday()] * growth)
+    return weights
+
+
+def generate_menu(rng, products, ingredients, employees, customers):
+    ingredient_rows = [
+        (fast_uuid(rng), name, 10_000_000, 'Synthetic Supply Co', date.today() + timedelta(days=90))
+        for name in (INGREDIENTS * (ingredients // len(INGREDIENTS) + 1))[:ingredients]
+    ]
+    # ingredient names are unique
+    ingredient_rows = [(row[0], f'{row[1]} {index // len(INGREDIENTS)}' if index >= len(INGREDIENTS) else row[1], *row[2:])
+                       for index, row in enumerate(ingredient_rows)]
+
+    product_rows = []
+    recipe_rows = []
+    for index in range(products):
+        name = f'{TEA_BASES[index % len(TEA_BASES)]} {TEA_STYLES[index // len(TEA_BASES) % len(TEA_STYLES)]}'
+        if index >= len(TEA_BASES) * len(TEA_STYLES):
+            name = f'{name} {index}'
+        price = Decimal(rng.choice([475, 525, 575, 625, 675])) / 100
+        product_id = fast_uuid(rng)
+        product_rows.append((product_id, name, f'Synthetic {name.lower()}', price, None, index % 3 == 0,
+                             index % 7 == 0, None, None, 0))
+        for ingredient in rng.sample(ingredient_rows, k=min(rng.randint(3, 6), len(ingredient_rows))):
+            recipe_rows.append((fast_uuid(rng), product_id, ingredient[0], 1))
+
+    employee_rows = [
+        (fast_uuid(rng), f'Employee {index}', index == 0, f'employee{index}@example.com')
+        for index in range(employees)
+    ]
+    customer_rows = [
+        (str(fast_uuid(rng)), f'Customer {index}', f'customer{index}@example.com', None, rng.randint(0, 400),
+         datetime.now(), datetime.now())
+        for index in range(customers)
+    ]
+    return ingredient_rows, product_rows, recipe_rows, employee_rows, customer_rows
+
+
+def generate_orders(rng, count, start, days, items_per_order, products, employees, customers, open_orders=False,
+                    chunk_size=20000):
+    """
+    yield (orders, line_items) chunks of row tuples
+
+    order times are drawn day by day and hour by hour from the seasonality weights. open orders
+    are placed within the last hour instead and are not completed
+    """
+    day_cumulative = []
+    total = 0
+    for weight in day_weights(start, days):
+        total += weight
+        day_cumulative.append(total)
+    hours = list(HOUR_WEIGHTS)
+    hour_weights = list(HOUR_WEIGHTS.values())
+    item_weights = item_count_weights(items_per_order)
+    item_counts = list(range(1, len(item_weights) + 1))
+    now = datetime.now()
+
+    generated = 0
+    while generated < count:
+        size = min(chunk_size, count - generated)
+        day_offsets = rng.choices(range(days), cum_weights=day_cumulative, k=size)
+        order_hours = rng.choices(hours, weights=hour_weights, k=size)
+        counts = rng.choices(item_counts, weights=item_weights, k=size)
+
+        orders = []
+        line_items = []
+        for day_offset, hour, items in zip(day_offsets, order_hours, counts):
+            order_id = fast_uuid(rng)
+            if open_orders:
+                order_date = now - OPEN_ORDER_WINDOW * rng.random()
+            else:
+                order_date = datetime.combine(start + timedelta(days=day_offset), datetime.min.time()) + timedelta(
+                    hours=hour, seconds=rng.randrange(3600), microseconds=rng.randrange(1_000_000)
+                )
+            chosen = rng.choices(products, k=items)
+            customer_id = rng.choice(customers) if rng.random() < CUSTOMER_SHARE else None
+            total = sum(price for _, price in chosen)
+            orders.append((order_id, rng.choice(employees), customer_id, total, order_date, not open_orders))
+            line_items.extend((fast_uuid(rng), order_id, product_id, 1) for product_id, _ in chosen)
+
+        generated += size
+        yield orders, line_items
+
+
+def generate(orders=100000, days=365, items_per_order=3.0, customers=5000, employees=12, products=40,
+             ingredients=30, open_orders=25, seed=331, log=print):
+    """
+    drop and recreate the tables, then load a synthetic store with the given volume of history
+
+    history covers the days before today, plus open_orders placed in the last hour for the kitchen queue
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    # never a report replica bind
+    db.drop_all(bind_key=None)
+    db.create_all(bind_key=None)
+
+    ingredient_rows, product_rows, recipe_rows, employee_rows, customer_rows = generate_menu(
+        rng, products, ingredients, employees, customers
+    )
+    copy_rows(Ingredient.__table__, ['id', 'name', 'quantity', 'supplier', 'expiration'], ingredient_rows)
+    copy_rows(Product.__table__, ['id', 'name', 'description', 'price', 'customizations', 'has_boba', 'is_seasonal',
+                                  'alerts', 'image_url', 'review_count'], product_rows)
+    copy_rows(ProductIngredient.__table__, ['id', 'productid', 'ingredientid', 'quantity'], recipe_rows)
+    copy_rows(Employee.__table__, ['id', 'name', 'is_manager', 'email'], employee_rows)
+    copy_rows(Customer.__table__, ['id', 'name', 'email', 'birthday', 'points', 'created_at', 'updated_at'],
+              customer_rows)
+    db.session.commit()
+
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=days - 1)
+    menu = ([(row[0], row[3]) for row in product_rows], [row[0] for row in employee_rows],
+            [row[0] for row in customer_rows])
+    chunks = chain(
+        generate_orders(rng, orders, start, days, items_per_order, *menu),
+        generate_orders(rng, open_orders, start, days, items_per_order, *menu, open_orders=True)
+    )
+
+    order_count = line_item_count = 0
+    for order_chunk, line_item_chunk in chunks:
+        order_count += copy_rows(OrderTable.__table__,
+                                 ['id', 'employeeid', 'customerid', 'total', 'order_date', 'completed'], order_chunk)
+        line_item_count += copy_rows(ProductOrder.__table__, ['id', 'orderid', 'productid', 'quantity'],
+                                     line_item_chunk)
+        db.session.commit()
+        elapsed = time.perf_counter() - started
+        log(f"  {order_count:>10,} orders  {line_item_count:>11,} line items  {order_count / elapsed:>10,.0f} orders/s")
+
+    log("rebuilding sales rollups")
+    rebuild_rollups()
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    log(f"loaded {order_count:,} orders and {line_item_count:,} line items from {start} to today in {elapsed:.1f}s")
+    return {'orders': order_count, 'line_items': line_item_count, 'start': start, 'end': end, 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--items-per-order', type=float, default=3.0, help='mean line items per order')
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--employees', type=int, default=12)
+    parser.add_argument('--products', type=int, default=40)
+    parser.add_argument('--ingredients', type=int, default=30)
+    parser.add_argument('--open-orders', type=int, default=25, help='orders still open in the kitchen')
+    parser.add_argument('--seed', type=int, default=331)
+    args = parser.parse_args()
+
+    database_url = bench_database_url()
+    app = create_app(database_url)
+    print(f"generating into {database_url}")
+    with app.app_context():
+        generate(args.orders, args.days, args.items_per_order, args.customers, args.employees, args.products,
+                 args.ingredients, args.open_orders, args.seed)
+
+
+if __name__ == '__main__':
+    main()
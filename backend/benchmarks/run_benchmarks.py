@@ -0,0 +1,240 @@
+'''
+Endpoint benchmark harness
+
+Serves the backend with every blueprint on a local threaded server, then drives each
+endpoint scenario with a fixed number of concurrent clients and records p50/p95/p99
+latency, throughput and errors. Results are written to a JSON file together with the
+commit and configuration, and a previous results file can be compared against.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--orders 100000] [--requests 400] [--concurrency 8]
+                                        [--only getxreport,submitorder] [--output results.json]
+                                        [--compare previous.json]
+
+With --orders the database is first filled by generate_data.py. Without it the data
+already in BENCH_DATABASE_URL is used, so a large PostgreSQL data set only has to be
+generated once:
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/generate_data.py --orders 5000000
+    BENCH_DATABASE_URL=postgresql://... python benchmarks/run_benchmarks.py --output after.json --compare before.json
+'''
+import argparse
+import json
+import logging
+import os
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+import requests
+from common import bench_database_url, create_app
+from werkzeug.serving import make_server
+
+from database import db, Customer, Employee, Ingredient, OrderTable, Product
+from generate_data import generate
+from routes.charts_routes import charts_routes_bp
+from routes.employee_routes import employee_routes_bp
+from routes.ingredient_routes import ingredient_routes_bp
+from routes.order_routes import order_routes_bp
+from routes.product_routes import product_routes_bp
+from routes.report_routes import report_routes_bp
+from routes.review_routes import review_routes_bp
+from routes.sales_report_routes import sales_report_routes_bp
+
+
+def scenarios(store):
+    """name -> (method, path, payload factory or None)"""
+    product_ids = store['products']
+    ingredient_ids = store['ingredients']
+
+    def order_payload():
+        items = random.choices(product_ids, k=random.randint(1, 4))
+        return {
+            'products': items,
+            'ingredients': random.choices(ingredient_ids, k=len(items) * 3),
+            'employee_id': random.choice(store['employees']),
+            'customer': random.choice(store['customers']) if random.random() < 0.3 else None,
+            'total': round(5.25 * len(items), 2),
+            'discount': 0
+        }
+
+    return {
+        'getproducts': ('GET', '/getproducts', None),
+        'getproducts kiosk': ('GET', '/getproducts?view=kiosk', None),
+        'getreviews': ('GET', f'/getreviews/{product_ids[0]}', None),
+        'getingredients': ('GET', '/getingredients', None),
+        'getemployees': ('GET', '/getemployees', None),
+        'getorders': ('GET', '/getorders', None),
+        'getxreport daily': ('GET', '/getxreport?timeRange=daily', None),
+        'getxreport weekly': ('GET', '/getxreport?timeRange=weekly', None),
+        'getxreport monthly': ('GET', '/getxreport?timeRange=monthly', None),
+        'getzreports': ('GET', '/getzreports', None),
+        'getsalesreport month': ('GET', '/getsalesreport?interval=month', None),
+        'getproductsusedchart year': ('GET', '/getproductsusedchart?interval=year', None),
+        'getingredientsusedchart year': ('GET', '/getingredientsusedchart?interval=year', None),
+        'submitorder': ('POST', '/submitorder', order_payload)
+    }
+
+
+def load_store():
+    """ids the scenarios build requests from"""
+    return {
+        'products': [str(product_id) for (product_id,) in db.session.query(Product.id)],
+        'ingredients': [str(ingredient_id) for (ingredient_id,) in db.session.query(Ingredient.id)],
+        'employees': [str(employee_id) for (employee_id,) in db.session.query(Employee.id)],
+        'customers': [customer_id for (customer_id,) in db.session.query(Customer.id).limit(1000)],
+        'orders': db.session.query(OrderTable.id).count()
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(base_url, method, path, payload, total_requests, concurrency, warmup):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    remaining = [total_requests]
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+        for _ in range(warmup):
+            session.request(method, base_url + path, json=payload() if payload else None)
+
+        barrier.wait()
+        while True:
+            with lock:
+                if remaining[0] == 0:
+                    break
+                remaining[0] -= 1
+            start = time.perf_counter()
+            response = session.request(method, base_url + path, json=payload() if payload else None)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+        session.close()
+
+    barrier = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'max_ms': round(latencies[-1], 2),
+        'throughput_rps': round(len(latencies) / wall, 1)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, previous=None):
+    header = f"{'scenario':<30}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'errors':>8}"
+    if previous:
+        header += f"{'p95 change':>12}{'req/s change':>14}"
+    print(header)
+    for name, result in results.items():
+        line = (f"{name:<30}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                f"{result['throughput_rps']:>9.1f}{result['errors']:>8}")
+        before = (previous or {}).get(name)
+        if before:
+            p95_change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+            rps_change = ((result['throughput_rps'] - before['throughput_rps']) / before['throughput_rps'] * 100
+                          if before['throughput_rps'] else 0)
+            line += f"{p95_change:>+11.1f}%{rps_change:>+13.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, help='generate a fresh data set with this many orders first')
+    parser.add_argument('--days', type=int, default=365, help='days of history when generating')
+    parser.add_argument('--requests', type=int, default=400, help='measured requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--warmup', type=int, default=2, help='unmeasured requests per client first')
+    parser.add_argument('--only', help='comma separated scenario names (or prefixes) to run')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    database_url = bench_database_url()
+    app = create_app(database_url, product_routes_bp, ingredient_routes_bp, order_routes_bp, report_routes_bp,
+                     employee_routes_bp, sales_report_routes_bp, charts_routes_bp, review_routes_bp)
+
+    with app.app_context():
+        if args.orders:
+            generate(orders=args.orders, days=args.days)
+        store = load_store()
+        db.session.remove()
+    if not store['products']:
+        parser.error('the database has no data, pass --orders to generate some')
+
+    selected = scenarios(store)
+    if args.only:
+        prefixes = [name.strip() for name in args.only.split(',')]
+        selected = {name: scenario for name, scenario in selected.items()
+                    if any(name.startswith(prefix) for prefix in prefixes)}
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    dialect = database_url.split(':')[0]
+    print(f"{store['orders']:,} orders in {dialect}, {args.requests} requests per scenario, "
+          f"concurrency {args.concurrency}")
+
+    results = {}
+    for name, (method, path, payload) in selected.items():
+        results[name] = run_scenario(base_url, method, path, payload, args.requests, args.concurrency, args.warmup)
+        print(f"  {name}: p95 {results[name]['p95_ms']} ms, {results[name]['throughput_rps']} req/s")
+    server.shutdown()
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)['results']
+
+    print()
+    print_results(results, previous)
+
+    with open(args.output, 'w') as file:
+        json.dump({
+            'commit': git_commit(),
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'database': dialect,
+            'orders': store['orders'],
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'results': results
+        }, file, indent=2)
+    print(f"\nresults written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
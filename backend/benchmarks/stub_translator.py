@@ -0,0 +1,78 @@
+'''
+Local stand-in for the Azure translator
+
+Serves the same /translate?api-version=3.0&to=<lang> API, translating each text to
+"[<lang>] <text>", and counts the requests and characters it received so cache hits can
+be checked without spending the monthly quota. Response time grows with the number of
+texts in a request, and requests over Azure's element limit are rejected the same way.
+
+Usage:
+    python benchmarks/stub_translator.py [--port 5002] [--latency-ms 50] [--per-text-ms 2]
+
+then start the backend with AZURE_TRANSLATOR_ENDPOINT=http://127.0.0.1:5002.
+GET /stats returns the counters, POST /stats/reset clears them.
+'''
+import argparse
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+
+# azure rejects requests with more texts than this
+MAX_TEXTS = 1000
+
+
+def create_stub_app(latency_ms=0, per_text_ms=0, max_texts=MAX_TEXTS):
+    app = Flask(__name__)
+    stats = {'requests': 0, 'texts': 0, 'characters': 0}
+    lock = threading.Lock()
+
+    @app.route('/translate', methods=['POST'])
+    def translate():
+        target_lang = request.args.get('to')
+        if not target_lang:
+            return jsonify({'error': {'code': 400036, 'message': 'The target language is not valid.'}}), 400
+
+        body = request.get_json()
+        if len(body) > max_texts:
+            return jsonify({'error': {'code': 400077, 'message': 'The maximum request size has been exceeded.'}}), 400
+
+        with lock:
+            stats['requests'] += 1
+            stats['texts'] += len(body)
+            stats['characters'] += sum(len(item['Text']) for item in body)
+
+        time.sleep((latency_ms + per_text_ms * len(body)) / 1000)
+        return jsonify([
+            {'translations': [{'text': f"[{target_lang}] {item['Text']}", 'to': target_lang}]}
+            for item in body
+        ])
+
+    @app.route('/stats', methods=['GET'])
+    def get_stats():
+        with lock:
+            return jsonify(dict(stats))
+
+    @app.route('/stats/reset', methods=['POST'])
+    def reset_stats():
+        with lock:
+            for key in stats:
+                stats[key] = 0
+        return jsonify(dict(stats))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=5002)
+    parser.add_argument('--latency-ms', type=int, default=50, help='delay added to every request')
+    parser.add_argument('--per-text-ms', type=float, default=2, help='delay added per text in a request')
+    args = parser.parse_args()
+
+    create_stub_app(args.latency_ms, args.per_text_ms).run(port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,37 @@
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import UUID
+from flask_sqlalchemy.session import Session
 from sqlalchemy import UniqueConstraint
 from datetime import datetime
 import uuid
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """
+    sends the SELECTs of a request, and of the report pool threads working for it, to the bind it
+    chose in g.read_bind, see services/read_replica.py
+
+    flushes, other statements and requests that chose nothing use the primary
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            read_bind = g.get('read_bind')
+            if read_bind is not None and clause is not None and clause.is_select:
+                return self._db.engines[read_bind]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class Employee(db.Model):
     __tablename__ = 'employee'
 
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
     name = db.Column(db.Text, nullable=False)
     is_manager = db.Column(db.Boolean, nullable=False, default=False)
-    email = db.Column(db.Text, nullable=False, default=False)
+    # looked up on every employee login
+    email = db.Column(db.Text, nullable=False, default=False, index=True)
 
     orders = db.relationship('OrderTable', backref='employee', cascade="all, delete", lazy=True)
 
@@ -38,7 +57,7 @@ class Ingredient(db.Model):
         UniqueConstraint('name', name='ingredient_name_key'),
     )
 
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
     name = db.Column(db.Text, nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     supplier = db.Column(db.Text, nullable=False)
@@ -49,23 +68,44 @@ class Ingredient(db.Model):
 
 class OrderTable(db.Model):
     __tablename__ = 'ordertable'
+    __table_args__ = (
+        # kitchen queue scans open orders oldest first
+        db.Index('ix_ordertable_completed_order_date', 'completed', 'order_date'),
+    )
 
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
-    employeeid = db.Column(UUID(as_uuid=True), db.ForeignKey('employee.id', ondelete='CASCADE'), nullable=False)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
+    employeeid = db.Column(db.Uuid, db.ForeignKey('employee.id', ondelete='CASCADE'), nullable=False)
 
-    # Foreign key to customer table
-    customerid = db.Column(UUID(as_uuid=True), db.ForeignKey('customer.id', ondelete='CASCADE'), nullable=False)
+    # Foreign key to customer table, walk-up orders have no customer. text like customer.id
+    customerid = db.Column(db.Text, db.ForeignKey('customer.id', ondelete='CASCADE'), nullable=True)
 
     total = db.Column(db.Numeric(10, 2), nullable=False)
-    order_date = db.Column(db.DateTime, default=datetime.utcnow)
+    order_date = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     completed = db.Column(db.Boolean, default=False, nullable=False)
 
     product_orders = db.relationship('ProductOrder', backref='order', cascade="all, delete", lazy=True)
 
+class OrderIdempotencyKey(db.Model):
+    __tablename__ = 'order_idempotency_key'
+
+    # client-generated key for an order replayed by a register, seen once per order
+    key = db.Column(db.Text, primary_key=True, nullable=False)
+    order_id = db.Column(db.Uuid, db.ForeignKey('ordertable.id', ondelete='CASCADE'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class OrderEvent(db.Model):
+    __tablename__ = 'order_event'
+
+    # kitchen display events, written with the order change and read by every worker's stream poller
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    event_type = db.Column(db.Text, nullable=False)
+    order_id = db.Column(db.Uuid, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
 class Product(db.Model):
     __tablename__ = 'product'
 
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
     name = db.Column(db.Text, nullable=False)
     description = db.Column(db.Text, nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)
@@ -73,6 +113,7 @@ class Product(db.Model):
     has_boba = db.Column(db.Boolean, nullable=False, default=False)
     is_seasonal = db.Column(db.Boolean, nullable=False, default=False)
     alerts = db.Column(db.Text, nullable=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     image_url = db.Column(db.Text)
 
@@ -86,27 +127,88 @@ class ProductIngredient(db.Model):
     __tablename__ = 'product_ingredient'
     
 
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
-    productid = db.Column(UUID(as_uuid=True), db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
-    ingredientid = db.Column(UUID(as_uuid=True), db.ForeignKey('ingredient.id', ondelete='CASCADE'), nullable=False)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
+    productid = db.Column(db.Uuid, db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
+    ingredientid = db.Column(db.Uuid, db.ForeignKey('ingredient.id', ondelete='CASCADE'), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
 
 
 class ProductOrder(db.Model):
     __tablename__ = 'product_order'
     
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
-    orderid = db.Column(UUID(as_uuid=True), db.ForeignKey('ordertable.id', ondelete='CASCADE'), nullable=False)
-    productid = db.Column(UUID(as_uuid=True), db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
+    orderid = db.Column(db.Uuid, db.ForeignKey('ordertable.id', ondelete='CASCADE'), nullable=False, index=True)
+    productid = db.Column(db.Uuid, db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False, index=True)
     quantity = db.Column(db.Integer, nullable=False)
 
 class ProductReview(db.Model):
     __tablename__ = 'product_review'
+    __table_args__ = (
+        # newest-first review pages for one product
+        db.Index('ix_product_review_product_id_created_at_id', 'product_id', 'created_at', 'id'),
+    )
 
-    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, nullable=False)
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
     
-    product_id = db.Column(UUID(as_uuid=True), db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
+    product_id = db.Column(db.Uuid, db.ForeignKey('product.id', ondelete='CASCADE'), nullable=False)
     customer_id = db.Column(db.Text, db.ForeignKey('customer.id', ondelete='CASCADE'), nullable=False)
     
     review_text = db.Column(db.Text, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    # the review page cursor, a null would leave the review out of every page after the first
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class SalesRollup(db.Model):
+    __tablename__ = 'sales_rollup'
+
+    # hourly order count and sales per employee, kept up to date by submit_order
+    bucket = db.Column(db.DateTime, primary_key=True, nullable=False)
+    employeeid = db.Column(db.Uuid, db.ForeignKey('employee.id', ondelete='CASCADE'), primary_key=True, nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    sales = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+class ProductSalesRollup(db.Model):
+    __tablename__ = 'product_sales_rollup'
+
+    # hourly quantity and sales per product, at the price charged when the order was placed
+    bucket = db.Column(db.DateTime, primary_key=True, nullable=False)
+    productid = db.Column(db.Uuid, db.ForeignKey('product.id', ondelete='CASCADE'), primary_key=True, nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    sales = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+class ReportRevision(db.Model):
+    __tablename__ = 'report_revision'
+
+    # bumped with every change to the rollups of a day that is over, so the report cache of every
+    # worker drops the rows it keeps for that day. days that never changed have no row
+    day = db.Column(db.DateTime, primary_key=True, nullable=False)
+    revision = db.Column(db.Integer, nullable=False, default=0)
+
+class ZReportSnapshot(db.Model):
+    __tablename__ = 'z_report_snapshot'
+    __table_args__ = (
+        # a period is closed once, later requests are served from the stored snapshot
+        UniqueConstraint('time_range', 'start_date', 'end_date', name='z_report_snapshot_period_key'),
+        db.Index('ix_z_report_snapshot_time_range_end_date', 'time_range', 'end_date'),
+    )
+
+    id = db.Column(db.Uuid, primary_key=True, default=uuid.uuid4, nullable=False)
+    time_range = db.Column(db.Text, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    total_orders = db.Column(db.Integer, nullable=False)
+    subtotal = db.Column(db.Numeric(12, 2), nullable=False)
+    total_tax = db.Column(db.Numeric(12, 2), nullable=False)
+    total_sales = db.Column(db.Numeric(12, 2), nullable=False)
+    ingredients_used = db.Column(db.JSON, nullable=False)
+    sales_per_employee = db.Column(db.JSON, nullable=False)
+    generated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class Translation(db.Model):
+    __tablename__ = 'translation'
+
+    # translator output per source string and target language, looked up by a hash of the text
+    text_hash = db.Column(db.Text, primary_key=True, nullable=False)
+    target_lang = db.Column(db.Text, primary_key=True, nullable=False)
+    source_text = db.Column(db.Text, nullable=False)
+    translated_text = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,32 @@
+'''
+Gunicorn settings
+
+    gunicorn
+
+The app is created once in the master and workers are forked from it, sharing its imported code
+instead of each building their own. Nothing connects to the database before the fork.
+'''
+import os
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('BIND', '0.0.0.0:5001')
+workers = int(os.getenv('WEB_CONCURRENCY', '4'))
+# each open /streamorders connection holds a thread, displays are served by gunicorn.streams.conf.py
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+preload_app = True
+
+
+def when_ready(server):
+    # runs in the master after the app is loaded and before the first worker is forked
+    from app import preload
+
+    preload()
+
+
+def post_fork(server, worker):
+    # a worker must never share the master's pooled connections, drop any that were opened
+    from database import db
+
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,21 @@
+'''
+Gunicorn settings for the kitchen order stream process
+
+    gunicorn -c gunicorn.streams.conf.py
+
+Serves /streamorders apart from the order taking workers. One worker with many threads holds every
+kitchen display, so a store's displays share one poller, one order_event query per poll, and no
+display takes a thread that order taking needs. Point the frontend's VITE_STREAM_URL at it.
+'''
+import os
+import runpy
+
+# the same app and fork hooks as gunicorn.conf.py
+_base = runpy.run_path(os.path.join(os.path.dirname(__file__), 'gunicorn.conf.py'))
+globals().update({name: value for name, value in _base.items() if not name.startswith('__')})
+
+bind = os.getenv('STREAM_BIND', '0.0.0.0:5002')
+workers = 1
+# an idle stream thread only waits on its queue, a few are left for other requests
+threads = int(os.getenv('STREAM_THREADS', '64'))
+os.environ.setdefault('ORDER_STREAMS_PER_WORKER', str(threads - 4))
@@ -1,7 +1,7 @@
+from collections import defaultdict
 from flask import Blueprint, request, jsonify
-from sqlalchemy import func
 from datetime import datetime, timedelta
-from database import db, OrderTable, ProductOrder, Product, ProductIngredient, Ingredient
+from services.sales_rollup import ingredient_usage, product_sales
 
 # blueprint for handling chart-related routes
 charts_routes_bp = Blueprint('charts_routes', __name__)
@@ -9,7 +9,8 @@ charts_routes_bp = Blueprint('charts_routes', __name__)
 
 def get_date_range(interval):
     """helper function to determine date range based on interval"""
-    now = datetime.utcnow()
+    # local time, like the order dates
+    now = datetime.now()
 
     # calculate start date based on the specified interval
     if interval == "day":
@@ -35,21 +36,13 @@ def get_products_used_chart():
     try:
         start_dt, end_dt = get_date_range(interval)
 
-        # query to get product usage statistics
-        query = (
-            db.session.query(
-                Product.name.label("label"),
-                func.count(ProductOrder.productid).label("value")
-            )
-            .join(Product, Product.id == ProductOrder.productid)
-            .join(OrderTable, OrderTable.id == ProductOrder.orderid)
-            .filter(OrderTable.order_date >= start_dt, OrderTable.order_date <= end_dt)
-            .group_by(Product.name)
-            .order_by(func.count(ProductOrder.productid).desc())
-        )
-
-        results = query.all()
-        data = [{"label": r.label, "value": r.value} for r in results]
+        # product usage statistics from the hourly sales rollups
+        usage = defaultdict(int)
+        for _, name, quantity, _ in product_sales(start_dt, end_dt):
+            usage[name] += quantity or 0
+
+        data = [{"label": label, "value": value}
+                for label, value in sorted(usage.items(), key=lambda item: item[1], reverse=True)]
 
         # return empty data placeholder if no results found
         if not data:
@@ -69,24 +62,12 @@ def get_ingredients_used_chart():
     try:
         start_dt, end_dt = get_date_range(interval)
 
-        # query to get ingredient usage statistics
-        query = (
-            db.session.query(
-                Ingredient.name.label("label"),
-                func.sum(ProductOrder.quantity *
-                         ProductIngredient.quantity).label("value")
-            )
-            .join(Product, Product.id == ProductOrder.productid)
-            .join(ProductIngredient, ProductIngredient.productid == Product.id)
-            .join(Ingredient, Ingredient.id == ProductIngredient.ingredientid)
-            .join(OrderTable, OrderTable.id == ProductOrder.orderid)
-            .filter(OrderTable.order_date >= start_dt, OrderTable.order_date <= end_dt)
-            .group_by(Ingredient.name)
-            .order_by(Ingredient.name)
-        )
-
-        results = query.all()
-        data = [{"label": r.label, "value": r.value} for r in results]
+        # ingredient usage statistics from the hourly sales rollups and current recipes
+        usage = defaultdict(int)
+        for _, name, _, amount in ingredient_usage(start_dt, end_dt):
+            usage[name] += amount or 0
+
+        data = [{"label": label, "value": value} for label, value in sorted(usage.items())]
 
         # return empty data placeholder if no results found
         if not data:
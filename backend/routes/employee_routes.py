@@ -1,10 +1,12 @@
 from flask import Blueprint, jsonify, request
 from database import db, Employee
+from services.report_cache import report_cache
 import uuid
 import logging
 
 # blueprint for handling employee-related routes
 employee_routes_bp = Blueprint('employee_routes', __name__)
+log = logging.getLogger(__name__)
 
 '''
 GET employees endpoint
@@ -27,11 +29,11 @@ def get_employees():
                 'is_manager': employee.is_manager
             })
         
-        logging.info(f"Retrieved {len(employees)} employees")
+        log.info("Retrieved %d employees", len(employees))
         return jsonify({'data': employees})
 
-    except Exception as error:
-        logging.error(f"Error retrieving employees: {error}")
+    except Exception:
+        log.exception("Error retrieving employees")
         return jsonify({'error': 'Failed to retrieve employees'}), 500
 
 '''
@@ -76,12 +78,12 @@ def add_employee():
         db.session.add(employee)
         db.session.commit()
         
-        logging.info(f"Added new employee: {employee.name} (ID: {employee.id})")
+        log.info("Added new employee: %s (ID: %s)", employee.name, employee.id)
         return jsonify({'data': {'id': str(employee.id), 'name': employee.name, 'is_manager': employee.is_manager}}), 201
     
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        logging.error(f"Error adding employee: {error}")
+        log.exception("Error adding employee")
         return jsonify({'error': 'Failed to add employee'}), 500
 
 '''
@@ -114,13 +116,15 @@ def update_employee(id):
         new_role = "Manager" if employee.is_manager else "Employee"
         
         db.session.commit()
+        # cached reports show the old name
+        report_cache.clear()
         
-        logging.info(f"Updated employee ID {id}: {old_name} → {employee.name}, {old_role} → {new_role}")
+        log.info("Updated employee ID %s: %s → %s, %s → %s", id, old_name, employee.name, old_role, new_role)
         return jsonify({'data': {'id': str(employee.id), 'name': employee.name, 'is_manager': employee.is_manager}})
     
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        logging.error(f"Error updating employee {id}: {error}")
+        log.exception("Error updating employee %s", id)
         return jsonify({'error': 'Failed to update employee'}), 500
 
 '''
@@ -141,11 +145,13 @@ def delete_employee(id):
         employee_name = employee.name
         db.session.delete(employee)
         db.session.commit()
+        # the employee's orders were deleted with them
+        report_cache.clear()
         
-        logging.info(f"Deleted employee: {employee_name} (ID: {id})")
+        log.info("Deleted employee: %s (ID: %s)", employee_name, id)
         return jsonify({'message': 'Employee deleted successfully'})
     
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        logging.error(f"Error deleting employee {id}: {error}")
+        log.exception("Error deleting employee %s", id)
         return jsonify({'error': 'Failed to delete employee'}), 500 
\ No newline at end of file
@@ -1,9 +1,12 @@
 from flask import Blueprint, jsonify, request
+import logging
 
 from database import db, Ingredient
+from services.menu_cache import menu_cache
 
 # blueprint for handling ingredient-related routes
 ingredient_routes_bp = Blueprint('ingredient_routes', __name__)
+log = logging.getLogger(__name__)
 
 '''
 GET ingredients endpoint
@@ -28,8 +31,8 @@ def get_ingredients():
                 'expiration': ingredient.expiration
             })
 
-    except Exception as error:
-        print(error)
+    except Exception:
+        log.exception("Error getting ingredients")
         return jsonify({'error': 'Something went wrong!'}), 500
 
     return jsonify({'data': ingredients})
@@ -62,10 +65,11 @@ def update_ingredient_stock():
 
         ingredient.quantity = new_quantity
         db.session.commit()
+        menu_cache.invalidate()
 
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error updating ingredient stock")
         return jsonify({'error': 'Something went wrong!'}), 500
 
     return jsonify({ "success": True, 'data': { 'id': ingredient.id, 'name': ingredient.name, 'quantity': ingredient.quantity, 'supplier': ingredient.supplier, 'expiration': ingredient.expiration } })
@@ -106,10 +110,11 @@ def add_ingredient():
 
         db.session.add(new_ingredient)
         db.session.commit()
+        menu_cache.invalidate()
 
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error adding ingredient")
         return jsonify({'error': 'Something went wrong!'}), 500
 
     return jsonify({ "success": True, "data": { 'id': new_ingredient.id, 'name': new_ingredient.name, 'quantity': new_ingredient.quantity, 'supplier': new_ingredient.supplier, 'expiration': new_ingredient.expiration } })
\ No newline at end of file
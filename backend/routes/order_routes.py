@@ -1,51 +1,130 @@
 import math
-from flask import Blueprint, jsonify, request
+from collections import Counter
+from flask import Blueprint, Response, current_app, jsonify, request
+import logging
 from datetime import datetime
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 import uuid
 
-from database import Customer, db, OrderTable, ProductOrder, Ingredient
+from database import Customer, db, Employee, OrderTable, OrderIdempotencyKey, ProductOrder, Ingredient, Product, ProductIngredient
+from services.order_events import format_event, get_broker, record_events
+from services.report_cache import report_cache
+from services.sales_rollup import record_orders
 
 # blueprint for handling order-related routes
 order_routes_bp = Blueprint('order_routes', __name__)
+log = logging.getLogger(__name__)
 
+STREAM_HEARTBEAT_SECONDS = 15
+STREAM_RETRY_MS = 3000
+MAX_BATCH_ORDERS = 500
+
+
+def open_orders_query():
+    """incomplete orders sorted by date, loading each level of the order tree in one query"""
+    return OrderTable.query.options(
+        selectinload(OrderTable.product_orders)
+        .joinedload(ProductOrder.product)
+        .selectinload(Product.product_ingredients)
+        .joinedload(ProductIngredient.ingredient)
+    ).filter_by(completed=False).order_by(OrderTable.order_date.asc())
+
+
+def load_open_orders(order_ids):
+    """serialized open orders among order_ids, for the order event stream"""
+    return serialize_orders(open_orders_query().filter(OrderTable.id.in_(order_ids)).all())
+
+
+def order_events():
+    return get_broker(current_app._get_current_object(), load_open_orders)
+
+
+def serialize_orders(orders):
+    # column values are passed through as-is, the JSON provider encodes UUID, Decimal and datetime
+    return [
+        {
+            "id": order.id,
+            "employee_id": order.employeeid,
+            "total": order.total,
+            "order_date": order.order_date,
+            "products": [
+                {
+                    "id": po.product.id,
+                    "name": po.product.name,
+                    "description": po.product.description,
+                    "price": po.product.price,
+                    "ingredients": [
+                        {"id": ing.ingredient.id, "name": ing.ingredient.name}
+                        for ing in po.product.product_ingredients
+                    ]
+                }
+                for po in order.product_orders
+            ]
+        }
+        for order in orders
+    ]
+
+
+'''
+GET orders endpoint
+
+This endpoint gets the open orders for the kitchen queue. Line items, products and ingredients are
+eager loaded so the endpoint runs a fixed number of queries no matter how many orders are open.
+Displays that cannot hold a /streamorders connection poll this endpoint instead.
+'''
 @order_routes_bp.route('/getorders', methods=['GET'])
 def get_orders():
     try:
-        # fetch incomplete orders sorted by date
-        orders = OrderTable.query.filter_by(completed=False).order_by(OrderTable.order_date.asc()).all()
-        result = []
-
-        # format order data with product and ingredient details
-        for order in orders:
-            products_info = []
-            for po in order.product_orders:
-                product = po.product
-                ingredients = [
-                    {"id": ing.ingredient.id, "name": ing.ingredient.name}
-                    for ing in product.product_ingredients
-                ]
-                products_info.append({
-                    "id": str(product.id),
-                    "name": product.name,
-                    "description": product.description,
-                    "price": float(product.price),
-                    "ingredients": ingredients
-                })
-
-            result.append({
-                "id": str(order.id),
-                "employee_id": str(order.employeeid),
-                "total": float(order.total),
-                "order_date": order.order_date.isoformat(),
-                "products": products_info
-            })
-
-        return jsonify({"orders": result})
-
-    except Exception as error:
-        print(error)
+        orders = open_orders_query().all()
+        return jsonify({"orders": serialize_orders(orders)})
+
+    except Exception:
+        log.exception("Error getting orders")
+        return jsonify({"error": "Failed to fetch orders"}), 500
+
+
+'''
+GET order stream endpoint
+
+This endpoint streams the kitchen queue as server-sent events. A "snapshot" event with every open
+order is sent once, followed by "order_created" and "order_completed" events as orders come in on
+any worker. Each worker reads new events once per poll for all of its displays, which are meant to
+be served together by the stream process. A stream holds a worker thread, so each worker serves
+only ORDER_STREAMS_PER_WORKER of them and answers 503 past that, and the display polls /getorders
+instead.
+'''
+@order_routes_bp.route('/streamorders', methods=['GET'])
+def stream_orders():
+    # subscribe before taking the snapshot so no event is missed, clients upsert by order id
+    events = order_events()
+    subscription = events.subscribe()
+    if subscription is None:
+        return jsonify({"error": "Too many order streams, poll /getorders instead"}), 503
+
+    try:
+        snapshot = serialize_orders(open_orders_query().all())
+    except Exception:
+        events.unsubscribe(subscription)
+        log.exception("Error fetching the open orders for a stream")
         return jsonify({"error": "Failed to fetch orders"}), 500
 
+    def stream():
+        try:
+            yield f"retry: {STREAM_RETRY_MS}\n" + format_event('snapshot', {"orders": snapshot})
+            while not subscription.closed:
+                frame = subscription.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                # comment frames keep idle connections open through proxies
+                yield frame if frame is not None else ": keepalive\n\n"
+        finally:
+            events.unsubscribe(subscription)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 
 @order_routes_bp.route('/completeorder', methods=['POST'])
 def complete_order():
@@ -58,25 +137,103 @@ def complete_order():
 
     try:
         # find and mark order as complete
-        order = OrderTable.query.get(order_id)
+        order = OrderTable.query.get(_to_uuid(order_id))
         if not order:
             return jsonify({"error": "Order not found"}), 404
 
         order.completed = True
+        record_events('order_completed', [order.id])
         db.session.commit()
 
         return jsonify({"message": "Order marked as complete"}), 200
 
-    except Exception as error:
-        print(error)
+    except Exception:
+        log.exception("Error completing order")
         db.session.rollback()
         return jsonify({"error": "Failed to complete order"}), 500
 
 
+def _to_uuid(value):
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(str(value))
+
+
+def product_order_rows(order_id, product_ids):
+    """one product_order row per product in the order"""
+    return [
+        {'id': uuid.uuid4(), 'orderid': order_id, 'productid': _to_uuid(product_id), 'quantity': 1}
+        for product_id in product_ids or []
+    ]
+
+
+def insert_product_orders(rows):
+    """bulk insert line items in a single statement"""
+    if rows:
+        db.session.execute(insert(ProductOrder), rows)
+
+
+def points_after_order(points, total, discount):
+    """loyalty rule as a SQL expression: redeeming a discount spends points, otherwise each dollar earns one"""
+    if discount and discount > 0:
+        return case(
+            (points * 0.1 <= total, 0),
+            else_=points - math.floor(discount) * 10
+        )
+    return points + math.ceil(total)
+
+
+def apply_customer_points(orders):
+    """
+    earn or redeem loyalty points for (customer_id, total, discount) tuples with one UPDATE
+
+    orders for the same customer are applied in sequence, unknown customers are skipped
+    """
+    new_points = {}
+    for customer_id, total, discount in orders:
+        if customer_id is None:
+            continue
+        customer_id = str(customer_id)
+        new_points[customer_id] = points_after_order(new_points.get(customer_id, Customer.points), total, discount)
+
+    if not new_points:
+        return
+
+    db.session.execute(
+        update(Customer)
+        .where(Customer.id.in_(new_points.keys()))
+        .values(points=case(new_points, value=Customer.id))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def decrement_ingredients(ingredient_ids):
+    """
+    decrement stock for every ingredient used with one guarded UPDATE
+
+    repeated ids are collapsed into counts and the UPDATE only touches rows that
+    have enough stock, so a short row count means the order must be rejected
+    """
+    counts = Counter(_to_uuid(ingredient_id) for ingredient_id in ingredient_ids or [])
+    if not counts:
+        return
+
+    used = case(counts, value=Ingredient.id)
+    result = db.session.execute(
+        update(Ingredient)
+        .where(Ingredient.id.in_(counts.keys()), Ingredient.quantity >= used)
+        .values(quantity=Ingredient.quantity - used)
+        .execution_options(synchronize_session=False)
+    )
+
+    if result.rowcount != len(counts):
+        raise Exception("Invalid Ingredient Quantity")
+
+
 '''
 POST orders endpoint
 
-This endpoint creates a new order in the order table, product_order table and decrements ingredients
+This endpoint creates a new order in the order table, product_order table and decrements ingredients.
+The order, its line items, the customer points change, the ingredient decrements and the hourly sales
+rollups are written in a single transaction.
 '''
 @order_routes_bp.route('/submitorder', methods=['POST'])
 def submit_order():
@@ -93,50 +250,198 @@ def submit_order():
     order_date = datetime.now()
 
     try:
-        # create new order record
-        order = OrderTable(id=order_id, employeeid=employee_id, total=total, order_date=order_date)
-        customer = Customer.query.filter_by(id=str(customer_id)).first()
-        
+        # create new order record, flushed first so line items can reference it
+        order = OrderTable(id=order_id, employeeid=_to_uuid(employee_id), total=total, order_date=order_date)
         db.session.add(order)
-        db.session.commit()
-    except Exception as error:
-        db.session.rollback()
-        print(error)
-        return jsonify({'error': 'Something went wrong!'}), 500
+        db.session.flush()
 
-    try:
-        for product_id in products:
-            product_order_id = uuid.uuid4()
-            product_order = ProductOrder(id=product_order_id, orderid=order.id, productid=product_id, quantity=1)
-            db.session.add(product_order)
-        if customer:
-            if discount > 0:
-                if customer.points * 0.1 <= total:
-                    customer.points = 0
-                else:
-                    customer.points -= math.floor(discount) * 10
-            else:
-                customer.points += math.ceil(total)
+        insert_product_orders(product_order_rows(order_id, products))
+        apply_customer_points([(customer_id, total, discount)])
+        decrement_ingredients(ingredients)
+        record_orders([order_id])
+        record_events('order_created', [order_id])
 
         db.session.commit()
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error submitting order")
         return jsonify({'error': 'Something went wrong!'}), 500
 
-    
+    report_cache.orders_recorded([order_date])
+
+    return jsonify({ 'data': { 'id': order_id, 'employee_id': employee_id, 'total': total, 'order_date': order_date } })
+
+
+def parse_batch_order(order):
+    """validate one queued order from a register, returning its normalized fields"""
+    key = order.get('idempotency_key')
+    if not key or not isinstance(key, str):
+        raise ValueError("Missing idempotency_key")
+
+    total = order.get('total')
+    if isinstance(total, bool) or not isinstance(total, (int, float)) or total < 0:
+        raise ValueError("Invalid total")
+
+    # dollars off paid for with points
+    discount = order.get('discount')
+    if discount is not None and (isinstance(discount, bool) or not isinstance(discount, (int, float))
+                                 or not 0 <= discount <= total):
+        raise ValueError("Invalid discount")
+
+    order_date = order.get('order_date')
+
+    return {
+        'key': key,
+        'products': [_to_uuid(product_id) for product_id in order.get('products') or []],
+        'ingredients': [_to_uuid(ingredient_id) for ingredient_id in order.get('ingredients') or []],
+        'employee_id': _to_uuid(order.get('employee_id')),
+        'customer_id': order.get('customer'),
+        'total': total,
+        'discount': discount,
+        # offline orders keep the time they were rung up
+        'order_date': datetime.fromisoformat(order_date) if order_date else datetime.now()
+    }
+
+
+def is_idempotency_conflict(error):
+    """whether an IntegrityError is a unique violation on the idempotency keys"""
+    constraint = getattr(getattr(error.orig, 'diag', None), 'constraint_name', None)
+    if constraint is not None:
+        return constraint == 'order_idempotency_key_pkey'
+    # sqlite names the column instead
+    return 'UNIQUE constraint failed: order_idempotency_key.key' in str(error.orig)
+
+
+'''
+POST batch orders endpoint
+
+This endpoint replays orders queued by a register while it was offline. Each order carries a
+client-generated idempotency_key; keys that were already stored are reported as duplicates instead
+of creating a second order, so a batch can be retried safely after a timeout. New orders go through
+the same points and inventory rules as /submitorder and the whole batch is written with bulk
+statements in one transaction. Orders with an unknown employee or product, not enough stock or an
+invalid total or discount are rejected on their own while the rest of the batch is stored. The
+response has one result per submitted order, in order.
+'''
+@order_routes_bp.route('/submitorders', methods=['POST'])
+def submit_orders():
+    data = request.get_json()
+    orders = data.get('orders') if data else None
+
+    if not isinstance(orders, list) or not orders:
+        return jsonify({'error': 'No orders provided'}), 400
+    if len(orders) > MAX_BATCH_ORDERS:
+        return jsonify({'error': f'At most {MAX_BATCH_ORDERS} orders per batch'}), 413
+
+    results = [None] * len(orders)
+    parsed = {}
+    repeats = []
+
+    # validate every order and collapse keys repeated within the batch
+    for index, order in enumerate(orders):
+        try:
+            fields = parse_batch_order(order)
+        except Exception as error:
+            results[index] = {'idempotency_key': order.get('idempotency_key') if isinstance(order, dict) else None,
+                              'status': 'rejected', 'error': str(error)}
+            continue
+
+        if fields['key'] in parsed:
+            repeats.append((index, parsed[fields['key']][0]))
+        else:
+            parsed[fields['key']] = (index, fields)
+
     try:
-        for ingredient_id in ingredients:
-            db_ingredient = Ingredient.query.filter_by(id=ingredient_id).first()
-            if db_ingredient.quantity <= 0:
-                raise Exception("Invalid Ingredient Quantity")
-            db_ingredient.quantity -= 1
+        # employees and products the orders refer to, an unknown id rejects only its own order
+        employee_ids = {fields['employee_id'] for _, fields in parsed.values()}
+        product_ids = {product_id for _, fields in parsed.values() for product_id in fields['products']}
+        known_employees = set(db.session.scalars(
+            select(Employee.id).where(Employee.id.in_(employee_ids))
+        )) if employee_ids else set()
+        known_products = set(db.session.scalars(
+            select(Product.id).where(Product.id.in_(product_ids))
+        )) if product_ids else set()
+
+        # orders already stored by an earlier attempt
+        existing = dict(db.session.execute(
+            select(OrderIdempotencyKey.key, OrderIdempotencyKey.order_id)
+            .where(OrderIdempotencyKey.key.in_(parsed.keys()))
+        ).all()) if parsed else {}
+
+        # lock the stock for every ingredient in the batch and check orders against it in sequence
+        needed = {ingredient_id for _, fields in parsed.values() for ingredient_id in fields['ingredients']}
+        stock = dict(db.session.execute(
+            select(Ingredient.id, Ingredient.quantity)
+            .where(Ingredient.id.in_(needed))
+            .with_for_update()
+        ).all()) if needed else {}
+
+        accepted = []
+        for key, (index, fields) in parsed.items():
+            if key in existing:
+                results[index] = {'idempotency_key': key, 'status': 'duplicate', 'order_id': str(existing[key])}
+                continue
+
+            if fields['employee_id'] not in known_employees:
+                results[index] = {'idempotency_key': key, 'status': 'rejected', 'error': 'Unknown employee'}
+                continue
+            if any(product_id not in known_products for product_id in fields['products']):
+                results[index] = {'idempotency_key': key, 'status': 'rejected', 'error': 'Unknown product'}
+                continue
+
+            counts = Counter(fields['ingredients'])
+            if any(stock.get(ingredient_id, 0) < count for ingredient_id, count in counts.items()):
+                results[index] = {'idempotency_key': key, 'status': 'rejected', 'error': 'Invalid Ingredient Quantity'}
+                continue
+
+            for ingredient_id, count in counts.items():
+                stock[ingredient_id] -= count
+
+            fields['order_id'] = uuid.uuid4()
+            accepted.append(fields)
+            results[index] = {'idempotency_key': key, 'status': 'created', 'order_id': str(fields['order_id'])}
+
+        if accepted:
+            db.session.execute(insert(OrderTable), [
+                {'id': fields['order_id'], 'employeeid': fields['employee_id'], 'total': fields['total'],
+                 'order_date': fields['order_date'], 'completed': False}
+                for fields in accepted
+            ])
+            insert_product_orders([
+                row for fields in accepted for row in product_order_rows(fields['order_id'], fields['products'])
+            ])
+            db.session.execute(insert(OrderIdempotencyKey), [
+                {'key': fields['key'], 'order_id': fields['order_id']} for fields in accepted
+            ])
+            apply_customer_points([
+                (fields['customer_id'], fields['total'], fields['discount']) for fields in accepted
+            ])
+            decrement_ingredients([
+                ingredient_id for fields in accepted for ingredient_id in fields['ingredients']
+            ])
+            record_orders([fields['order_id'] for fields in accepted])
+            record_events('order_created', [fields['order_id'] for fields in accepted])
 
         db.session.commit()
-    except Exception as error:
+    except IntegrityError as error:
         db.session.rollback()
-        print(error)
+        if not is_idempotency_conflict(error):
+            log.exception("Error submitting order batch")
+            return jsonify({'error': 'Something went wrong!'}), 500
+        # another replay of the same keys committed first, retrying reports them as duplicates
+        log.warning("Conflicting order batch: %s", error)
+        return jsonify({'error': 'Conflicting batch in progress, retry'}), 409
+    except Exception:
+        db.session.rollback()
+        log.exception("Error submitting order batch")
         return jsonify({'error': 'Something went wrong!'}), 500
 
-    
-    return jsonify({ 'data': { 'id': order.id, 'employee_id': order.employeeid, 'total': order.total, 'order_date': order.order_date } })
\ No newline at end of file
+    # keys repeated within the batch share the outcome of their first occurrence
+    for index, first in repeats:
+        first_result = results[first]
+        results[index] = first_result if first_result['status'] == 'rejected' else {**first_result, 'status': 'duplicate'}
+
+    # replayed orders can land in days whose reports are already cached
+    report_cache.orders_recorded([fields['order_date'] for fields in accepted])
+
+    return jsonify({'results': results})
@@ -1,87 +1,195 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
+import logging
 import os
+from sqlalchemy.orm import selectinload
 from werkzeug.utils import secure_filename
 import json
 
 from database import db, Product, Ingredient, ProductIngredient
+from services.json_provider import dumps_bytes
+from services.menu_cache import menu_cache
+from services.translation_cache import translation_cache
+from services.translator import TranslatorError
 
 # blueprint for handling product-related routes
 product_routes_bp = Blueprint('product_routes', __name__)
+log = logging.getLogger(__name__)
 
 # configure upload folder
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'frontend', 'public', 'images')
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+# product fields the menu can be projected to, and named projections
+MENU_FIELDS = {'id', 'name', 'description', 'price', 'customizations', 'has_boba', 'is_seasonal',
+               'ingredients', 'image_url', 'alerts', 'review_count'}
+MENU_VIEWS = {
+    'kiosk': {'id', 'name', 'price', 'image_url', 'alerts'}
+}
+# languages the kiosk offers, and the menu fields translated for them
+MENU_LANGUAGES = {'am', 'ar', 'bn', 'ca', 'de', 'el', 'en', 'es', 'fa', 'fr', 'gu', 'ha', 'he', 'hi', 'it', 'ja',
+                  'ko', 'nl', 'pa', 'pl', 'pt', 'ro', 'ru', 'sv', 'ta', 'th', 'tl', 'tr', 'uk', 'ur', 'vi'}
+LOCALIZED_FIELDS = ('name', 'description', 'alerts')
+
+# how each menu field is read from a product, ingredients are added separately
+PRODUCT_FIELDS = {
+    'id': lambda product: product.id,
+    'name': lambda product: product.name,
+    'description': lambda product: product.description,
+    'price': lambda product: product.price,
+    'customizations': lambda product: product.customizations,
+    'has_boba': lambda product: product.has_boba,
+    'is_seasonal': lambda product: product.is_seasonal,
+    'image_url': lambda product: product.image_url,
+    'alerts': lambda product: product.alerts,
+    'review_count': lambda product: product.review_count
+}
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+
+def localize_menu(products, lang):
+    """translate product names, descriptions, alerts and ingredient names in place"""
+    texts = set()
+    for product_data in products:
+        texts.update(product_data.get(field) for field in LOCALIZED_FIELDS)
+        texts.update(ingredient['name'] for ingredient in product_data.get('ingredients', []))
+    texts = [text for text in texts if text]
+    if not texts:
+        return
+
+    translations, _ = translation_cache.translate(texts, lang)
+    translated = dict(zip(texts, translations))
+
+    for product_data in products:
+        for field in LOCALIZED_FIELDS:
+            if product_data.get(field):
+                product_data[field] = translated[product_data[field]]
+        for ingredient in product_data.get('ingredients', []):
+            ingredient['name'] = translated[ingredient['name']]
+
+
+def build_menu(fields=None, lang=None):
+    """
+    serialize every product with its ingredients
+
+    with no fields the full menu is built. otherwise only the requested product fields are included
+    and ingredients are listed by id and name only. with a lang the menu text is translated
+    """
+    with_ingredients = fields is None or 'ingredients' in fields
+    product_fields = [field for field in PRODUCT_FIELDS if fields is None or field in fields]
+
+    # fetch all products with their recipes, and all ingredients if the view lists them
+    query = Product.query
+    if with_ingredients:
+        query = query.options(selectinload(Product.product_ingredients))
+    product_result = query.all()
+    ingredient_map = {
+        ingredient.id: ingredient for ingredient in Ingredient.query.all()
+    } if with_ingredients else {}
+
+    products = []
+    for product in product_result:
+        # column values go straight to the encoder, which handles UUID, Decimal and dates
+        product_data = {field: PRODUCT_FIELDS[field](product) for field in product_fields}
+
+        if with_ingredients:
+            ingredients = (ingredient_map.get(pi.ingredientid) for pi in product.product_ingredients)
+            if fields is None:
+                product_data['ingredients'] = [
+                    {
+                        'id': ingredient.id,
+                        'name': ingredient.name,
+                        'quantity': ingredient.quantity,
+                        'supplier': ingredient.supplier,
+                        'expiration': ingredient.expiration
+                    }
+                    for ingredient in ingredients if ingredient is not None
+                ]
+            else:
+                product_data['ingredients'] = [
+                    {'id': ingredient.id, 'name': ingredient.name}
+                    for ingredient in ingredients if ingredient is not None
+                ]
+
+        products.append(product_data)
+
+    if lang:
+        localize_menu(products, lang)
+
+    return dumps_bytes({'data': products})
+
+
+def menu_fields():
+    """normalized field selection from the view and fields query parameters, None for the full menu"""
+    view = request.args.get('view')
+    requested = request.args.get('fields')
+
+    if requested:
+        fields = {field.strip() for field in requested.split(',')}
+    elif view in MENU_VIEWS:
+        fields = MENU_VIEWS[view]
+    else:
+        return None
+
+    unknown = fields - MENU_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    return tuple(sorted(fields | {'id'}))
+
+
+def menu_language():
+    """requested menu language, None for the untranslated menu"""
+    lang = request.args.get('lang', 'en').lower()
+    if lang not in MENU_LANGUAGES:
+        raise ValueError(f"Unsupported language: {lang}")
+    return None if lang == 'en' else lang
+
+
+def refresh_menu():
+    """drop cached menus after an edit and rebuild the translated ones in the background"""
+    menu_cache.invalidate()
+    menu_cache.rebuild(current_app._get_current_object())
+
+
+def menu_response(snapshot):
+    """serve a menu snapshot, or a bodiless 304 if the client already has it"""
+    response = Response(snapshot.body, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+
 '''
 GET products endpoint
 
-This endpoint gets all of the menu items avaliable for sale
+This endpoint gets all of the menu items avaliable for sale. Pass view=kiosk or a comma separated
+fields list to get only some product fields, reviews are paged separately by /getreviews.
+Each serialized view is cached until a product, ingredient or review changes, and clients sending
+If-None-Match get a 304 when it has not. Ingredient stock in the menu is as of the cached version,
+/getingredients has live stock. Pass lang (one of the kiosk languages) to get the menu with its names,
+descriptions, alerts and ingredient names translated, served from the same cache.
 '''
 
 @product_routes_bp.route("/getproducts", methods=['GET'])
 def get_products():
-    products = []
+    try:
+        fields = menu_fields()
+        lang = menu_language()
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 400
 
     try:
-        # fetch all products and ingredients
-        product_result = Product.query.all()
-        ingredient_result = Ingredient.query.all()
-        ingredient_map = {
-            str(ingredient.id): ingredient for ingredient in ingredient_result
-        }
-
-        # format product data with ingredients and reviews
-        for product in product_result:
-            ingredients = []
-
-            # get ingredient details for each product
-            for pi in product.product_ingredients:
-                ingredient = ingredient_map.get(str(pi.ingredientid))
-                if ingredient is None:
-                    continue
-
-                ingredient_data = {
-                    'id': str(ingredient.id),
-                    'name': ingredient.name,
-                    'quantity': ingredient.quantity,
-                    'supplier': ingredient.supplier,
-                    'expiration': ingredient.expiration.isoformat()  # ensure serializable
-                }
-                ingredients.append(ingredient_data)
-
-            # get review details for each product
-            reviews = []
-            for review in product.product_reviews:
-                review_data = {
-                    'id': str(review.id),
-                    'customer_id': review.customer_id,
-                    'review_text': review.review_text,
-                    'created_at': review.created_at.isoformat() if review.created_at else None
-                }
-                reviews.append(review_data)
-
-            products.append({
-                'id': str(product.id),
-                'name': product.name,
-                'description': product.description,
-                'price': float(product.price),
-                'customizations': product.customizations,
-                'has_boba': product.has_boba,
-                'is_seasonal': product.is_seasonal,
-                'ingredients': ingredients,
-                'image_url': product.image_url,
-                'alerts': product.alerts,
-                'reviews': reviews
-            })
-
-    except Exception as error:
-        print(error)
+        # translated menus are rebuilt in the background after every menu edit
+        snapshot = menu_cache.get(('menu', fields, lang), lambda: build_menu(fields, lang), keep_warm=lang is not None)
+    except TranslatorError as error:
+        return jsonify({'error': error.message}), error.status_code
+    except Exception:
+        log.exception("Error getting products")
         return jsonify({'error': 'Something went wrong!'}), 500
 
-    return jsonify({'data': products})
+    return menu_response(snapshot)
 
 '''
 UPDATE product SET price endpoint
@@ -112,10 +220,11 @@ def update_product_price():
 
         product.price = new_price
         db.session.commit()
+        refresh_menu()
 
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error updating product price")
         return jsonify({'error': 'Something went wrong!'}), 500
 
     return jsonify({"success": True, 'data': {'id': product.id, 'name': product.name, 'description': product.description, 'price': product.price, 'customizations': product.customizations, 'has_boba': product.has_boba}})
@@ -146,7 +255,7 @@ def add_menu_item():
                 file_path = os.path.join(UPLOAD_FOLDER, f"{filename}.png")
                 image_file.save(file_path)
             except Exception as e:
-                print(f"Error saving image: {str(e)}")
+                log.exception("Error saving image")
                 return jsonify({'error': f'Failed to save image: {str(e)}'}), 500
 
         # extract product details from request
@@ -202,15 +311,16 @@ def add_menu_item():
             db.session.add(product_ingredient)
 
         db.session.commit()
+        refresh_menu()
 
         # return the newly created product
         return jsonify({
             'success': True,
             'data': {
-                'id': str(new_product.id),
+                'id': new_product.id,
                 'name': new_product.name,
                 'description': new_product.description,
-                'price': float(new_product.price),
+                'price': new_product.price,
                 'customizations': new_product.customizations,
                 'has_boba': new_product.has_boba,
                 'is_seasonal': new_product.is_seasonal,
@@ -218,9 +328,9 @@ def add_menu_item():
             }
         })
 
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error adding menu item")
         return jsonify({'error': 'Something went wrong!'}), 500
 
 
@@ -274,10 +384,11 @@ def add_product():
 
         db.session.add(new_product)
         db.session.commit()
+        refresh_menu()
 
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error adding product")
         return jsonify({'error': 'Something went wrong!'}), 500
 
     return jsonify({"success": True, "data": {'id': new_product.id, 'name': new_product.name, 'description': new_product.description, 'price': new_product.price, 'customizations': new_product.customizations, 'boba': new_product.has_boba, 'image_url': new_product.image_url}})
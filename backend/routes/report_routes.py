@@ -1,9 +1,21 @@
+from collections import defaultdict
 from flask import Blueprint, jsonify, request
-from datetime import datetime, timedelta
-from sqlalchemy import func, cast, Date
-from database import db, OrderTable, ProductOrder, Product, Ingredient, ProductIngredient, Employee
+import logging
+from datetime import date, datetime, time, timedelta
+from sqlalchemy.exc import IntegrityError
+import uuid
+
+from database import db, ZReportSnapshot
+from services.report_pool import run_concurrently
+from services.sales_rollup import employee_sales, ingredient_usage, product_sales, sales_breakdown
 
 report_routes_bp = Blueprint('report_routes', __name__)
+log = logging.getLogger(__name__)
+
+# time breakdown shown for each report range
+BREAKDOWN_UNITS = {'daily': 'hour', 'weekly': 'day', 'monthly': 'week'}
+# period name and text shown on each Z-Report range
+Z_REPORT_PERIODS = {'daily': ("Daily", "Today"), 'weekly': ("Weekly", "This Week"), 'monthly': ("Monthly", "This Month")}
 
 '''
 GET X-Report endpoint
@@ -24,144 +36,79 @@ def get_x_report():
             end_date = today
             period_name = "Weekly"
             time_unit_name = "Daily"  
-            filter_condition = func.date(OrderTable.order_date) >= start_date
         elif time_range == 'monthly':
             # Calculate start of month
             start_date = today.replace(day=1)
             end_date = today
             period_name = "Monthly"
             time_unit_name = "Weekly" 
-            filter_condition = func.date(OrderTable.order_date) >= start_date
         else:
             # Daily (default)
             start_date = today
             end_date = today
             period_name = "Daily"
             time_unit_name = "Hourly"  
-            filter_condition = func.date(OrderTable.order_date) == today
-        
-        # Get basic sales totals with the appropriate filter
-        orders_query = OrderTable.query.filter(filter_condition)
-        total_orders = orders_query.count()
         
+        # The time breakdown, product sales and employee performance are independent, run them at once.
+        # The breakdown comes from one grouped query and gives the order count and subtotal too
+        start_dt = datetime.combine(start_date, time.min)
+        end_dt = datetime.combine(today + timedelta(days=1), time.min)
+        breakdown, products, employees = run_concurrently(
+            (sales_breakdown, start_dt, end_dt, BREAKDOWN_UNITS.get(time_range, 'hour')),
+            (product_sales, start_dt, end_dt),
+            (employee_sales, start_dt, end_dt)
+        )
+
+        total_orders = sum(orders for _, orders, _ in breakdown)
+
         # Calculate sales totals
-        sales_data = db.session.query(
-            func.sum(OrderTable.total).label('subtotal')
-        ).filter(filter_condition).first()
-        
-        subtotal = float(sales_data.subtotal or 0)
+        subtotal = float(sum(sales for _, _, sales in breakdown))
         tax_total = subtotal * 0.0825 
         total_sales = subtotal + tax_total
         
         time_breakdown = []
         
-        if time_range == 'daily':
-            # Hourly breakdown for daily reports
-            for hour in range(0, 24):
-                start_time = datetime.combine(today, datetime.min.time()) + timedelta(hours=hour)
-                end_time = start_time + timedelta(hours=1)
-                
-                hour_sales = db.session.query(
-                    func.sum(OrderTable.total).label('total')
-                ).filter(
-                    OrderTable.order_date >= start_time,
-                    OrderTable.order_date < end_time
-                ).first()
-                
-                hour_total = float(hour_sales.total or 0)
-                if hour_total > 0:  # Only include hours with sales
-                    time_breakdown.append({
-                        "hour": start_time.strftime("%I:%M %p"),
-                        "total": hour_total
-                    })
-        
-        elif time_range == 'weekly':
-            # Daily breakdown for weekly reports
-            for day_offset in range(7):
-                day_date = start_date + timedelta(days=day_offset)
-                if day_date > today:
-                    break  
-                
-                day_sales = db.session.query(
-                    func.sum(OrderTable.total).label('total')
-                ).filter(
-                    func.date(OrderTable.order_date) == day_date
-                ).first()
-                
-                day_total = float(day_sales.total or 0)
-                if day_total > 0 or day_date == today: 
+        for bucket_start, _, sales in breakdown:
+            bucket_total = float(sales)
+
+            if time_range == 'weekly':
+                # Daily breakdown for weekly reports, days with sales and today
+                if bucket_total > 0 or bucket_start.date() == today:
                     time_breakdown.append({
-                        "hour": day_date.strftime("%a, %b %d"), 
-                        "total": day_total
+                        "hour": bucket_start.strftime("%a, %b %d"),
+                        "total": bucket_total
                     })
-        
-        else:  # monthly
-            # Weekly breakdown for monthly reports
-            current_week_start = start_date
-            week_number = 1
-            
-            while current_week_start <= today:
-                week_end = min(current_week_start + timedelta(days=6), today)
-                
-                week_sales = db.session.query(
-                    func.sum(OrderTable.total).label('total')
-                ).filter(
-                    func.date(OrderTable.order_date) >= current_week_start,
-                    func.date(OrderTable.order_date) <= week_end
-                ).first()
-                
-                week_total = float(week_sales.total or 0)
+            elif time_range == 'monthly':
+                # Weekly breakdown for monthly reports
+                week_start = bucket_start.date()
+                week_end = min(week_start + timedelta(days=6), today)
+                week_number = (week_start - start_date).days // 7 + 1
                 time_breakdown.append({
-                    "hour": f"Week {week_number} ({current_week_start.strftime('%b %d')} - {week_end.strftime('%b %d')})",
-                    "total": week_total
+                    "hour": f"Week {week_number} ({week_start.strftime('%b %d')} - {week_end.strftime('%b %d')})",
+                    "total": bucket_total
+                })
+            elif bucket_total > 0:
+                # Hourly breakdown for daily reports, only hours with sales
+                time_breakdown.append({
+                    "hour": bucket_start.strftime("%I:%M %p"),
+                    "total": bucket_total
                 })
-                
-                current_week_start = week_end + timedelta(days=1)
-                week_number += 1
-        
-        product_sales = []
-        product_data = db.session.query(
-            Product.id,
-            Product.name,
-            func.sum(ProductOrder.quantity).label('quantity'),
-            func.sum(Product.price * ProductOrder.quantity).label('total')
-        ).join(
-            ProductOrder, ProductOrder.productid == Product.id
-        ).join(
-            OrderTable, OrderTable.id == ProductOrder.orderid
-        ).filter(
-            filter_condition
-        ).group_by(
-            Product.id, Product.name
-        ).all()
         
-        for product in product_data:
-            product_sales.append({
-                "name": product.name,
-                "quantity": product.quantity,
-                "total": float(product.total or 0)
+        product_sales_data = []
+        for _, name, quantity, total in products:
+            product_sales_data.append({
+                "name": name,
+                "quantity": quantity,
+                "total": total or 0
             })
         
         # Get employee performance
         employee_performance = []
-        employee_data = db.session.query(
-            Employee.id,
-            Employee.name,
-            func.count(OrderTable.id).label('orders'),
-            func.sum(OrderTable.total).label('sales')
-        ).join(
-            OrderTable, OrderTable.employeeid == Employee.id
-        ).filter(
-            filter_condition
-        ).group_by(
-            Employee.id, Employee.name
-        ).all()
-        
-        for employee in employee_data:
+        for _, name, orders, sales in employees:
             employee_performance.append({
-                "name": employee.name,
-                "orders": employee.orders,
-                "sales": float(employee.sales or 0)
+                "name": name,
+                "orders": orders,
+                "sales": sales or 0
             })
         
         # Compile the report data
@@ -173,124 +120,213 @@ def get_x_report():
             "timeRange": time_range,
             "periodName": period_name,
             "timeUnitName": time_unit_name,
-            "startDate": start_date.isoformat(),
-            "endDate": end_date.isoformat(),
+            "startDate": start_date,
+            "endDate": end_date,
             "hourlySales": time_breakdown,
-            "productSales": product_sales,
+            "productSales": product_sales_data,
             "employeePerformance": employee_performance
         }
         
         return jsonify({"data": report_data})
         
     except Exception as error:
-        print(f"Error generating X-Report: {error}")
+        log.exception("Error generating X-Report")
         return jsonify({'error': f'Error generating X-Report: {str(error)}'}), 500
 
+def compose_z_report(start_date, end_date):
+    """
+    totals, ingredient usage and employee sales for [start_date, end_date]
+
+    days before today that have a daily snapshot are taken from it, the remaining runs of
+    consecutive days are read from the sales rollups with one set of queries per run, all
+    run at once. today's snapshot was taken partway through the day, so today is always read
+    from the rollups unless the snapshot was generated after the day ended
+    """
+    today = date.today()
+    closed_days = {
+        snapshot.start_date: snapshot
+        for snapshot in ZReportSnapshot.query.filter(
+            ZReportSnapshot.time_range == 'daily',
+            ZReportSnapshot.start_date >= start_date,
+            ZReportSnapshot.end_date <= end_date
+        )
+        if snapshot.start_date < today
+        or snapshot.generated_at >= datetime.combine(snapshot.start_date + timedelta(days=1), time.min)
+    }
+
+    ingredients = defaultdict(int)
+    employees = defaultdict(lambda: {"orders": 0, "sales": 0.0})
+
+    for snapshot in closed_days.values():
+        for ingredient in snapshot.ingredients_used:
+            ingredients[ingredient["name"]] += ingredient["count"]
+        for employee in snapshot.sales_per_employee:
+            employees[employee["name"]]["orders"] += employee["orders"]
+            employees[employee["name"]]["sales"] += employee["sales"]
+
+    calls = []
+    day = start_date
+    while day <= end_date:
+        if day in closed_days:
+            day += timedelta(days=1)
+            continue
+
+        run_start = day
+        while day <= end_date and day not in closed_days:
+            day += timedelta(days=1)
+
+        start_dt = datetime.combine(run_start, time.min)
+        end_dt = datetime.combine(day, time.min)
+        calls += [(ingredient_usage, start_dt, end_dt), (employee_sales, start_dt, end_dt)]
+
+    results = run_concurrently(*calls)
+    for ingredient_rows, employee_rows in zip(results[::2], results[1::2]):
+        for _, name, count, _ in ingredient_rows:
+            ingredients[name] += count or 0
+        for _, name, orders, sales in employee_rows:
+            employees[name]["orders"] += orders or 0
+            employees[name]["sales"] += float(sales or 0)
+
+    sales_per_employee = [{"name": name, **totals} for name, totals in employees.items()]
+    ingredients_used = [{"name": name, "count": count} for name, count in ingredients.items()]
+
+    return ingredients_used, sales_per_employee
+
+
+def serialize_z_report(snapshot):
+    period_name, period_text = Z_REPORT_PERIODS[snapshot.time_range]
+    return {
+        "id": snapshot.id,
+        "totalOrders": snapshot.total_orders,
+        "subtotal": snapshot.subtotal,
+        "totalTax": snapshot.total_tax,
+        "totalSales": snapshot.total_sales,
+        "timeRange": snapshot.time_range,
+        "periodName": period_name,
+        "periodText": period_text,
+        "startDate": snapshot.start_date,
+        "endDate": snapshot.end_date,
+        "ingredientsUsed": snapshot.ingredients_used,
+        "salesPerEmployee": snapshot.sales_per_employee,
+        "reportDate": snapshot.end_date,
+        "generatedAt": snapshot.generated_at
+    }
+
+
 '''
 POST Z-Report endpoint
 
-This endpoint generates a Z-Report for the selected time range (daily, weekly, monthly)
+This endpoint generates a Z-Report for the selected time range (daily, weekly, monthly). The first
+report for a period is stored as an immutable snapshot, generating it again returns the stored one.
 '''
 @report_routes_bp.route("/generatezreport", methods=['POST'])
 def generate_z_report():
     try:
         data = request.get_json()
         time_range = data.get('timeRange', 'daily')
+        if time_range not in Z_REPORT_PERIODS:
+            time_range = 'daily'
         
         today = datetime.now().date()
         
         if time_range == 'weekly':
             start_date = today - timedelta(days=today.weekday())
-            period_name = "Weekly"
-            filter_condition = func.date(OrderTable.order_date) >= start_date
-            period_text = "This Week"
         elif time_range == 'monthly':
             start_date = today.replace(day=1)
-            period_name = "Monthly"
-            filter_condition = func.date(OrderTable.order_date) >= start_date
-            period_text = "This Month"
         else:
             start_date = today
-            period_name = "Daily"
-            filter_condition = func.date(OrderTable.order_date) == today
-            period_text = "Today"
-        
-        orders_query = OrderTable.query.filter(filter_condition)
-        total_orders = orders_query.count()
-        
-        sales_data = db.session.query(
-            func.sum(OrderTable.total).label('subtotal')
-        ).filter(filter_condition).first()
-        
-        subtotal = float(sales_data.subtotal or 0)
+
+        # a closed period is served from its snapshot
+        snapshot = ZReportSnapshot.query.filter_by(time_range=time_range, start_date=start_date, end_date=today).first()
+        if snapshot:
+            return jsonify({"data": serialize_z_report(snapshot)})
+
+        ingredients_used, sales_per_employee = compose_z_report(start_date, today)
+
+        total_orders = sum(employee["orders"] for employee in sales_per_employee)
+        subtotal = sum(employee["sales"] for employee in sales_per_employee)
         tax_total = subtotal * 0.0825  
         total_sales = subtotal + tax_total
+
+        snapshot = ZReportSnapshot(
+            time_range=time_range,
+            start_date=start_date,
+            end_date=today,
+            total_orders=total_orders,
+            subtotal=round(subtotal, 2),
+            total_tax=round(tax_total, 2),
+            total_sales=round(total_sales, 2),
+            ingredients_used=ingredients_used,
+            sales_per_employee=sales_per_employee,
+            generated_at=datetime.now()
+        )
+
+        try:
+            db.session.add(snapshot)
+            db.session.commit()
+        except IntegrityError:
+            # another request closed the same period first, its snapshot wins
+            db.session.rollback()
+            snapshot = ZReportSnapshot.query.filter_by(time_range=time_range, start_date=start_date, end_date=today).first()
         
-        ingredients_used = []
-        ingredient_data = db.session.query(
-            Ingredient.id,
-            Ingredient.name,
-            func.count(ProductIngredient.id).label('count')
-        ).join(
-            ProductIngredient, ProductIngredient.ingredientid == Ingredient.id
-        ).join(
-            Product, Product.id == ProductIngredient.productid
-        ).join(
-            ProductOrder, ProductOrder.productid == Product.id
-        ).join(
-            OrderTable, OrderTable.id == ProductOrder.orderid
-        ).filter(
-            filter_condition
-        ).group_by(
-            Ingredient.id, Ingredient.name
-        ).all()
-        
-        for ingredient in ingredient_data:
-            ingredients_used.append({
-                "name": ingredient.name,
-                "count": ingredient.count
-            })
-        
-        sales_per_employee = []
-        employee_data = db.session.query(
-            Employee.id,
-            Employee.name,
-            func.count(OrderTable.id).label('orders'),
-            func.sum(OrderTable.total).label('sales')
-        ).join(
-            OrderTable, OrderTable.employeeid == Employee.id
-        ).filter(
-            filter_condition
-        ).group_by(
-            Employee.id, Employee.name
-        ).all()
-        
-        for employee in employee_data:
-            sales_per_employee.append({
-                "name": employee.name,
-                "orders": employee.orders,
-                "sales": float(employee.sales or 0)
-            })
-        
-        # Compile the Z-Report data
-        z_report_data = {
-            "totalOrders": total_orders,
-            "subtotal": subtotal,
-            "totalTax": tax_total,
-            "totalSales": total_sales,
-            "timeRange": time_range,
-            "periodName": period_name,
-            "periodText": period_text,
-            "startDate": start_date.isoformat(),
-            "endDate": today.isoformat(),
-            "ingredientsUsed": ingredients_used,
-            "salesPerEmployee": sales_per_employee,
-            "reportDate": today.isoformat(),
-            "generatedAt": datetime.now().isoformat()
-        }
-        
-        return jsonify({"data": z_report_data})
+        return jsonify({"data": serialize_z_report(snapshot)})
         
     except Exception as error:
-        print(f"Error generating Z-Report: {error}")
-        return jsonify({'error': f'Error generating Z-Report: {str(error)}'}), 500
\ No newline at end of file
+        db.session.rollback()
+        log.exception("Error generating Z-Report")
+        return jsonify({'error': f'Error generating Z-Report: {str(error)}'}), 500
+
+
+'''
+GET Z-Report history endpoint
+
+This endpoint lists stored Z-Report snapshots, newest period first, without their ingredient and
+employee breakdowns. Pass the endDate of the last snapshot as "before" to get the next page.
+'''
+@report_routes_bp.route("/getzreports", methods=['GET'])
+def get_z_reports():
+    try:
+        time_range = request.args.get('timeRange')
+        before = request.args.get('before')
+        limit = min(request.args.get('limit', 30, type=int), 100)
+
+        query = ZReportSnapshot.query
+        if time_range:
+            query = query.filter(ZReportSnapshot.time_range == time_range)
+        if before:
+            query = query.filter(ZReportSnapshot.end_date < date.fromisoformat(before))
+
+        snapshots = query.order_by(ZReportSnapshot.end_date.desc(), ZReportSnapshot.start_date.desc()).limit(limit).all()
+
+        reports = []
+        for snapshot in snapshots:
+            report = serialize_z_report(snapshot)
+            del report["ingredientsUsed"], report["salesPerEmployee"]
+            reports.append(report)
+
+        return jsonify({"data": reports})
+
+    except Exception as error:
+        log.exception("Error listing Z-Reports")
+        return jsonify({'error': f'Error listing Z-Reports: {str(error)}'}), 500
+
+
+'''
+GET Z-Report snapshot endpoint
+
+This endpoint gets one stored Z-Report snapshot by id
+'''
+@report_routes_bp.route("/getzreport/<id>", methods=['GET'])
+def get_z_report(id):
+    try:
+        snapshot = db.session.get(ZReportSnapshot, uuid.UUID(id))
+        if not snapshot:
+            return jsonify({'error': 'Z-Report not found'}), 404
+
+        return jsonify({"data": serialize_z_report(snapshot)})
+
+    except ValueError:
+        return jsonify({'error': 'Z-Report not found'}), 404
+    except Exception as error:
+        log.exception("Error fetching Z-Report")
+        return jsonify({'error': f'Error fetching Z-Report: {str(error)}'}), 500
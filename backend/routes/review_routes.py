@@ -1,11 +1,82 @@
 from flask import Blueprint, jsonify, request
+import logging
 import uuid
 from datetime import datetime
+from sqlalchemy import tuple_, update
 
 from database import db, ProductReview, Customer, Product
+from services.menu_cache import menu_cache
 
 # blueprint for handling review-related routes
 review_routes_bp = Blueprint('review_routes', __name__)
+log = logging.getLogger(__name__)
+
+REVIEW_PAGE_SIZE = 20
+MAX_REVIEW_PAGE_SIZE = 100
+
+
+def serialize_review(review):
+    return {
+        'id': str(review.id),
+        'customer_id': review.customer_id,
+        'review_text': review.review_text,
+        'created_at': review.created_at.isoformat() if review.created_at else None
+    }
+
+
+def change_review_count(product_id, delta):
+    db.session.execute(
+        update(Product)
+        .where(Product.id == product_id)
+        .values(review_count=Product.review_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+'''
+GET reviews endpoint
+
+This endpoint gets one page of a product's reviews, newest first. Pages are keyset paginated: pass
+the next_cursor of a page as cursor to get the following one, it is null on the last page.
+'''
+@review_routes_bp.route("/getreviews/<product_id>", methods=['GET'])
+def get_reviews(product_id):
+    try:
+        limit = min(max(request.args.get('limit', REVIEW_PAGE_SIZE, type=int), 1), MAX_REVIEW_PAGE_SIZE)
+        cursor = request.args.get('cursor')
+
+        product = Product.query.get(uuid.UUID(product_id))
+        if not product:
+            return jsonify({'error': 'Product not found'}), 404
+
+        query = ProductReview.query.filter(ProductReview.product_id == product.id)
+
+        # continue after the last review of the previous page
+        if cursor:
+            created_at, review_id = cursor.split(',')
+            query = query.filter(
+                tuple_(ProductReview.created_at, ProductReview.id) < (datetime.fromisoformat(created_at), uuid.UUID(review_id))
+            )
+
+        # fetch one extra row to know whether another page follows
+        reviews = query.order_by(ProductReview.created_at.desc(), ProductReview.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            next_cursor = f"{reviews[-1].created_at.isoformat()},{reviews[-1].id}"
+
+        return jsonify({
+            'data': [serialize_review(review) for review in reviews],
+            'review_count': product.review_count,
+            'next_cursor': next_cursor
+        })
+
+    except ValueError:
+        return jsonify({'error': 'Invalid product id or cursor'}), 400
+    except Exception:
+        log.exception("Error getting reviews")
+        return jsonify({'error': 'Something went wrong!'}), 500
+
 
 @review_routes_bp.route("/addreview", methods=['POST'])
 def add_review():
@@ -41,7 +112,9 @@ def add_review():
         )
 
         db.session.add(new_review)
+        change_review_count(product.id, 1)
         db.session.commit()
+        menu_cache.invalidate()
 
         return jsonify({
             'success': True,
@@ -52,9 +125,9 @@ def add_review():
                 'review_text': str(new_review.review_text) 
             }
         })
-    except Exception as error:
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error adding review")
         return jsonify({'error': 'Something went wrong!'}), 500
     
 @review_routes_bp.route("/deletereview", methods=['POST'])
@@ -80,10 +153,12 @@ def delete_review():
 
         # delete review
         db.session.delete(review)
+        change_review_count(review.product_id, -1)
         db.session.commit()
-    except Exception as error:
+        menu_cache.invalidate()
+    except Exception:
         db.session.rollback()
-        print(error)
+        log.exception("Error deleting review")
         return jsonify({'error': 'Something went wrong!'}), 500
 
     return jsonify({
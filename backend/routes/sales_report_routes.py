@@ -1,14 +1,16 @@
+from collections import defaultdict
 from flask import Blueprint, jsonify, request
-from database import Product, ProductOrder, OrderTable, db  # Use existing db instance
-from sqlalchemy import func, text
+import logging
+from services.sales_rollup import product_sales
 from datetime import datetime, timedelta
 
 sales_report_routes_bp = Blueprint('sales_routes', __name__)
+log = logging.getLogger(__name__)
 
 '''
 GET sales report endpoint
 
-This endpoint aggregates sales totals for different time intervals
+This endpoint aggregates sales totals for different time intervals from the hourly sales rollups
 '''
 @sales_report_routes_bp.route("/getsalesreport", methods=['GET'])
 def get_sales_report():
@@ -52,35 +54,24 @@ def get_sales_report():
             start_date = datetime.strptime(start_date_str, '%Y-%m-%d %H:%M:%S')
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d %H:%M:%S')
 
-        print(f"Using start_date: {start_date}, end_date: {end_date}")
+        log.debug("Using start_date: %s, end_date: %s", start_date, end_date)
 
-        # Query the database based on the calculated or provided date range
-        sales_query = db.session.query(
-            Product.name.label('product_name'),
-            func.sum(ProductOrder.quantity).label('total_quantity_sold'),
-            func.sum(ProductOrder.quantity * Product.price).label('total_sales')
-        ).join(
-            ProductOrder, ProductOrder.productid == Product.id
-        ).join(
-            OrderTable, ProductOrder.orderid == OrderTable.id
-        ).filter(
-            OrderTable.order_date.between(start_date, end_date)  # Filter based on the date range
-        ).group_by(
-            Product.name
-        ).order_by(
-            text('total_sales DESC')
-        ).all()
+        # Read the hourly rollups for the range, combining products that share a name
+        totals = defaultdict(lambda: [0, 0.0])
+        for _, name, quantity, sales in product_sales(start_date, end_date):
+            totals[name][0] += quantity or 0
+            totals[name][1] += float(sales or 0)
 
-        # Collect the result
-        for item in sales_query:
+        # Collect the result, best sellers first
+        for name, (quantity, sales) in sorted(totals.items(), key=lambda item: item[1][1], reverse=True):
             sales_data.append({
-                'product_name': item.product_name,
-                'total_quantity_sold': item.total_quantity_sold,
-                'total_sales': float(item.total_sales)
+                'product_name': name,
+                'total_quantity_sold': quantity,
+                'total_sales': sales
             })
 
-    except Exception as error:
-        print(error)
+    except Exception:
+        log.exception("Error generating sales report")
         return jsonify({'error': 'Something went wrong!'}), 500
 
     return jsonify({'data': sales_data})
@@ -1,21 +1,25 @@
 from flask import Blueprint, request, jsonify
-import os
-import requests
-from dotenv import load_dotenv
+import logging
 
-load_dotenv()
+from database import db
+from services.translation_cache import translation_cache
+from services.translator import TranslatorError
 
 # blueprint for handling translation-related routes
 translation_routes_bp = Blueprint('translation_routes_bp', __name__)
+log = logging.getLogger(__name__)
 
 # # Using DeepL Translation API | Limited to 500,000 char per month
 # DEEPL_API_KEY = os.getenv("DEEPL_API_KEY")
 # DEEPL_API_URL = "https://api-free.deepl.com/v2/translate"
 
-# Using Azure Translation API | Limited to 2M char per month
-AZURE_TRANSLATOR_KEY = os.getenv("AZURE_TRANSLATOR_KEY")
-AZURE_TRANSLATOR_ENDPOINT = os.getenv("AZURE_TRANSLATOR_ENDPOINT")
-AZURE_TRANSLATOR_REGION = os.getenv("AZURE_TRANSLATOR_REGION")
+'''
+POST translate endpoint
+
+This endpoint translates a list of texts into target_lang. Translations are cached in memory and in
+the translation table, so only strings that were never translated into that language reach the Azure
+translator. cached lists, for each text, whether its translation came from the cache.
+'''
 
 @translation_routes_bp.route('/translate', methods=['POST'])
 def translate_text():
@@ -27,27 +31,13 @@ def translate_text():
     if not texts:
         return jsonify({"error": "No texts provided"}), 400
 
-    # set up azure translator api headers
-    headers = {
-        "Ocp-Apim-Subscription-Key": AZURE_TRANSLATOR_KEY,
-        "Ocp-Apim-Subscription-Region": AZURE_TRANSLATOR_REGION,
-        "Content-Type": "application/json"
-    }
-
-    # format request body for translation
-    body = [{"Text": text} for text in texts]
-
-    # make translation request to azure
-    response = requests.post(
-        f"{AZURE_TRANSLATOR_ENDPOINT}/translate?api-version=3.0&to={target_lang.lower()}",
-        headers=headers,
-        json=body
-    )
-
-    # handle response
-    if response.status_code == 200:
-        json_response = response.json()
-        translations = [item["translations"][0]["text"] for item in json_response]
-        return jsonify({"translations": translations})
-    else:
-        return jsonify({"error": response.text}), response.status_code
+    try:
+        translations, cached = translation_cache.translate(texts, target_lang)
+    except TranslatorError as error:
+        return jsonify({"error": error.message}), error.status_code
+    except Exception:
+        db.session.rollback()
+        log.exception("Error translating texts")
+        return jsonify({'error': 'Something went wrong!'}), 500
+
+    return jsonify({"translations": translations, "cached": cached})
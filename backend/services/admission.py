@@ -0,0 +1,103 @@
+import os
+import threading
+
+from flask import g, jsonify, request
+
+from services.metrics import metrics
+
+# report requests one worker process runs at once, keep it below the worker's thread count
+REPORT_CONCURRENCY = int(os.getenv('REPORT_CONCURRENCY', '1'))
+# report requests that may wait for a free slot, any more are turned away at once
+REPORT_QUEUE = int(os.getenv('REPORT_QUEUE', '1'))
+# seconds a report request waits for a slot before it is turned away
+REPORT_QUEUE_SECONDS = float(os.getenv('REPORT_QUEUE_SECONDS', '1'))
+# seconds a client is told to wait before trying again
+REPORT_RETRY_AFTER = int(os.getenv('REPORT_RETRY_AFTER', '5'))
+
+# blueprints whose heavy scans share the report lane
+REPORT_BLUEPRINTS = ('report_routes', 'sales_routes', 'charts_routes')
+
+
+class Lane:
+    """
+    a bounded lane for one group of endpoints
+
+    at most limit requests run at once and at most max_waiting wait, each for up to queue_timeout
+    seconds. everything else is refused straight away, so the lane can never hold more than
+    limit + max_waiting of a worker's threads or database connections.
+    """
+
+    def __init__(self, name, limit, max_waiting, queue_timeout, retry_after):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def acquire(self):
+        """take a slot, returning False if the lane is saturated"""
+        if self._slots.acquire(blocking=False):
+            return True
+
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                return False
+            self._waiting += 1
+        try:
+            return self._slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def release(self):
+        self._slots.release()
+
+
+_lanes = {}
+
+
+def _before_request():
+    lane = _lanes.get(request.blueprint)
+    if lane is None:
+        return None
+
+    if not lane.acquire():
+        metrics.observe_shed(lane.name)
+        response = jsonify({'error': 'Reports are busy, try again shortly'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(lane.retry_after)
+        return response
+
+    g.admission_lane = lane
+    return None
+
+
+def _teardown_request(error):
+    lane = g.pop('admission_lane', None)
+    if lane is not None:
+        lane.release()
+
+
+def add_lane(name, blueprints, limit, max_waiting, queue_timeout, retry_after):
+    lane = Lane(name, limit, max_waiting, queue_timeout, retry_after)
+    for blueprint in blueprints:
+        _lanes[blueprint] = lane
+    return lane
+
+
+def init_admission(app):
+    """
+    run the report, sales report and chart endpoints in their own bounded lane
+
+    when the lane is full they answer 503 with Retry-After instead of taking more of the worker
+    threads and pooled connections that order taking needs. register after init_metrics so refused
+    requests are still counted
+    """
+    if not _lanes:
+        add_lane('reports', REPORT_BLUEPRINTS, REPORT_CONCURRENCY, REPORT_QUEUE, REPORT_QUEUE_SECONDS,
+                 REPORT_RETRY_AFTER)
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+
+from sqlalchemy.sql import sqltypes
+
+from database import db
+
+# rows buffered per COPY or executemany round trip
+BULK_CHUNK_SIZE = 50000
+NULL = '\\N'
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _copy_value(value):
+    # None is written as the \N marker so it loads as NULL, while '' stays an empty string
+    if value is None:
+        return NULL
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _copy_chunk(cursor, table, columns, chunk):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([_copy_value(value) for value in row] for row in chunk)
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')", buffer
+    )
+
+
+def copy_rows(table, columns, rows, chunk_size=BULK_CHUNK_SIZE):
+    """
+    stream row tuples into table through the current session, returning the number of rows written
+
+    PostgreSQL loads each chunk with COPY FROM STDIN, other databases with one executemany INSERT
+    per chunk. rows can be any iterable, so large generated or exported data sets are never held
+    in memory at once. the caller commits
+    """
+    connection = db.session.connection()
+    written = 0
+
+    if connection.dialect.name == 'postgresql':
+        cursor = connection.connection.cursor()
+        try:
+            for chunk in _chunks(rows, chunk_size):
+                _copy_chunk(cursor, table, columns, chunk)
+                written += len(chunk)
+        finally:
+            cursor.close()
+        return written
+
+    stmt = table.insert()
+    for chunk in _chunks(rows, chunk_size):
+        connection.execute(stmt, [dict(zip(columns, row)) for row in chunk])
+        written += len(chunk)
+    return written
+
+
+def copy_csv(table, file):
+    """
+    load an open CSV file whose header row names the columns, returning the number of rows written
+
+    \\N marks NULL, as in the files export_csv writes. PostgreSQL streams the file straight into
+    COPY, other databases parse each value into the column's Python type first
+    """
+    columns = next(csv.reader([file.readline()]))
+    unknown = [column for column in columns if column not in table.columns]
+    if unknown:
+        raise ValueError(f"{table.name} has no column {', '.join(unknown)}")
+
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')", file
+            )
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    parsers = [_parser(table.columns[column]) for column in columns]
+    rows = (
+        [None if value == NULL else parse(value) for parse, value in zip(parsers, row)]
+        for row in csv.reader(file)
+    )
+    return copy_rows(table, columns, rows)
+
+
+def export_csv(table, file):
+    """write every row of table to an open file as CSV with a header row, returning the number of rows"""
+    columns = [column.name for column in table.columns]
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) TO STDOUT WITH (FORMAT csv, HEADER, NULL '{NULL}')", file
+            )
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    writer = csv.writer(file)
+    writer.writerow(columns)
+    written = 0
+    result = connection.execution_options(yield_per=BULK_CHUNK_SIZE).execute(table.select())
+    for chunk in result.partitions():
+        writer.writerows([_export_value(value) for value in row] for row in chunk)
+        written += len(chunk)
+    return written
+
+
+def _export_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return _copy_value(value)
+
+
+def _parse_bool(value):
+    return value.lower() in ('t', 'true', '1', 'yes', 'y')
+
+
+def _parser(column):
+    """text to Python value for one column, for databases without COPY"""
+    column_type = column.type
+    if isinstance(column_type, sqltypes.JSON):
+        return json.loads
+    if isinstance(column_type, sqltypes.Boolean):
+        return _parse_bool
+    if isinstance(column_type, sqltypes.DateTime):
+        return datetime.fromisoformat
+    if isinstance(column_type, sqltypes.Date):
+        return date.fromisoformat
+    if isinstance(column_type, sqltypes.Uuid):
+        return uuid.UUID
+    if isinstance(column_type, sqltypes.Numeric) and not isinstance(column_type, sqltypes.Float):
+        return Decimal
+    if isinstance(column_type, sqltypes.Integer):
+        return int
+    return str
@@ -0,0 +1,142 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# google endpoints, overridable to run the login flow against a local fake server
+GOOGLE_TOKEN_URL = os.getenv('GOOGLE_TOKEN_URL', 'https://oauth2.googleapis.com/token')
+GOOGLE_USERINFO_URL = os.getenv('GOOGLE_USERINFO_URL', 'https://www.googleapis.com/oauth2/v3/userinfo')
+GOOGLE_PEOPLE_URL = os.getenv('GOOGLE_PEOPLE_URL', 'https://people.googleapis.com/v1/people/me')
+GOOGLE_CERTS_URL = os.getenv('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v3/certs')
+GOOGLE_ISSUERS = ('https://accounts.google.com', 'accounts.google.com')
+
+# read the user from the ID token in the token response instead of calling userinfo
+GOOGLE_VERIFY_ID_TOKEN = os.getenv('GOOGLE_VERIFY_ID_TOKEN', '').lower() in ('1', 'true', 'yes')
+
+# seconds to connect and to wait for a response from google
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 5
+# connections kept open per google host
+POOL_SIZE = 10
+# google rotates its signing keys every few days, they are fetched again after this many seconds
+SIGNING_KEYS_MAX_AGE = 3600
+
+# claims copied from a verified ID token, the same fields userinfo returns
+USER_CLAIMS = ('sub', 'name', 'given_name', 'family_name', 'picture', 'email', 'email_verified', 'hd', 'locale')
+
+
+class GoogleAuthError(Exception):
+    """google did not accept the authorization code or returned an unusable token"""
+
+
+class GoogleOAuthClient:
+    """
+    google sign in over one pooled HTTP session
+
+    every call has a connect and read timeout. the userinfo and People API calls a customer login
+    needs are made concurrently, and with verify_id_token the user is read from the ID token
+    (checked against google's cached signing keys) so userinfo is not called at all.
+    """
+
+    def __init__(self, client_id=None, client_secret=None, verify_id_token=GOOGLE_VERIFY_ID_TOKEN):
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self.verify_id_token = verify_id_token
+        self._session = None
+        self._executor = None
+        self._signing_keys = None
+        self._lock = threading.Lock()
+
+    @property
+    def client_id(self):
+        return self._client_id or os.environ['GOOGLE_CLIENT_ID']
+
+    @property
+    def client_secret(self):
+        return self._client_secret or os.environ['GOOGLE_SECRET_KEY']
+
+    def _start(self):
+        # created on first use so importing the module opens nothing, and requests is only loaded
+        # by a worker that handles a login
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix='google-oauth')
+                self._signing_keys = jwt.PyJWKClient(
+                    GOOGLE_CERTS_URL, cache_keys=True, lifespan=SIGNING_KEYS_MAX_AGE, timeout=READ_TIMEOUT
+                )
+                self._session = session
+        return self._session, self._executor
+
+    def _get_json(self, url, access_token, params=None):
+        session, _ = self._start()
+        response = session.get(
+            url,
+            params=params,
+            headers={'Authorization': f'Bearer {access_token}'},
+            timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+        )
+        return response.json()
+
+    def exchange_code(self, auth_code):
+        """token response for an authorization code from the frontend's auth-code flow"""
+        session, _ = self._start()
+        token_response = session.post(GOOGLE_TOKEN_URL, data={
+            'code': auth_code,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'redirect_uri': 'postmessage',
+            'grant_type': 'authorization_code'
+        }, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)).json()
+
+        if 'access_token' not in token_response:
+            raise GoogleAuthError("Invalid authorization code")
+        return token_response
+
+    def _id_token_user(self, id_token):
+        self._start()
+        try:
+            signing_key = self._signing_keys.get_signing_key_from_jwt(id_token)
+            claims = jwt.decode(
+                id_token,
+                signing_key.key,
+                algorithms=['RS256'],
+                audience=self.client_id,
+                issuer=GOOGLE_ISSUERS
+            )
+        except jwt.PyJWTError as error:
+            raise GoogleAuthError(f"Invalid ID token: {error}")
+        return {claim: claims[claim] for claim in USER_CLAIMS if claim in claims}
+
+    def user_info(self, token_response):
+        """the signed in user, from the ID token when verification is on and google sent one"""
+        if self.verify_id_token and token_response.get('id_token'):
+            return self._id_token_user(token_response['id_token'])
+        return self._get_json(GOOGLE_USERINFO_URL, token_response['access_token'])
+
+    def birthday(self, access_token):
+        """birthday from the People API, e.g. {'year': 1999, 'month': 4, 'day': 19}, or None"""
+        people = self._get_json(GOOGLE_PEOPLE_URL, access_token, params={'personFields': 'birthdays'})
+        birthdays = people.get('birthdays', [])
+        return birthdays[0].get('date', {}) if birthdays else None
+
+    def user_info_with_birthday(self, token_response):
+        """user info and birthday, fetched at the same time"""
+        _, executor = self._start()
+        birthday = executor.submit(self.birthday, token_response['access_token'])
+        user_info = self.user_info(token_response)
+        user_info['birthday'] = birthday.result()
+        return user_info
+
+
+google_oauth = GoogleOAuthClient()
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import threading
+import time
+
+# other worker processes don't see an invalidation, so no snapshot outlives this
+MENU_CACHE_MAX_AGE = 30
+
+log = logging.getLogger(__name__)
+
+
+class MenuSnapshot:
+    def __init__(self, version, body):
+        self.version = version
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.built_at = time.monotonic()
+
+
+class MenuCache:
+    """
+    serialized menu payloads kept in memory until the menu changes
+
+    routes that edit products, ingredients or reviews call invalidate() after they commit, which bumps
+    the version and drops every cached view. a snapshot built while an edit was committing is not kept.
+
+    views fetched with keep_warm are also remembered with their build function, and rebuild() builds
+    them again in a background thread so the first request after an edit doesn't pay for it.
+    """
+
+    def __init__(self, max_age=MENU_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self.version = 0
+        self._snapshots = {}
+        self._warm = {}
+        self._lock = threading.Lock()
+        self._build_locks = {}
+
+    def _current(self, key):
+        snapshot = self._snapshots.get(key)
+        if snapshot and snapshot.version == self.version and time.monotonic() - snapshot.built_at < self.max_age:
+            return snapshot
+        return None
+
+    def _build_lock(self, key):
+        with self._lock:
+            return self._build_locks.setdefault(key, threading.Lock())
+
+    def get(self, key, build, keep_warm=False):
+        """cached snapshot for key, calling build() for the serialized body on a miss"""
+        if keep_warm and key not in self._warm:
+            with self._lock:
+                self._warm[key] = build
+
+        snapshot = self._current(key)
+        if snapshot:
+            return snapshot
+
+        # one thread rebuilds each view while the others wait for its result
+        with self._build_lock(key):
+            snapshot = self._current(key)
+            if snapshot:
+                return snapshot
+
+            version = self.version
+            snapshot = MenuSnapshot(version, build())
+            with self._lock:
+                if version == self.version:
+                    self._snapshots[key] = snapshot
+            return snapshot
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._snapshots.clear()
+
+    def rebuild(self, app):
+        """build every keep_warm view again in a background thread, inside an app context"""
+        with self._lock:
+            warm = list(self._warm.items())
+        if not warm:
+            return None
+
+        def run():
+            with app.app_context():
+                for key, build in warm:
+                    try:
+                        self.get(key, build)
+                    except Exception:
+                        log.exception("Error rebuilding menu %s", key)
+
+        thread = threading.Thread(target=run, name='menu-rebuild', daemon=True)
+        thread.start()
+        return thread
+
+
+menu_cache = MenuCache()
@@ -0,0 +1,242 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import Response, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+
+# requests slower than this many seconds are logged with the statements they ran
+SLOW_REQUEST_SECONDS = float(os.getenv('SLOW_REQUEST_SECONDS', '0.5'))
+# statements kept per request for the slow request log
+SLOW_REQUEST_MAX_STATEMENTS = 50
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+slow_request_log = logging.getLogger('slow_requests')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+
+
+class Counter:
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = defaultdict(float)
+
+    def inc(self, label_values, amount=1):
+        self._values[label_values] += amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f'{self.name}{{{_labels(self.labels, label_values)}}} {value:g}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., sum, count]
+        self._values = {}
+
+    def observe(self, label_values, value):
+        series = self._values.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(self._values.items()):
+            labels = _labels(self.labels, label_values)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{labels}}} {series[-2]:g}')
+            lines.append(f'{self.name}_count{{{labels}}} {series[-1]}')
+        return lines
+
+
+class Metrics:
+    """
+    per endpoint request metrics, rendered in the Prometheus text format
+
+    every worker process keeps its own numbers, scrape each worker or sum them in Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('http_requests_total', 'Requests by endpoint, method and status.',
+                                ('endpoint', 'method', 'status'))
+        self.latency = Histogram('http_request_duration_seconds', 'Time to build the response.',
+                                 ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.response_size = Histogram('http_response_size_bytes', 'Response body size, streamed responses excluded.',
+                                       ('endpoint',), SIZE_BUCKETS)
+        self.statements = Histogram('db_statements_per_request', 'SQL statements issued per request.',
+                                    ('endpoint',), STATEMENT_BUCKETS)
+        self.statement_time = Counter('db_statement_seconds_total', 'Time spent executing SQL statements.',
+                                      ('endpoint',))
+        self.pool_wait = Histogram('db_pool_checkout_seconds', 'Time to check a connection out of the pool.',
+                                   ('endpoint',), LATENCY_BUCKETS)
+        self.slow_requests = Counter('http_slow_requests_total', f'Requests slower than {SLOW_REQUEST_SECONDS:g}s.',
+                                     ('endpoint',))
+        self.shed_requests = Counter('http_shed_requests_total', 'Requests refused with 503 by a saturated lane.',
+                                     ('lane',))
+        self.report_reads = Counter('http_report_reads_total', 'Report requests by the database they read.',
+                                    ('database',))
+        self.report_cache = Counter('report_cache_requests_total', 'Report query lookups by range and result.',
+                                    ('range', 'result'))
+
+    def observe_request(self, endpoint, method, status, duration, size, statements, statement_time):
+        with self._lock:
+            self.requests.inc((endpoint, method, str(status)))
+            self.latency.observe((endpoint, method), duration)
+            if size is not None:
+                self.response_size.observe((endpoint,), size)
+            self.statements.observe((endpoint,), statements)
+            self.statement_time.inc((endpoint,), statement_time)
+            if duration >= SLOW_REQUEST_SECONDS and slow_request_log.isEnabledFor(logging.WARNING):
+                self.slow_requests.inc((endpoint,))
+
+    def observe_pool_wait(self, endpoint, duration):
+        with self._lock:
+            self.pool_wait.observe((endpoint,), duration)
+
+    def observe_shed(self, lane):
+        with self._lock:
+            self.shed_requests.inc((lane,))
+
+    def observe_report_read(self, database):
+        with self._lock:
+            self.report_reads.inc((database,))
+
+    def observe_report_cache(self, part, result):
+        with self._lock:
+            self.report_cache.inc((part, result))
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.requests, self.latency, self.response_size, self.statements,
+                           self.statement_time, self.pool_wait, self.slow_requests, self.shed_requests,
+                           self.report_reads, self.report_cache):
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def _endpoint():
+    return request.endpoint or 'unmatched'
+
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_statements = []
+    g.metrics_statement_count = 0
+    g.metrics_statement_time = 0.0
+
+
+def _after_request(response):
+    start = g.pop('metrics_start', None)
+    if start is None:
+        return response
+
+    duration = time.perf_counter() - start
+    endpoint = _endpoint()
+    size = None if response.is_streamed else response.calculate_content_length()
+    metrics.observe_request(endpoint, request.method, response.status_code, duration, size,
+                            g.metrics_statement_count, g.metrics_statement_time)
+
+    if duration >= SLOW_REQUEST_SECONDS and slow_request_log.isEnabledFor(logging.WARNING):
+        statements = '\n'.join(f'  {elapsed * 1000:8.1f} ms  {statement}' for elapsed, statement in g.metrics_statements)
+        slow_request_log.warning(
+            "Slow request %s %s (%s) %s took %.1f ms, %s statements in %.1f ms\n%s",
+            request.method, request.full_path.rstrip('?'), endpoint, response.status_code, duration * 1000,
+            g.metrics_statement_count, g.metrics_statement_time * 1000, statements
+        )
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+
+    # report pool calls count into a copy of their request's g, see fork_statements
+    if has_app_context() and 'metrics_start' in g:
+        g.metrics_statement_count += 1
+        g.metrics_statement_time += elapsed
+        if len(g.metrics_statements) < SLOW_REQUEST_MAX_STATEMENTS:
+            g.metrics_statements.append((elapsed, ' '.join(statement.split())))
+
+
+def fork_statements(call_g):
+    """give call_g, the copy of a request's g a report pool call runs with, statement counters of its own"""
+    if 'metrics_start' in call_g:
+        call_g.metrics_statements = []
+        call_g.metrics_statement_count = 0
+        call_g.metrics_statement_time = 0.0
+
+
+def join_statements(call_g):
+    """add the statements of a finished report pool call to the request's counters, in the request thread"""
+    if 'metrics_start' in call_g and 'metrics_start' in g:
+        g.metrics_statement_count += call_g.metrics_statement_count
+        g.metrics_statement_time += call_g.metrics_statement_time
+        room = max(SLOW_REQUEST_MAX_STATEMENTS - len(g.metrics_statements), 0)
+        g.metrics_statements.extend(call_g.metrics_statements[:room])
+
+
+def _time_pool_checkouts(engine):
+    """wrap the engine's pool so every checkout, including waits for a free connection, is timed"""
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            endpoint = _endpoint() if has_request_context() else 'background'
+            metrics.observe_pool_wait(endpoint, time.perf_counter() - start)
+
+    pool.connect = timed_connect
+
+
+def init_metrics(app, db):
+    """record request metrics for every endpoint of app and serve them at /metrics"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        _time_pool_checkouts(engine)
+        # dispose() swaps in a new pool
+        event.listen(engine, 'engine_disposed', lambda _, engine=engine: _time_pool_checkouts(engine))
+
+    def get_metrics():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+    app.add_url_rule('/metrics', 'metrics', get_metrics, methods=['GET'])
@@ -0,0 +1,178 @@
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, select
+
+from database import db, OrderEvent
+from services.json_provider import dumps_bytes
+
+# events a subscriber can fall behind by before it is disconnected
+SUBSCRIBER_QUEUE_SIZE = 100
+# streams one worker process serves before telling new displays to poll instead. each open stream
+# holds one of the worker's threads for as long as the display is connected. the stream process,
+# gunicorn.streams.conf.py, raises it to hold every display, order taking workers keep one spare
+MAX_SUBSCRIBERS = int(os.getenv('ORDER_STREAMS_PER_WORKER', '1'))
+# seconds between reads of the order event table while a display is connected to the worker
+ORDER_EVENT_POLL_SECONDS = float(os.getenv('ORDER_EVENT_POLL_SECONDS', '1'))
+# seconds a skipped event id is looked for again, in case its transaction commits late
+EVENT_GAP_SECONDS = 10
+# events older than this are deleted, a display that was away longer starts from a fresh snapshot
+EVENT_RETENTION = timedelta(hours=1)
+PRUNE_INTERVAL_SECONDS = 300
+
+log = logging.getLogger(__name__)
+
+
+def format_event(event_type, payload):
+    """serialize a payload into a server-sent event frame"""
+    return f"event: {event_type}\ndata: {dumps_bytes(payload).decode()}\n\n"
+
+
+def record_events(event_type, order_ids):
+    """add an event per order to the caller's transaction, every worker streams it once committed"""
+    if order_ids:
+        db.session.execute(insert(OrderEvent), [
+            {'event_type': event_type, 'order_id': order_id, 'created_at': datetime.now()} for order_id in order_ids
+        ])
+
+
+class Subscription:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def get(self, timeout):
+        """next event frame, or None if nothing arrived within the timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class OrderEventBroker:
+    """
+    fan-out of kitchen order events to the displays connected to one worker process
+
+    routes record events in the order_event table with the change that caused them. while any display
+    is connected a poller thread reads the new events, loads the created orders once and hands the
+    same frame to every subscriber's bounded queue, so orders taken on any worker reach every display.
+    a subscriber whose queue is full is a slow client; it is closed rather than allowed to block the
+    poller, and the display reconnects and receives a fresh snapshot.
+
+    event ids are handed out when an order is written but become visible when it commits, so a
+    skipped id is looked for again for EVENT_GAP_SECONDS before it is given up on.
+    """
+
+    def __init__(self, app, load_orders, queue_size=SUBSCRIBER_QUEUE_SIZE, max_subscribers=MAX_SUBSCRIBERS,
+                 poll_seconds=ORDER_EVENT_POLL_SECONDS):
+        self.app = app
+        self.load_orders = load_orders
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.poll_seconds = poll_seconds
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._poller = None
+        self._last_id = 0
+        self._gaps = {}
+        self._pruned_at = 0
+
+    def subscribe(self):
+        """
+        a new subscription, or None when the worker already serves max_subscribers streams
+
+        called in a request before the snapshot is read, so every event committed after it is seen
+        """
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            if self._poller is None:
+                self._last_id = db.session.scalar(select(func.max(OrderEvent.id))) or 0
+                self._gaps = {}
+                self._poller = threading.Thread(target=self._run, name='order-events', daemon=True)
+                self._poller.start()
+            subscription = Subscription(self.queue_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+        subscription.closed = True
+
+    def publish(self, event_type, payload):
+        frame = format_event(event_type, payload)
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscription in subscribers:
+            try:
+                subscription.queue.put_nowait(frame)
+            except queue.Full:
+                self.unsubscribe(subscription)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                # the last display left, the next subscribe starts a new poller
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception:
+                log.exception("Error reading order events")
+            time.sleep(self.poll_seconds)
+
+    def poll(self):
+        """publish the events committed since the last poll, inside an app context"""
+        floor = min(self._gaps) - 1 if self._gaps else self._last_id
+        rows = db.session.execute(
+            select(OrderEvent.id, OrderEvent.event_type, OrderEvent.order_id)
+            .where(OrderEvent.id > floor).order_by(OrderEvent.id)
+        ).all()
+
+        now = time.monotonic()
+        events = []
+        for event_id, event_type, order_id in rows:
+            if event_id in self._gaps:
+                del self._gaps[event_id]
+            elif event_id > self._last_id:
+                for missing in range(self._last_id + 1, event_id):
+                    self._gaps[missing] = now
+                self._last_id = event_id
+            else:
+                continue
+            events.append((event_type, order_id))
+        self._gaps = {event_id: seen for event_id, seen in self._gaps.items() if now - seen < EVENT_GAP_SECONDS}
+
+        created = [order_id for event_type, order_id in events if event_type == 'order_created']
+        orders = {order['id']: order for order in self.load_orders(created)} if created else {}
+        for event_type, order_id in events:
+            if event_type != 'order_created':
+                self.publish(event_type, {"id": str(order_id)})
+            # orders completed before the poll are no longer open
+            elif order_id in orders:
+                self.publish(event_type, orders[order_id])
+
+        if now - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+            self._pruned_at = now
+            db.session.execute(delete(OrderEvent).where(OrderEvent.created_at < datetime.now() - EVENT_RETENTION))
+        db.session.commit()
+
+
+_brokers_lock = threading.Lock()
+
+
+def get_broker(app, load_orders):
+    """the app's broker, created on first use. load_orders(order ids) returns the serialized open orders"""
+    with _brokers_lock:
+        broker = app.extensions.get('order_events')
+        if broker is None:
+            broker = app.extensions['order_events'] = OrderEventBroker(app, load_orders)
+    return broker
@@ -0,0 +1,190 @@
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from flask import g, has_app_context, jsonify, request, send_file
+from sqlalchemy import event
+
+# fraction of requests profiled at random, 0 turns sampling off
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+# requests sent with this value in the X-Profile-Token header are profiled, and it is needed to
+# download profiles. unset turns both off
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN')
+PROFILE_HEADER = 'X-Profile-Token'
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'team02-profiles'))
+# oldest profiles are deleted past this many
+PROFILE_MAX_STORED = 100
+# functions listed in a profile summary
+PROFILE_TOP_FUNCTIONS = 40
+
+PROFILE_ID = re.compile(r'^[0-9a-f]{32}$')
+
+log = logging.getLogger(__name__)
+
+
+def _authorized():
+    token = request.headers.get(PROFILE_HEADER)
+    return bool(PROFILE_TOKEN and token and hmac.compare_digest(token, PROFILE_TOKEN))
+
+
+def _should_profile():
+    if request.path.startswith('/profiles'):
+        return False
+    return _authorized() or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+
+
+def _before_request():
+    if not _should_profile():
+        return
+    g.profile_statements = []
+    g.profile_start = time.perf_counter()
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+
+
+def _after_request(response):
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    profiler.disable()
+
+    profile_id = uuid.uuid4().hex
+    try:
+        _save(profile_id, profiler, response)
+        response.headers['X-Profile-Id'] = profile_id
+    except OSError as error:
+        log.warning("Error saving profile: %s", error)
+    return response
+
+
+def _summary(profiler):
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return output.getvalue()
+
+
+def _save(profile_id, profiler, response):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    profiler.dump_stats(os.path.join(PROFILE_DIR, f'{profile_id}.prof'))
+
+    statements = g.pop('profile_statements', [])
+    profile = {
+        'id': profile_id,
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'recorded_at': datetime.utcnow().isoformat(),
+        'duration_ms': round((time.perf_counter() - g.pop('profile_start')) * 1000, 2),
+        'sql_count': len(statements),
+        'sql_ms': round(sum(elapsed for elapsed, _ in statements), 2),
+        'sql': [{'ms': round(elapsed, 3), 'statement': statement} for elapsed, statement in statements],
+        'functions': _summary(profiler)
+    }
+    with open(os.path.join(PROFILE_DIR, f'{profile_id}.json'), 'w') as file:
+        json.dump(profile, file)
+
+    _prune()
+
+
+def _prune():
+    profiles = sorted(
+        (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith('.json')),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in profiles[:-PROFILE_MAX_STORED]:
+        for extension in ('.json', '.prof'):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, entry.name[:-5] + extension))
+            except FileNotFoundError:
+                pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'profiler' in g:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_app_context() and 'profiler' in g and conn.info.get('profile_query_start'):
+        elapsed = time.perf_counter() - conn.info['profile_query_start'].pop()
+        g.profile_statements.append((elapsed * 1000, ' '.join(statement.split())))
+
+
+def fork_statements(call_g):
+    """give call_g, the copy of a request's g a report pool call runs with, a statement list of its own"""
+    if 'profiler' in call_g:
+        call_g.profile_statements = []
+
+
+def join_statements(call_g):
+    """add the statements of a finished report pool call to the request's profile, in the request thread"""
+    if 'profiler' in call_g and 'profiler' in g:
+        g.profile_statements.extend(call_g.profile_statements)
+
+
+def list_profiles():
+    if not _authorized():
+        return jsonify({'error': 'Not found'}), 404
+
+    profiles = []
+    if os.path.isdir(PROFILE_DIR):
+        for entry in sorted(os.scandir(PROFILE_DIR), key=lambda entry: entry.stat().st_mtime, reverse=True):
+            if entry.name.endswith('.json'):
+                with open(entry.path) as file:
+                    profile = json.load(file)
+                profiles.append({key: profile[key] for key in
+                                 ('id', 'method', 'path', 'status', 'recorded_at', 'duration_ms', 'sql_count')})
+    return jsonify({'data': profiles})
+
+
+def get_profile(profile_id):
+    path = os.path.join(PROFILE_DIR, f'{profile_id}.json')
+    if not _authorized() or not PROFILE_ID.match(profile_id) or not os.path.exists(path):
+        return jsonify({'error': 'Not found'}), 404
+
+    with open(path) as file:
+        return jsonify({'data': json.load(file)})
+
+
+def download_profile(profile_id):
+    path = os.path.join(PROFILE_DIR, f'{profile_id}.prof')
+    if not _authorized() or not PROFILE_ID.match(profile_id) or not os.path.exists(path):
+        return jsonify({'error': 'Not found'}), 404
+
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=f'{profile_id}.prof')
+
+
+def init_profiling(app, db):
+    """
+    profile sampled requests, and requests carrying the profile token, when either is configured
+
+    each profile is stored as a cProfile dump plus a JSON summary with the SQL the request ran, and
+    its id is returned in the X-Profile-Id response header. with neither setting nothing is registered
+    """
+    if PROFILE_SAMPLE_RATE <= 0 and not PROFILE_TOKEN:
+        return
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    app.add_url_rule('/profiles', 'list_profiles', list_profiles, methods=['GET'])
+    app.add_url_rule('/profiles/<profile_id>', 'get_profile', get_profile, methods=['GET'])
+    app.add_url_rule('/profiles/<profile_id>/download', 'download_profile', download_profile, methods=['GET'])
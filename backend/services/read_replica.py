@@ -0,0 +1,123 @@
+import logging
+import os
+import threading
+import time
+
+from flask import g, request
+from sqlalchemy import text
+
+from services.admission import REPORT_BLUEPRINTS
+from services.metrics import metrics
+
+# read-only copy of the store database the reports read from, reports use the primary when unset
+REPORT_DATABASE_URL = os.getenv('REPORT_DATABASE_URL')
+# replicas further behind than this many seconds are skipped and reports read the primary
+REPORT_MAX_LAG_SECONDS = float(os.getenv('REPORT_MAX_LAG_SECONDS', '30'))
+# seconds a lag measurement is reused before the replica is asked again
+REPORT_LAG_CHECK_SECONDS = float(os.getenv('REPORT_LAG_CHECK_SECONDS', '5'))
+
+REPORT_BIND = 'reports'
+# responses read from a replica at least this far behind are marked stale
+STALE_AFTER_SECONDS = 1
+
+LAG_HEADER = 'X-Data-Lag-Seconds'
+STALE_HEADER = 'X-Data-Stale'
+
+# seconds since the last replayed transaction, 0 when the replica has replayed everything it received
+POSTGRES_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+log = logging.getLogger(__name__)
+
+
+class LagMonitor:
+    """
+    measures how far the replica is behind, at most once every check_interval seconds per process
+
+    lag is None while the replica can't be reached. databases other than PostgreSQL can't report
+    their lag and count as up to date.
+    """
+
+    def __init__(self, engine, check_interval):
+        self.engine = engine
+        self.check_interval = check_interval
+        self.lag = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self.lag
+
+        # one request measures while the rest use the last value
+        if not self._lock.acquire(blocking=False):
+            return self.lag
+        try:
+            self.lag = self._measure()
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return self.lag
+
+    def _measure(self):
+        try:
+            with self.engine.connect() as connection:
+                if self.engine.dialect.name != 'postgresql':
+                    connection.execute(text('SELECT 1'))
+                    return 0.0
+                return float(connection.execute(POSTGRES_LAG_SQL).scalar() or 0)
+        except Exception:
+            log.warning("Report replica is unreachable, reports read the primary", exc_info=True)
+            return None
+
+
+_monitor = None
+
+
+def _before_request():
+    if request.blueprint not in REPORT_BLUEPRINTS or request.method not in ('GET', 'HEAD'):
+        return
+
+    lag = _monitor.current()
+    if lag is None or lag > REPORT_MAX_LAG_SECONDS:
+        metrics.observe_report_read('primary')
+        return
+
+    metrics.observe_report_read('replica')
+    g.read_bind = REPORT_BIND
+    g.read_lag = lag
+
+
+def _after_request(response):
+    lag = g.get('read_lag')
+    if lag is not None:
+        response.headers[LAG_HEADER] = f'{lag:.1f}'
+        response.headers[STALE_HEADER] = 'true' if lag >= STALE_AFTER_SECONDS else 'false'
+    return response
+
+
+def replica_binds():
+    """the SQLALCHEMY_BINDS entry for the report replica, empty when none is configured"""
+    return {REPORT_BIND: REPORT_DATABASE_URL} if REPORT_DATABASE_URL else {}
+
+
+def init_read_replica(app, db):
+    """
+    send the SELECTs of GET report, sales report and chart requests to the report replica
+
+    the replica has its own connection pool. while it is unreachable or more than
+    REPORT_MAX_LAG_SECONDS behind, reports read the primary. responses read from the replica carry
+    its lag in X-Data-Lag-Seconds and X-Data-Stale. with no replica configured nothing is registered
+    """
+    global _monitor
+    with app.app_context():
+        engine = db.engines.get(REPORT_BIND)
+    if engine is None:
+        return
+
+    _monitor = LagMonitor(engine, REPORT_LAG_CHECK_SECONDS)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from services.metrics import metrics
+from services.read_replica import REPORT_MAX_LAG_SECONDS
+
+# seconds the rows for today are reused, orders recorded by this worker drop them sooner
+REPORT_CACHE_TTL = float(os.getenv('REPORT_CACHE_TTL', '10'))
+# seconds rows for closed days are reused, 0 keeps them until they are evicted. orders replayed into
+# past days are seen by every worker through the day's revision, this bounds how long other workers
+# show changes that have none, like a renamed employee
+REPORT_CACHE_CLOSED_SECONDS = float(os.getenv('REPORT_CACHE_CLOSED_SECONDS', '3600'))
+# cached ranges per worker process, the least recently used are dropped first
+REPORT_CACHE_SIZE = int(os.getenv('REPORT_CACHE_SIZE', '2000'))
+
+
+class CacheEntry:
+    def __init__(self, rows, start, end, closed, expires, stamp):
+        self.rows = rows
+        self.start = start
+        self.end = end
+        self.closed = closed
+        self.expires = expires
+        self.stamp = stamp
+
+
+class ReportCache:
+    """
+    rows of the report queries, by query name and date range
+
+    closed ranges, days that are over, are kept for closed_max_age seconds and the open range, today,
+    for ttl seconds. routes that record orders call orders_recorded() after they commit, which drops
+    today's rows and any closed rows for the days the orders were placed on. rows built while orders
+    for their range were being recorded are not kept.
+
+    closed rows are stored with a stamp, read from the database with them, and are only reused while
+    the caller passes the same stamp, so changes made through other workers are seen too. closed rows
+    read from the report replica within replica_lag seconds of an invalidation may predate it and
+    are not kept.
+    """
+
+    def __init__(self, ttl=REPORT_CACHE_TTL, closed_max_age=REPORT_CACHE_CLOSED_SECONDS, max_size=REPORT_CACHE_SIZE,
+                 replica_lag=REPORT_MAX_LAG_SECONDS):
+        self.ttl = ttl
+        self.closed_max_age = closed_max_age
+        self.max_size = max_size
+        self.replica_lag = replica_lag
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped when today's or past days' rows are invalidated
+        self._open_version = 0
+        self._closed_version = 0
+        self._closed_invalidated_at = None
+
+    def _lookup(self, key, stamp):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.stamp != stamp or (entry.expires is not None and entry.expires <= time.monotonic()):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _replica_may_lag(self, closed, from_replica):
+        invalidated_at = self._closed_invalidated_at
+        return (closed and from_replica and invalidated_at is not None
+                and time.monotonic() - invalidated_at < self.replica_lag)
+
+    def get(self, name, start, end, closed, build, stamp=None, from_replica=False):
+        """
+        cached rows of name for [start, end), calling build() for them on a miss
+
+        an open range that runs to the present is passed with end None, so every request for it
+        shares one entry. stamp is the range's revision, read before build() runs, and from_replica
+        tells whether build() reads the report replica
+        """
+        key = (name, start, end)
+        part = 'closed' if closed else 'open'
+        entry = self._lookup(key, stamp)
+        if entry is not None:
+            metrics.observe_report_cache(part, 'hit')
+            return entry.rows
+
+        metrics.observe_report_cache(part, 'miss')
+        version = self._closed_version if closed else self._open_version
+        rows = build()
+        if self._replica_may_lag(closed, from_replica):
+            return rows
+        with self._lock:
+            if version == (self._closed_version if closed else self._open_version):
+                max_age = self.closed_max_age if closed else self.ttl
+                expires = None if closed and not max_age else time.monotonic() + max_age
+                self._entries[key] = CacheEntry(rows, start, end, closed, expires, stamp)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return rows
+
+    def orders_recorded(self, order_dates):
+        """drop the rows the orders placed at order_dates change: today's, and those of any earlier day"""
+        if not order_dates:
+            return
+        # order_date columns drop the offset of replayed times, compare them the same way
+        earliest = min(order_date.replace(tzinfo=None) for order_date in order_dates)
+        past = earliest < datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        with self._lock:
+            self._open_version += 1
+            if past:
+                self._closed_version += 1
+                self._closed_invalidated_at = time.monotonic()
+            for key in [key for key, entry in self._entries.items()
+                        if not entry.closed or (past and entry.end > earliest)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._open_version += 1
+            self._closed_version += 1
+            self._closed_invalidated_at = time.monotonic()
+            self._entries.clear()
+
+
+report_cache = ReportCache()
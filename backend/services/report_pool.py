@@ -0,0 +1,91 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from flask import current_app, g
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from database import db
+from services import metrics, profiler
+
+# threads per worker process running report sub-queries, each holds a pooled connection while it
+# runs. 1 runs them one after another in the request thread
+REPORT_QUERY_THREADS = int(os.getenv('REPORT_QUERY_THREADS', '3'))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pool():
+    # created on first use, so a gunicorn master never starts threads that its workers would lose
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(REPORT_QUERY_THREADS, thread_name_prefix='report-query')
+    return _executor
+
+
+@contextmanager
+def _exported_snapshot(engine):
+    """keep a transaction open on engine and yield its snapshot id for others to import, None off PostgreSQL"""
+    if engine.dialect.name != 'postgresql':
+        yield None
+        return
+
+    with engine.connect() as connection:
+        connection = connection.execution_options(isolation_level='REPEATABLE READ')
+        with connection.begin():
+            yield connection.execute(text('SELECT pg_export_snapshot()')).scalar()
+
+
+def _call_globals(app, request_g):
+    """
+    a copy of the request's g for one call, so its queries follow the read bind and log the request id
+
+    statement counters are the call's own rather than shared with the other threads, and are added to
+    the request's once every call is done
+    """
+    call_g = app.app_ctx_globals_class()
+    call_g.__dict__.update(request_g.__dict__)
+    metrics.fork_statements(call_g)
+    profiler.fork_statements(call_g)
+    return call_g
+
+
+def _run(app, call_g, engine, snapshot, function, args):
+    context = app.app_context()
+    context.g = call_g
+    with context:
+        if snapshot is not None:
+            connection = db.session.connection(bind_arguments={'bind': engine},
+                                               execution_options={'isolation_level': 'REPEATABLE READ'})
+            connection.execute(text('SET TRANSACTION SNAPSHOT :snapshot'), {'snapshot': snapshot})
+        return function(*args)
+
+
+def run_concurrently(*calls):
+    """
+    run calls, (function, *args) tuples, at the same time and return their results in order
+
+    each call gets its own session and pooled connection on a report pool thread. on PostgreSQL they
+    all import one exported snapshot, so their results agree as if they had run in one transaction.
+    in-memory SQLite shares a single connection and runs the calls one after another
+    """
+    engine = db.engines[g.get('read_bind')]
+    if REPORT_QUERY_THREADS <= 1 or len(calls) < 2 or isinstance(engine.pool, StaticPool):
+        return [function(*args) for function, *args in calls]
+
+    app = current_app._get_current_object()
+    call_globals = [_call_globals(app, g._get_current_object()) for _ in calls]
+    with _exported_snapshot(engine) as snapshot:
+        futures = [_pool().submit(_run, app, call_g, engine, snapshot, function, args)
+                   for call_g, (function, *args) in zip(call_globals, calls)]
+        # every call has finished before its counters are read, also when one of them failed
+        wait(futures)
+
+    for call_g in call_globals:
+        metrics.join_statements(call_g)
+        profiler.join_statements(call_g)
+    return [future.result() for future in futures]
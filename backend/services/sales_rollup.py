@@ -0,0 +1,457 @@
+from datetime import datetime, time, timedelta
+
+import click
+from flask import g
+from flask.cli import with_appcontext
+from sqlalchemy import DateTime, and_, delete, func, insert, literal, select, union
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from database import (db, Employee, Ingredient, OrderTable, Product, ProductIngredient, ProductOrder,
+                      ProductSalesRollup, ReportRevision, SalesRollup)
+from services.report_cache import report_cache
+
+# a day is closed, and its report rows kept until evicted, this long after it ends. orders committing
+# around midnight and a lagging report replica have caught up by then
+DAY_SETTLE_TIME = timedelta(minutes=5)
+
+
+class _time_bucket(FunctionElement):
+    type = DateTime()
+    inherit_cache = True
+    unit = None
+    sqlite_format = None
+
+
+class hour_bucket(_time_bucket):
+    """truncate a timestamp to the start of its hour"""
+    name = 'hour_bucket'
+    inherit_cache = True
+    unit = 'hour'
+    sqlite_format = '%Y-%m-%d %H:00:00.000000'
+
+
+class day_bucket(_time_bucket):
+    """truncate a timestamp to midnight"""
+    name = 'day_bucket'
+    inherit_cache = True
+    unit = 'day'
+    sqlite_format = '%Y-%m-%d 00:00:00.000000'
+
+
+class month_bucket(_time_bucket):
+    """truncate a timestamp to the first of its month"""
+    name = 'month_bucket'
+    inherit_cache = True
+    unit = 'month'
+    sqlite_format = '%Y-%m-01 00:00:00.000000'
+
+
+TIME_BUCKETS = {bucket.unit: bucket for bucket in (hour_bucket, day_bucket, month_bucket)}
+
+
+def _compile_time_bucket(element, compiler, **kw):
+    return "date_trunc('%s', %s)" % (element.unit, compiler.process(element.clauses, **kw))
+
+
+def _compile_time_bucket_sqlite(element, compiler, **kw):
+    # match the string format SQLAlchemy stores sqlite datetimes in so comparisons line up
+    return "strftime('" + element.sqlite_format + "', " + compiler.process(element.clauses, **kw) + ")"
+
+
+for _bucket in TIME_BUCKETS.values():
+    compiles(_bucket)(_compile_time_bucket)
+    compiles(_bucket, 'sqlite')(_compile_time_bucket_sqlite)
+
+
+def hour_floor(value):
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def hour_ceil(value):
+    floor = hour_floor(value)
+    return floor if floor == value else floor + timedelta(hours=1)
+
+
+def bucket_floor(value, unit):
+    """python equivalent of the SQL time buckets"""
+    if unit == 'hour':
+        return hour_floor(value)
+    value = datetime.combine(value.date(), time.min)
+    return value.replace(day=1) if unit == 'month' else value
+
+
+def next_bucket(value, unit):
+    if unit == 'hour':
+        return value + timedelta(hours=1)
+    if unit == 'day':
+        return value + timedelta(days=1)
+    if unit == 'week':
+        return value + timedelta(days=7)
+    return (value + timedelta(days=32)).replace(day=1)
+
+
+def _upsert(model):
+    dialect = db.session.get_bind().dialect.name
+    return (pg_insert if dialect == 'postgresql' else sqlite_insert)(model)
+
+
+def _employee_rollup_select(condition):
+    bucket = hour_bucket(OrderTable.order_date)
+    return select(
+        bucket,
+        OrderTable.employeeid,
+        func.count(OrderTable.id),
+        func.sum(OrderTable.total)
+    ).where(condition).group_by(bucket, OrderTable.employeeid)
+
+
+def _product_rollup_select(condition):
+    bucket = hour_bucket(OrderTable.order_date)
+    return select(
+        bucket,
+        ProductOrder.productid,
+        func.sum(ProductOrder.quantity),
+        func.sum(ProductOrder.quantity * Product.price)
+    ).join(
+        OrderTable, OrderTable.id == ProductOrder.orderid
+    ).join(
+        Product, Product.id == ProductOrder.productid
+    ).where(condition).group_by(bucket, ProductOrder.productid)
+
+
+def _bump_revisions(days):
+    """bump the revision of every day in days, a select of day starts, in the caller's transaction"""
+    stmt = _upsert(ReportRevision).from_select(['day', 'revision'], days)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['day'],
+        set_={'revision': ReportRevision.revision + 1}
+    ))
+
+
+def record_orders(order_ids):
+    """
+    add newly inserted orders to the hourly rollups, in the caller's transaction
+
+    product sales are recorded at the price the product had when the order was placed. orders placed
+    before today, replayed from a register's queue, bump the revision of their days
+    """
+    if not order_ids:
+        return
+
+    condition = OrderTable.id.in_(order_ids)
+
+    past = and_(condition, OrderTable.order_date < bucket_floor(datetime.now(), 'day'))
+    day = day_bucket(OrderTable.order_date)
+    _bump_revisions(select(day, literal(1)).where(past).group_by(day))
+
+    stmt = _upsert(SalesRollup).from_select(
+        ['bucket', 'employeeid', 'order_count', 'sales'], _employee_rollup_select(condition)
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['bucket', 'employeeid'],
+        set_={
+            'order_count': SalesRollup.order_count + stmt.excluded.order_count,
+            'sales': SalesRollup.sales + stmt.excluded.sales
+        }
+    ))
+
+    stmt = _upsert(ProductSalesRollup).from_select(
+        ['bucket', 'productid', 'quantity', 'sales'], _product_rollup_select(condition)
+    )
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['bucket', 'productid'],
+        set_={
+            'quantity': ProductSalesRollup.quantity + stmt.excluded.quantity,
+            'sales': ProductSalesRollup.sales + stmt.excluded.sales
+        }
+    ))
+
+
+def rebuild_rollups(start=None, end=None):
+    """recompute the rollups for [start, end) from order history, everything if no range is given"""
+    start = hour_floor(start) if start else None
+    end = hour_ceil(end) if end else None
+
+    def in_range(column):
+        conditions = []
+        if start:
+            conditions.append(column >= start)
+        if end:
+            conditions.append(column < end)
+        return and_(True, *conditions)
+
+    # the days that had rollups or have orders in the range, before today
+    today = bucket_floor(datetime.now(), 'day')
+    days = union(
+        select(day_bucket(SalesRollup.bucket).label('day')).where(in_range(SalesRollup.bucket), SalesRollup.bucket < today),
+        select(day_bucket(OrderTable.order_date).label('day'))
+        .where(in_range(OrderTable.order_date), OrderTable.order_date < today)
+    ).subquery()
+    _bump_revisions(select(days.c.day, literal(1)).where(days.c.day.is_not(None)))
+
+    db.session.execute(delete(SalesRollup).where(in_range(SalesRollup.bucket)))
+    db.session.execute(delete(ProductSalesRollup).where(in_range(ProductSalesRollup.bucket)))
+
+    order_condition = in_range(OrderTable.order_date)
+    db.session.execute(insert(SalesRollup).from_select(
+        ['bucket', 'employeeid', 'order_count', 'sales'], _employee_rollup_select(order_condition)
+    ))
+    db.session.execute(insert(ProductSalesRollup).from_select(
+        ['bucket', 'productid', 'quantity', 'sales'], _product_rollup_select(order_condition)
+    ))
+    db.session.commit()
+    report_cache.clear()
+
+
+@click.command('backfill-rollups')
+@click.option('--start', type=click.DateTime(), default=None, help='first hour to rebuild, defaults to all history')
+@click.option('--end', type=click.DateTime(), default=None, help='rebuild up to this time, defaults to all history')
+@with_appcontext
+def backfill_rollups_command(start, end):
+    """Rebuild the hourly sales rollups from order history."""
+    rebuild_rollups(start, end)
+    click.echo(f"Rebuilt sales rollups for {start or 'the beginning'} to {end or 'now'}")
+
+
+def runs_to_present(end):
+    """
+    whether a range ending at end runs to the present
+
+    routes take end from the clock a moment before the range is read, so any end in the current hour
+    counts
+    """
+    return end >= hour_floor(datetime.now())
+
+
+def split_range(start, end):
+    """
+    split [start, end) into the whole hours served by the rollups and the partial hours at the edges
+
+    a range that runs to the present is rounded up to the end of the current hour, since there are
+    no orders after now
+    """
+    if runs_to_present(end):
+        end = hour_ceil(max(end, datetime.now()))
+
+    aligned_start, aligned_end = hour_ceil(start), hour_floor(end)
+    if aligned_start >= aligned_end:
+        return None, [(start, end)]
+
+    edges = [(edge_start, edge_end) for edge_start, edge_end in ((start, aligned_start), (aligned_end, end))
+             if edge_start < edge_end]
+    return (aligned_start, aligned_end), edges
+
+
+def _merge(results, rows, key_count):
+    """sum rows from several sources that share the same leading key columns"""
+    for row in rows:
+        key, values = tuple(row[:key_count]), row[key_count:]
+        current = results.get(key)
+        results[key] = values if current is None else tuple((a or 0) + (b or 0) for a, b in zip(current, values))
+    return results
+
+
+def split_closed(start, end):
+    """
+    split [start, end) into (start, end, closed) pieces, the days that are over and the open present
+
+    closed days are split further at month boundaries, so a whole month is one cache entry shared
+    by every report that covers it
+    """
+    closed_before = bucket_floor(datetime.now() - DAY_SETTLE_TIME, 'day')
+    pieces = []
+    piece_start = start
+    while piece_start < min(end, closed_before):
+        piece_end = min(end, closed_before, next_bucket(bucket_floor(piece_start, 'month'), 'month'))
+        pieces.append((piece_start, piece_end, True))
+        piece_start = piece_end
+    if piece_start < end:
+        pieces.append((piece_start, end, False))
+    return pieces
+
+
+def _query(start, end, rollup_query, raw_query, key_count):
+    aligned, edges = split_range(start, end)
+    results = {}
+
+    if aligned:
+        _merge(results, rollup_query(*aligned).all(), key_count)
+    for edge_start, edge_end in edges:
+        _merge(results, raw_query(edge_start, edge_end).all(), key_count)
+
+    return [key + values for key, values in results.items()]
+
+
+def _revisions(start, end):
+    """(day, revision) of the days in [start, end) whose rollups changed after the day was over"""
+    return db.session.execute(
+        select(ReportRevision.day, ReportRevision.revision)
+        .where(ReportRevision.day >= bucket_floor(start, 'day'), ReportRevision.day < end)
+    ).all()
+
+
+def _collect(name, start, end, rollup_query, raw_query, key_count):
+    """rows of the report query name for [start, end), each closed month and the open present cached apart"""
+    results = {}
+    pieces = split_closed(start, end)
+    from_replica = g.get('read_bind') is not None
+
+    # read before the rows, so a cached closed piece is never newer than its stamp. revisions only
+    # grow, so their sum over a piece changes with any of them
+    closed_end = max((piece_end for _, piece_end, closed in pieces if closed), default=None)
+    revisions = _revisions(start, closed_end) if closed_end else []
+
+    for piece_start, piece_end, closed in pieces:
+        # everything up to now is one entry, however far past now the range was rounded
+        key_end = None if not closed and runs_to_present(piece_end) else piece_end
+        stamp = None
+        if closed:
+            first_day = bucket_floor(piece_start, 'day')
+            stamp = sum(revision for day, revision in revisions if first_day <= day < piece_end)
+        rows = report_cache.get(name, piece_start, key_end, closed,
+                                lambda: _query(piece_start, piece_end, rollup_query, raw_query, key_count),
+                                stamp, from_replica)
+        _merge(results, rows, key_count)
+
+    return [key + values for key, values in results.items()]
+
+
+def sales_breakdown(start, end, unit):
+    """
+    (bucket start, orders, sales) for every hour, day, week or month in [start, end), zero-filled
+
+    the whole breakdown comes from one grouped range query over the rollups. weeks are seven day
+    windows counted from start, so a month splits into weeks starting on the 1st.
+    """
+    bucket = TIME_BUCKETS['day' if unit == 'week' else unit]
+
+    def rollup(range_start, range_end):
+        key = bucket(SalesRollup.bucket)
+        return db.session.query(
+            key,
+            func.sum(SalesRollup.order_count),
+            func.sum(SalesRollup.sales)
+        ).filter(SalesRollup.bucket >= range_start, SalesRollup.bucket < range_end).group_by(key)
+
+    def raw(range_start, range_end):
+        key = bucket(OrderTable.order_date)
+        return db.session.query(
+            key,
+            func.count(OrderTable.id),
+            func.sum(OrderTable.total)
+        ).filter(OrderTable.order_date >= range_start, OrderTable.order_date < range_end).group_by(key)
+
+    first = start if unit == 'week' else bucket_floor(start, unit)
+    totals = {}
+    for key, orders, sales in _collect(f'sales_breakdown_{bucket.unit}', start, end, rollup, raw, 1):
+        if unit == 'week':
+            key = first + timedelta(days=(key - first).days // 7 * 7)
+        current_orders, current_sales = totals.get(key, (0, 0))
+        totals[key] = (current_orders + (orders or 0), current_sales + (sales or 0))
+
+    breakdown = []
+    key = first
+    while key < end:
+        orders, sales = totals.get(key, (0, 0))
+        breakdown.append((key, orders, sales))
+        key = next_bucket(key, unit)
+
+    return breakdown
+
+
+def employee_sales(start, end):
+    """(id, name, orders, sales) per employee for [start, end)"""
+    def rollup(range_start, range_end):
+        return db.session.query(
+            Employee.id,
+            Employee.name,
+            func.sum(SalesRollup.order_count),
+            func.sum(SalesRollup.sales)
+        ).join(
+            SalesRollup, SalesRollup.employeeid == Employee.id
+        ).filter(
+            SalesRollup.bucket >= range_start, SalesRollup.bucket < range_end
+        ).group_by(Employee.id, Employee.name)
+
+    def raw(range_start, range_end):
+        return db.session.query(
+            Employee.id,
+            Employee.name,
+            func.count(OrderTable.id),
+            func.sum(OrderTable.total)
+        ).join(
+            OrderTable, OrderTable.employeeid == Employee.id
+        ).filter(
+            OrderTable.order_date >= range_start, OrderTable.order_date < range_end
+        ).group_by(Employee.id, Employee.name)
+
+    return _collect('employee_sales', start, end, rollup, raw, 2)
+
+
+def product_sales(start, end):
+    """(id, name, quantity, sales) per product for [start, end)"""
+    def rollup(range_start, range_end):
+        return db.session.query(
+            Product.id,
+            Product.name,
+            func.sum(ProductSalesRollup.quantity),
+            func.sum(ProductSalesRollup.sales)
+        ).join(
+            ProductSalesRollup, ProductSalesRollup.productid == Product.id
+        ).filter(
+            ProductSalesRollup.bucket >= range_start, ProductSalesRollup.bucket < range_end
+        ).group_by(Product.id, Product.name)
+
+    def raw(range_start, range_end):
+        return db.session.query(
+            Product.id,
+            Product.name,
+            func.sum(ProductOrder.quantity),
+            func.sum(ProductOrder.quantity * Product.price)
+        ).join(
+            ProductOrder, ProductOrder.productid == Product.id
+        ).join(
+            OrderTable, OrderTable.id == ProductOrder.orderid
+        ).filter(
+            OrderTable.order_date >= range_start, OrderTable.order_date < range_end
+        ).group_by(Product.id, Product.name)
+
+    return _collect('product_sales', start, end, rollup, raw, 2)
+
+
+def ingredient_usage(start, end):
+    """(id, name, drinks, amount) per ingredient for [start, end), using the current recipes"""
+    def rollup(range_start, range_end):
+        return db.session.query(
+            Ingredient.id,
+            Ingredient.name,
+            func.sum(ProductSalesRollup.quantity),
+            func.sum(ProductSalesRollup.quantity * ProductIngredient.quantity)
+        ).join(
+            ProductIngredient, ProductIngredient.ingredientid == Ingredient.id
+        ).join(
+            ProductSalesRollup, ProductSalesRollup.productid == ProductIngredient.productid
+        ).filter(
+            ProductSalesRollup.bucket >= range_start, ProductSalesRollup.bucket < range_end
+        ).group_by(Ingredient.id, Ingredient.name)
+
+    def raw(range_start, range_end):
+        return db.session.query(
+            Ingredient.id,
+            Ingredient.name,
+            func.sum(ProductOrder.quantity),
+            func.sum(ProductOrder.quantity * ProductIngredient.quantity)
+        ).join(
+            ProductIngredient, ProductIngredient.ingredientid == Ingredient.id
+        ).join(
+            ProductOrder, ProductOrder.productid == ProductIngredient.productid
+        ).join(
+            OrderTable, OrderTable.id == ProductOrder.orderid
+        ).filter(
+            OrderTable.order_date >= range_start, OrderTable.order_date < range_end
+        ).group_by(Ingredient.id, Ingredient.name)
+
+    return _collect('ingredient_usage', start, end, rollup, raw, 2)
@@ -0,0 +1,147 @@
+import os
+import time
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from database import db, OrderTable, SalesRollup
+from services.bulk_load import copy_csv, export_csv
+from services.sales_rollup import rebuild_rollups
+
+# menu, ingredients and staff for a new store, one <table>.csv per table
+SEED_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                             'seed', 'data')
+
+
+def _csv_files(directory):
+    """table -> csv path for every <table>.csv in directory, in foreign key order"""
+    tables = []
+    for table in db.metadata.sorted_tables:
+        path = os.path.join(directory, f'{table.name}.csv')
+        if os.path.exists(path):
+            tables.append((table, path))
+    return tables
+
+
+def truncate_tables():
+    """empty every table of the models"""
+    tables = db.metadata.sorted_tables
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text(f"TRUNCATE {', '.join(table.name for table in tables)}"))
+    else:
+        for table in reversed(tables):
+            db.session.execute(table.delete())
+
+
+def load_directory(directory, truncate=False, log=print):
+    """
+    bulk load every <table>.csv in directory, returning [(table name, rows, seconds)]
+
+    the schema is created from the models first. indexes of the loaded tables are dropped during the
+    load and built once at the end, which is much faster than updating them row by row. the sales
+    rollups are rebuilt when orders are loaded without them
+    """
+    files = _csv_files(directory)
+    if not files:
+        raise click.ClickException(f"no <table>.csv files found in {directory}")
+
+    # only the primary, the report replica copies its schema
+    db.create_all(bind_key=None)
+    if truncate:
+        truncate_tables()
+
+    connection = db.session.connection()
+    indexes = [index for table, _ in files for index in table.indexes]
+    for index in indexes:
+        index.drop(connection, checkfirst=True)
+
+    loaded = []
+    for table, path in files:
+        started = time.perf_counter()
+        with open(path, newline='') as file:
+            rows = copy_csv(table, file)
+        elapsed = time.perf_counter() - started
+        loaded.append((table.name, rows, elapsed))
+        log(f"  {table.name:<24}{rows:>12,} rows  {rows / elapsed if elapsed else 0:>12,.0f} rows/s")
+
+    started = time.perf_counter()
+    for index in indexes:
+        index.create(connection, checkfirst=True)
+    if indexes:
+        log(f"  built {len(indexes)} indexes in {time.perf_counter() - started:.1f}s")
+    db.session.commit()
+
+    names = [name for name, _, _ in loaded]
+    if OrderTable.__tablename__ in names and SalesRollup.__tablename__ not in names:
+        log("  rebuilding sales rollups")
+        rebuild_rollups()
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+    return loaded
+
+
+def export_directory(directory, log=print):
+    """write every table to <table>.csv in directory, in the format load_directory reads"""
+    os.makedirs(directory, exist_ok=True)
+    for table in db.metadata.sorted_tables:
+        started = time.perf_counter()
+        with open(os.path.join(directory, f'{table.name}.csv'), 'w', newline='') as file:
+            rows = export_csv(table, file)
+        elapsed = time.perf_counter() - started
+        log(f"  {table.name:<24}{rows:>12,} rows  {rows / elapsed if elapsed else 0:>12,.0f} rows/s")
+    db.session.rollback()
+
+
+def schema_sql():
+    """CREATE TABLE and CREATE INDEX statements for the models, as PostgreSQL runs them"""
+    dialect = postgresql.dialect()
+
+    def render(ddl):
+        return '\n'.join(line.rstrip() for line in str(ddl.compile(dialect=dialect)).strip().splitlines()) + ';'
+
+    statements = []
+    for table in db.metadata.sorted_tables:
+        statements.append(render(CreateTable(table)))
+        statements.extend(render(CreateIndex(index)) for index in sorted(table.indexes, key=lambda index: index.name))
+    return '\n\n'.join(statements) + '\n'
+
+
+@click.command('seed-db')
+@click.option('--source', type=click.Path(exists=True, file_okay=False), default=SEED_DATA_DIR, show_default=True,
+              help='directory of <table>.csv files, as written by export-data')
+@click.option('--truncate', is_flag=True, help='empty every table before loading')
+@click.option('--schema-only', is_flag=True, help='create the tables and indexes without loading data')
+@with_appcontext
+def seed_db_command(source, truncate, schema_only):
+    """Create the schema from the models and bulk load seed or exported data."""
+    if schema_only:
+        db.create_all(bind_key=None)
+        click.echo("Created tables and indexes")
+        return
+
+    started = time.perf_counter()
+    click.echo(f"Loading {source}")
+    loaded = load_directory(source, truncate, log=click.echo)
+    elapsed = time.perf_counter() - started
+    rows = sum(count for _, count, _ in loaded)
+    click.echo(f"Loaded {rows:,} rows into {len(loaded)} tables in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+@click.command('export-data')
+@click.argument('directory', type=click.Path(file_okay=False))
+@with_appcontext
+def export_data_command(directory):
+    """Write every table to <table>.csv files that seed-db can load."""
+    started = time.perf_counter()
+    export_directory(directory, log=click.echo)
+    click.echo(f"Exported to {directory} in {time.perf_counter() - started:.2f}s")
+
+
+@click.command('schema-sql')
+@with_appcontext
+def schema_sql_command():
+    """Print the PostgreSQL schema generated from the models."""
+    click.echo(schema_sql(), nl=False)
@@ -0,0 +1,180 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+# records below this level are dropped before they are queued
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+# json writes one object per line for log collectors, text is easier to read in a terminal
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+# one line per request with its status and duration
+LOG_REQUESTS = os.getenv('LOG_REQUESTS', 'true').lower() in ('1', 'true', 'yes')
+# records waiting for the listener. past this handlers drop records rather than wait for the output
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '20000'))
+
+REQUEST_ID_HEADER = 'X-Request-Id'
+# request fields copied onto every record logged while a request is handled
+REQUEST_FIELDS = ('request_id', 'method', 'path', 'endpoint', 'duration_ms', 'status')
+
+# not 'requests', which is the HTTP client library's logger
+request_log = logging.getLogger('access')
+
+
+def add_request_context(record):
+    """copy the current request's id, method, path, endpoint and time so far onto record"""
+    if has_request_context():
+        record.request_id = g.get('request_id')
+        record.method = request.method
+        record.path = request.path
+        record.endpoint = request.endpoint
+        started = g.get('log_start')
+        if started is not None and not hasattr(record, 'duration_ms'):
+            record.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    return record
+
+
+class RequestQueueHandler(QueueHandler):
+    """
+    queues records for the listener thread, with the current request's id, endpoint and duration
+
+    unlike the stock QueueHandler the message is not formatted here, that happens in the listener
+    with the rest of the I/O. records stay in this process, so their arguments don't have to be
+    reduced to strings before they are queued. when the queue is full records are dropped and
+    counted, and the count is logged once there is room again.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return add_request_context(record)
+
+    def enqueue(self, record):
+        # SimpleQueue has no size limit but never takes a lock to put, the limit is checked instead
+        if self.queue.qsize() >= LOG_QUEUE_SIZE:
+            self.dropped += 1
+            return
+        if self.dropped:
+            self.queue.put(logging.makeLogRecord({
+                'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f'Log queue was full, dropped {self.dropped} records'
+            }))
+            self.dropped = 0
+        self.queue.put(record)
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for field in REQUEST_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        context = ' '.join(f'{field}={getattr(record, field)}' for field in REQUEST_FIELDS
+                           if getattr(record, field, None) is not None)
+        if not context:
+            return line
+        first, newline, rest = line.partition('\n')
+        return f'{first} [{context}]{newline}{rest}'
+
+
+class LogPipeline:
+    """
+    the root logger's only handler puts records on an in-memory queue, and one listener thread per
+    process formats them and writes them out
+
+    a forked worker starts its own listener, threads don't survive a fork
+    """
+
+    def __init__(self, handlers, level=LOG_LEVEL):
+        self.handlers = handlers
+        self.level = level
+        self.handler = RequestQueueHandler(queue.SimpleQueue())
+        self.listener = None
+
+    def start(self):
+        self.handler.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.handler.queue, *self.handlers, respect_handler_level=True)
+        self.listener.start()
+
+    def stop(self):
+        """write out everything queued so far and stop the listener"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def install(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.start()
+        atexit.register(self.stop)
+        os.register_at_fork(after_in_child=self.start)
+
+
+def default_handlers():
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JSONFormatter() if LOG_FORMAT == 'json' else TextFormatter())
+    return [handler]
+
+
+_pipeline = None
+
+
+def _before_request():
+    g.log_start = time.perf_counter()
+    g.request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex
+
+
+def _after_request(response):
+    request_id = g.get('request_id')
+    if request_id is None:
+        return response
+    response.headers[REQUEST_ID_HEADER] = request_id
+    if LOG_REQUESTS:
+        request_log.info('%s %s %s', request.method, request.full_path.rstrip('?'), response.status_code,
+                         extra={'status': response.status_code})
+    return response
+
+
+def init_logging(app, handlers=None):
+    """
+    send every log record through the queued pipeline and tag requests with an id
+
+    the id comes from the X-Request-Id header, or is generated, and is returned in the same header.
+    the pipeline is installed once per process however many apps are created
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LogPipeline(handlers or default_handlers())
+        _pipeline.install()
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import db, Translation
+from services.translator import translator
+
+# translations kept in memory per worker, the database table holds all of them
+TRANSLATION_CACHE_SIZE = 5000
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _upsert(model):
+    dialect = db.session.get_bind().dialect.name
+    return (pg_insert if dialect == 'postgresql' else sqlite_insert)(model)
+
+
+class TranslationCache:
+    """
+    two tier cache of translations keyed on (text hash, target language)
+
+    lookups go to an in-process LRU first, then to the translation table with one query for all
+    the remaining strings. only strings found in neither are sent to the translator, and its
+    results are written to both tiers.
+    """
+
+    def __init__(self, translate=translator.translate, max_size=TRANSLATION_CACHE_SIZE):
+        self.translate_remote = translate
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, key, translation):
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _recall(self, key):
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is not None:
+                self._entries.move_to_end(key)
+            return translation
+
+    def _load(self, hashes, target_lang):
+        """stored translations for the given hashes, by hash"""
+        rows = db.session.query(Translation.text_hash, Translation.translated_text).filter(
+            Translation.target_lang == target_lang,
+            Translation.text_hash.in_(hashes)
+        )
+        return dict(rows)
+
+    def _store(self, entries, target_lang):
+        """save (hash, text, translation) entries, keeping whichever row another worker wrote first"""
+        stmt = _upsert(Translation).values([
+            {'text_hash': hashed, 'target_lang': target_lang, 'source_text': text, 'translated_text': translation}
+            for hashed, text, translation in entries
+        ])
+        db.session.execute(stmt.on_conflict_do_nothing(index_elements=['text_hash', 'target_lang']))
+        db.session.commit()
+
+    def translate(self, texts, target_lang):
+        """
+        translations of texts into target_lang, in order, and whether each one was already cached
+
+        raises services.translator.TranslatorError if the strings that were not cached can't be translated
+        """
+        target_lang = target_lang.lower()
+        hashes = {text: text_hash(text) for text in texts}
+        found = {}
+
+        # in-process tier
+        for text, hashed in hashes.items():
+            translation = self._recall((hashed, target_lang))
+            if translation is not None:
+                found[text] = translation
+
+        # database tier, one query for everything the LRU did not have
+        missing = [text for text in hashes if text not in found]
+        if missing:
+            stored = self._load([hashes[text] for text in missing], target_lang)
+            for text in missing:
+                translation = stored.get(hashes[text])
+                if translation is not None:
+                    found[text] = translation
+                    self._remember((hashes[text], target_lang), translation)
+
+        cached = set(found)
+
+        # translator, only for strings neither tier had
+        missing = [text for text in hashes if text not in found]
+        if missing:
+            translations = self.translate_remote(missing, target_lang)
+            entries = [(hashes[text], text, translation) for text, translation in zip(missing, translations)]
+            self._store(entries, target_lang)
+            for hashed, text, translation in entries:
+                found[text] = translation
+                self._remember((hashed, target_lang), translation)
+
+        return [found[text] for text in texts], [text in cached for text in texts]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+translation_cache = TranslationCache()
@@ -0,0 +1,139 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Using Azure Translation API | Limited to 2M char per month
+AZURE_TRANSLATOR_KEY = os.getenv("AZURE_TRANSLATOR_KEY")
+AZURE_TRANSLATOR_ENDPOINT = os.getenv("AZURE_TRANSLATOR_ENDPOINT")
+AZURE_TRANSLATOR_REGION = os.getenv("AZURE_TRANSLATOR_REGION")
+
+# azure accepts up to 1000 texts and 50,000 characters per request, smaller chunks run in parallel
+MAX_CHUNK_TEXTS = 100
+MAX_CHUNK_CHARACTERS = 10000
+# chunks of one request sent at the same time, and connections kept open to the translator
+MAX_CONCURRENT_CHUNKS = 4
+# seconds to connect and to wait for a response, per attempt
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 10
+# throttled and failed requests are retried with exponential backoff, honouring Retry-After
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TranslatorError(Exception):
+    """the translator rejected a request, carries its status code and response text"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def chunk_texts(texts, max_texts=MAX_CHUNK_TEXTS, max_characters=MAX_CHUNK_CHARACTERS):
+    """split texts into consecutive chunks within the translator's per request limits"""
+    chunks = []
+    chunk = []
+    characters = 0
+    for text in texts:
+        if chunk and (len(chunk) == max_texts or characters + len(text) > max_characters):
+            chunks.append(chunk)
+            chunk = []
+            characters = 0
+        chunk.append(text)
+        characters += len(text)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+class Translator:
+    """
+    client for the Azure translator
+
+    requests go over one pooled session with timeouts and retries. long lists are split into chunks
+    that are translated concurrently and put back together in their original order.
+    """
+
+    def __init__(self, endpoint=None, key=None, region=None, max_workers=MAX_CONCURRENT_CHUNKS):
+        self.endpoint = endpoint or AZURE_TRANSLATOR_ENDPOINT
+        self.key = key or AZURE_TRANSLATOR_KEY
+        self.region = region or AZURE_TRANSLATOR_REGION
+        self.max_workers = max_workers
+        self._session = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # created on first use so importing the module opens nothing, and requests is only loaded
+        # by a worker that translates
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=MAX_RETRIES,
+                    backoff_factor=RETRY_BACKOFF,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset(['POST']),
+                    raise_on_status=False
+                )
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers.update({
+                    "Ocp-Apim-Subscription-Key": self.key,
+                    "Ocp-Apim-Subscription-Region": self.region,
+                    "Content-Type": "application/json"
+                })
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='translator')
+                self._session = session
+        return self._session, self._executor
+
+    def _translate_chunk(self, session, texts, target_lang):
+        import requests
+
+        try:
+            response = session.post(
+                f"{self.endpoint}/translate",
+                params={'api-version': '3.0', 'to': target_lang},
+                json=[{"Text": text} for text in texts],
+                timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)
+            )
+        except requests.RequestException as error:
+            raise TranslatorError(502, f"Translator unavailable: {error}")
+
+        if response.status_code != 200:
+            raise TranslatorError(response.status_code, response.text)
+        return [item["translations"][0]["text"] for item in response.json()]
+
+    def translate(self, texts, target_lang):
+        """translate texts into target_lang, in order"""
+        session, executor = self._start()
+        chunks = chunk_texts(texts)
+        if len(chunks) == 1:
+            return self._translate_chunk(session, chunks[0], target_lang)
+
+        futures = [executor.submit(self._translate_chunk, session, chunk, target_lang) for chunk in chunks]
+        translations = []
+        for future in futures:
+            translations.extend(future.result())
+        return translations
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._executor.shutdown(wait=False)
+                self._session.close()
+                self._session = None
+                self._executor = None
+
+
+translator = Translator()
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from database import db  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """create_app on a fresh SQLite file with its tables created, apps made by one test share it"""
+    database_url = f"sqlite:///{tmp_path / 'store.db'}"
+
+    def make():
+        app = create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'TESTING': True})
+        with app.app_context():
+            db.create_all(bind_key=None)
+        return app
+
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
@@ -0,0 +1,53 @@
+import uuid
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+
+from database import db, Employee, Ingredient, OrderTable, Product, ProductIngredient, ProductOrder
+
+
+def seed_menu(products):
+    employee = Employee(id=uuid.uuid4(), name='Register', email='register@example.com')
+    menu = [Product(id=uuid.uuid4(), name=f'Tea {number}', description='', price=5) for number in range(products)]
+    ingredient = Ingredient(id=uuid.uuid4(), name='Milk', quantity=100, supplier='Dairy', expiration=date.today())
+    db.session.add_all([employee, ingredient, *menu])
+    db.session.add_all([
+        ProductIngredient(productid=product.id, ingredientid=ingredient.id, quantity=1) for product in menu
+    ])
+    db.session.commit()
+    return employee.id, [product.id for product in menu]
+
+
+def add_open_orders(count, employee_id, product_ids):
+    now = datetime.now()
+    for number in range(count):
+        order_id = uuid.uuid4()
+        db.session.add(OrderTable(id=order_id, employeeid=employee_id, total=10,
+                                  order_date=now - timedelta(minutes=number), completed=False))
+        db.session.add_all([
+            ProductOrder(orderid=order_id, productid=product_id, quantity=1)
+            for product_id in product_ids[number % len(product_ids):][:3]
+        ])
+    db.session.commit()
+
+
+def test_get_orders_statements_do_not_grow_with_open_orders(app):
+    statements = []
+    with app.app_context():
+        employee_id, product_ids = seed_menu(8)
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    client = app.test_client()
+    counts = []
+    open_orders = 0
+    for size in (2, 10, 40):
+        with app.app_context():
+            add_open_orders(size - open_orders, employee_id, product_ids)
+        open_orders = size
+
+        statements.clear()
+        response = client.get('/getorders')
+        assert len(response.get_json()['orders']) == size
+        counts.append(len(statements))
+
+    assert counts == [counts[0]] * 3
@@ -0,0 +1,104 @@
+import json
+import time
+import uuid
+
+import pytest
+
+from database import db, Employee, Product
+from routes import order_routes
+from services.order_events import OrderEventBroker
+
+
+def worker(make_app):
+    app = make_app()
+    with app.app_context():
+        # displays on this app see new events within a few milliseconds
+        order_routes.order_events().poll_seconds = 0.02
+    return app
+
+
+@pytest.fixture
+def apps(make_app):
+    """two apps on one database, standing in for two gunicorn workers"""
+    return worker(make_app), worker(make_app)
+
+
+def seed(app):
+    with app.app_context():
+        employee = Employee(id=uuid.uuid4(), name='Register', email='register@example.com')
+        product = Product(id=uuid.uuid4(), name='Milk Tea', description='', price=5)
+        db.session.add_all([employee, product])
+        db.session.commit()
+        return str(employee.id), str(product.id)
+
+
+def next_event(frames, event_type, timeout=5):
+    """data of the next event_type frame, skipping others"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for block in next(frames).decode().split('\n\n'):
+            if f'event: {event_type}\n' in block:
+                return json.loads(block.split('data: ', 1)[1])
+    raise AssertionError(f'no {event_type} event within {timeout}s')
+
+
+def test_order_from_one_worker_reaches_a_stream_on_another(apps):
+    register, kitchen = apps
+    employee_id, product_id = seed(register)
+
+    stream = kitchen.test_client().get('/streamorders')
+    assert stream.status_code == 200
+    frames = stream.response
+    assert next_event(frames, 'snapshot') == {'orders': []}
+
+    response = register.test_client().post('/submitorder', json={
+        'products': [product_id], 'ingredients': [], 'employee_id': employee_id, 'total': 5
+    })
+    assert response.status_code == 200
+    order_id = response.get_json()['data']['id']
+
+    created = next_event(frames, 'order_created')
+    assert created['id'] == order_id
+    assert [product['id'] for product in created['products']] == [product_id]
+
+    response = register.test_client().post('/completeorder', json={'orderId': order_id})
+    assert response.status_code == 200
+    assert next_event(frames, 'order_completed') == {'id': order_id}
+    stream.close()
+
+
+def test_streams_per_worker_are_capped(apps):
+    _, kitchen = apps
+    first = kitchen.test_client().get('/streamorders')
+    assert first.status_code == 200
+
+    second = kitchen.test_client().get('/streamorders')
+    assert second.status_code == 503
+    first.close()
+
+
+def test_one_poll_reaches_every_display_on_a_worker(make_app):
+    app = make_app()
+    employee_id, product_id = seed(app)
+    loads = []
+
+    def load_orders(order_ids):
+        loads.append(order_ids)
+        return order_routes.load_open_orders(order_ids)
+
+    broker = OrderEventBroker(app, load_orders, max_subscribers=3, poll_seconds=0.02)
+    with app.app_context():
+        subscriptions = [broker.subscribe() for _ in range(3)]
+
+    response = app.test_client().post('/submitorder', json={
+        'products': [product_id], 'ingredients': [], 'employee_id': employee_id, 'total': 5
+    })
+    order_id = response.get_json()['data']['id']
+
+    frames = [subscription.get(timeout=5) for subscription in subscriptions]
+    assert frames[0] is not None and order_id in frames[0]
+    assert frames == [frames[0]] * 3
+    # the order was loaded once for every display
+    assert [str(order_ids[0]) for order_ids in loads] == [order_id]
+    for subscription in subscriptions:
+        broker.unsubscribe(subscription)
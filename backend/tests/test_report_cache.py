@@ -0,0 +1,75 @@
+import uuid
+from datetime import datetime
+
+import pytest
+
+from database import db, Employee, OrderTable
+from services.metrics import metrics
+from services.report_cache import ReportCache, report_cache
+from services.sales_rollup import employee_sales, record_orders, rebuild_rollups
+
+JANUARY = (datetime(2024, 1, 1), datetime(2024, 2, 1))
+
+
+@pytest.fixture
+def app(app):
+    with app.app_context():
+        app.employee_id = uuid.uuid4()
+        db.session.add(Employee(id=app.employee_id, name='Register', email='register@example.com'))
+        db.session.commit()
+    report_cache.clear()
+    return app
+
+
+def replay_order(app, order_date):
+    """an order recorded the way another worker records it, without touching this worker's cache"""
+    order_id = uuid.uuid4()
+    db.session.add(OrderTable(id=order_id, employeeid=app.employee_id, total=5, order_date=order_date))
+    db.session.flush()
+    record_orders([order_id])
+    db.session.commit()
+
+
+def january_orders():
+    return sum(orders for _, _, orders, _ in employee_sales(*JANUARY))
+
+
+def test_orders_replayed_by_another_worker_reach_cached_months(app):
+    with app.app_context():
+        replay_order(app, datetime(2024, 1, 10, 12))
+        assert january_orders() == 1
+
+        replay_order(app, datetime(2024, 1, 20, 12))
+        assert january_orders() == 2
+
+
+def test_rebuilt_rollups_reach_cached_months(app):
+    with app.app_context():
+        replay_order(app, datetime(2024, 1, 10, 12))
+        assert january_orders() == 1
+
+        db.session.add(OrderTable(employeeid=app.employee_id, total=5, order_date=datetime(2024, 1, 15, 12)))
+        db.session.commit()
+        rebuild_rollups(*JANUARY)
+        assert january_orders() == 2
+
+
+def test_closed_rows_from_a_lagging_replica_are_not_kept():
+    cache = ReportCache(replica_lag=60)
+    cache.orders_recorded([datetime(2024, 1, 10)])
+
+    cache.get('sales', *JANUARY, True, lambda: [('old',)], stamp=1, from_replica=True)
+    assert cache.get('sales', *JANUARY, True, lambda: [('new',)], stamp=1, from_replica=True) == [('new',)]
+
+    cache.get('sales', *JANUARY, True, lambda: [('primary',)], stamp=1)
+    assert cache.get('sales', *JANUARY, True, lambda: [('other',)], stamp=1) == [('primary',)]
+
+
+def test_repeated_reports_for_today_hit_the_cache(app):
+    client = app.test_client()
+    for path in ('/getsalesreport?interval=today', '/getproductsusedchart?interval=day'):
+        report_cache.clear()
+        hits = metrics.report_cache._values.get(('open', 'hit'), 0)
+        for _ in range(3):
+            assert client.get(path).status_code == 200
+        assert metrics.report_cache._values.get(('open', 'hit'), 0) - hits == 2
@@ -0,0 +1,23 @@
+from flask import g
+from sqlalchemy import text
+
+from database import db
+from services import report_pool
+
+
+def run_statements(count):
+    for _ in range(count):
+        db.session.execute(text('SELECT 1'))
+    return count
+
+
+def test_pool_calls_add_their_statements_to_the_request(app, monkeypatch):
+    monkeypatch.setattr(report_pool, 'REPORT_QUERY_THREADS', 3)
+
+    with app.test_request_context():
+        app.preprocess_request()
+        results = report_pool.run_concurrently(*[(run_statements, 200)] * 3)
+
+        assert results == [200, 200, 200]
+        assert g.metrics_statement_count == 600
+        assert g.metrics_statement_time > 0
@@ -0,0 +1,32 @@
+import uuid
+from datetime import datetime
+
+from database import db, Customer, Product, ProductReview
+
+
+def test_review_pages_cover_every_review_once(app):
+    product_id = uuid.uuid4()
+    with app.app_context():
+        db.session.add_all([
+            Product(id=product_id, name='Milk Tea', description='', price=5),
+            Customer(id='customer', name='Customer', email='customer@example.com'),
+        ])
+        # reviews written in the same instant are told apart by id
+        created_at = datetime(2024, 5, 1, 12)
+        db.session.add_all([
+            ProductReview(product_id=product_id, customer_id='customer', review_text=str(number), created_at=created_at)
+            for number in range(5)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    seen, cursor = [], None
+    while True:
+        query = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        body = client.get(f'/getreviews/{product_id}', query_string=query).get_json()
+        seen += [review['review_text'] for review in body['data']]
+        cursor = body['next_cursor']
+        if cursor is None:
+            break
+
+    assert sorted(seen) == ['0', '1', '2', '3', '4']
@@ -0,0 +1,49 @@
+import uuid
+from datetime import date
+
+import pytest
+
+from database import db, Employee, Ingredient, OrderTable, Product
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        app.employee_id = uuid.uuid4()
+        app.product_id = uuid.uuid4()
+        app.ingredient_id = uuid.uuid4()
+        db.session.add_all([
+            Employee(id=app.employee_id, name='Register', email='register@example.com'),
+            Product(id=app.product_id, name='Milk Tea', description='', price=5),
+            Ingredient(id=app.ingredient_id, name='Milk', quantity=1, supplier='Dairy', expiration=date.today())
+        ])
+        db.session.commit()
+    return app.test_client()
+
+
+def queued_order(client, key, **fields):
+    app = client.application
+    return {'idempotency_key': key, 'employee_id': str(app.employee_id), 'products': [str(app.product_id)],
+            'ingredients': [], 'total': 5, **fields}
+
+
+def test_bad_orders_are_rejected_alone(client):
+    orders = [
+        queued_order(client, 'good'),
+        queued_order(client, 'unknown-product', products=[str(uuid.uuid4())]),
+        queued_order(client, 'unknown-employee', employee_id=str(uuid.uuid4())),
+        queued_order(client, 'bad-discount', discount=50),
+        queued_order(client, 'no-stock', ingredients=[str(client.application.ingredient_id)] * 2),
+    ]
+    response = client.post('/submitorders', json={'orders': orders})
+    assert response.status_code == 200
+
+    statuses = {result['idempotency_key']: result['status'] for result in response.get_json()['results']}
+    assert statuses == {'good': 'created', 'unknown-product': 'rejected', 'unknown-employee': 'rejected',
+                        'bad-discount': 'rejected', 'no-stock': 'rejected'}
+    with client.application.app_context():
+        assert db.session.query(OrderTable).count() == 1
+
+    # the retry reports the stored order as a duplicate instead of failing the batch again
+    response = client.post('/submitorders', json={'orders': orders})
+    assert response.get_json()['results'][0]['status'] == 'duplicate'
@@ -0,0 +1,46 @@
+import uuid
+
+import pytest
+
+from database import db, Employee, Product
+from services.report_cache import report_cache
+
+
+@pytest.fixture
+def client(app):
+    with app.app_context():
+        app.employee_id = uuid.uuid4()
+        app.product_id = uuid.uuid4()
+        db.session.add_all([
+            Employee(id=app.employee_id, name='Register', email='register@example.com'),
+            Product(id=app.product_id, name='Milk Tea', description='', price=5)
+        ])
+        db.session.commit()
+    report_cache.clear()
+    return app.test_client()
+
+
+def submit_orders(client, count):
+    app = client.application
+    for _ in range(count):
+        response = client.post('/submitorder', json={
+            'products': [str(app.product_id)], 'ingredients': [], 'employee_id': str(app.employee_id), 'total': 5
+        })
+        assert response.status_code == 200
+
+
+def test_weekly_report_counts_sales_after_todays_daily_report(client):
+    submit_orders(client, 1)
+    daily = client.post('/generatezreport', json={'timeRange': 'daily'}).get_json()['data']
+    assert daily['totalOrders'] == 1
+
+    submit_orders(client, 2)
+    weekly = client.post('/generatezreport', json={'timeRange': 'weekly'}).get_json()['data']
+    assert weekly['totalOrders'] == 3
+    assert client.get('/getxreport?timeRange=daily').get_json()['data']['totalOrders'] == 3
+
+
+def test_z_report_errors_are_json(client):
+    response = client.post('/generatezreport', data='null', content_type='application/json')
+    assert response.status_code == 500
+    assert response.get_json()['error'].startswith('Error generating Z-Report')
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import axios from "axios";
+import { getReport } from "../utils/getReport";
 import { Bar } from "react-chartjs-2";
 import {
   Chart as ChartJS,
@@ -30,7 +30,7 @@ const BarChartIngredients: React.FC<BarChartIngredientsProps> = ({ viewInterval
     const fetchChartData = async () => {
       try {
         setLoading(true);
-        const res = await axios.get(
+        const res = await getReport(
           `${import.meta.env.VITE_API_URL}/getingredientsusedchart`,
           {
             params: { interval: viewInterval },
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { ICustomer, IIngredient, IProduct } from "../utils/interfaces";
+import { ICustomer, IIngredient, IProduct, IReview } from "../utils/interfaces";
 import { FaRegTrashAlt } from "react-icons/fa";
 
 import axios from "axios";
@@ -32,7 +32,8 @@ const CustomizationModal: React.FC<Props> = ({ product, onSubmit, ingredients, t
         { label: "large", price: 2.0 }
     ];
 
-    const [productReviews, setProductReviews] = useState(product.reviews);
+    const [productReviews, setProductReviews] = useState<IReview[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [selectedSize, setSelectedSize] = useState("small");
     const [selectedToppings, setSelectedToppings] = useState<IIngredient[]>([]);
     const [reviewText, setReviewText] = useState('');
@@ -45,8 +46,19 @@ const CustomizationModal: React.FC<Props> = ({ product, onSubmit, ingredients, t
         );
     };
 
+    // fetch a page of reviews, starting over when no cursor is given
+    const fetchReviews = async (cursor: string | null = null) => {
+        if (!product?.id) return
+
+        const params = cursor ? { cursor } : {};
+        const res = (await axios.get(`${import.meta.env.VITE_API_URL}/getreviews/${product.id}`, { params })).data;
+
+        setProductReviews(prev => cursor ? [...prev, ...res.data] : res.data);
+        setNextCursor(res.next_cursor);
+    }
+
     useEffect(() => {
-        setProductReviews(product.reviews);
+        fetchReviews();
     }, [product]);
 
     useEffect(() => {
@@ -56,7 +68,7 @@ const CustomizationModal: React.FC<Props> = ({ product, onSubmit, ingredients, t
             product.description,
             product.alerts,
             "Warning", "Reviews", "Submit", "Cancel",
-            "Customization text input", "Add a review", "Post",
+            "Customization text input", "Add a review", "Post", "More reviews",
             "Review Submitted Successfully", "Review Deleted Successfully!", "Something went wrong.", "plus",
             ...sizes.map(s => s.label),
             ...ingredients.map(i => i.name)
@@ -172,6 +184,10 @@ const CustomizationModal: React.FC<Props> = ({ product, onSubmit, ingredients, t
                                     </div>
                                 ))}
 
+                                {nextCursor && (
+                                    <button className="btn btn-sm btn-ghost w-full" onClick={() => fetchReviews(nextCursor)}>{t("More reviews")}</button>
+                                )}
+
                                 {customer && (
                                     <div className="join w-full">
                                         <input type="text" value={reviewText} onChange={(evt) => setReviewText(evt.target.value)} className="input w-full join-item" placeholder={t("Add a review")} />
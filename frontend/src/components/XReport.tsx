@@ -36,6 +36,7 @@ export interface ReportData {
     periodText?: string;
     reportDate?: string;
     generatedAt?: string;
+    staleSeconds?: number; // set when read from a replica that is behind
 }
 
 interface XReportProps {
@@ -78,6 +79,12 @@ const XReport: React.FC<XReportProps> = ({
                 </div>
             ) : (
                 <div className="space-y-6">
+                    {data.staleSeconds !== undefined && (
+                        <div className="p-4 bg-yellow-50 border-l-4 border-yellow-500 text-yellow-800 text-sm">
+                            These figures may be up to {Math.ceil(data.staleSeconds)} seconds behind the latest orders.
+                        </div>
+                    )}
+
                     {/* Daily Sales Summary */}
                     <div className="bg-white rounded-xl overflow-hidden shadow-sm">
                         <div className="bg-blue-100  p-4 font-bold text-lg">
@@ -77,7 +77,7 @@ const speak = (text: string, langCode: string = "EN") => {
 
   const [cart, setCart] = useState<IProduct[]>([]);
 
-  const { t, translateTexts } = useTranslation();
+  const { t, translateTexts, addTranslations } = useTranslation();
   const [lang, setLang] = useState("EN");
 
   const staticTexts = [
@@ -110,18 +110,43 @@ const speak = (text: string, langCode: string = "EN") => {
   }, [lang]);
 
   useEffect(() => {
-    if (products.length > 0) {
-      const names = products.map((p) => p.name);
-      translateTexts(names, lang);
+    if (products.length > 0 && lang !== "EN") {
+      getLocalizedProducts(lang);
     }
   }, [lang, products]);
 
+  const menuFields = 'id,name,description,price,image_url,alerts,ingredients';
+
   const getProducts = async () => {
-    const res = (await axios.get(`${import.meta.env.VITE_API_URL}/getproducts`)).data;
+    const res = (await axios.get(`${import.meta.env.VITE_API_URL}/getproducts`, { params: { fields: menuFields } })).data;
 
     setProducts(res.data);
   }
 
+  // the backend keeps a pre-translated copy of the menu per language
+  const getLocalizedProducts = async (targetLang: string) => {
+    const res = (await axios.get(`${import.meta.env.VITE_API_URL}/getproducts`, { params: { fields: menuFields, lang: targetLang.toLowerCase() } })).data;
+    const localized = new Map<string, IProduct>(res.data.map((p: IProduct) => [p.id, p]));
+
+    const pairs: Record<string, string> = {};
+    products.forEach((product) => {
+      const match = localized.get(product.id);
+      if (!match) return;
+
+      pairs[product.name] = match.name;
+      if (product.description) pairs[product.description] = match.description;
+      if (product.alerts) pairs[product.alerts] = match.alerts;
+      // recipes are not listed in a fixed order, pair ingredients by id
+      const localizedIngredients = new Map(match.ingredients.map((ingredient) => [ingredient.id, ingredient.name]));
+      product.ingredients.forEach((ingredient) => {
+        const name = localizedIngredients.get(ingredient.id);
+        if (name) pairs[ingredient.name] = name;
+      });
+    });
+
+    addTranslations(pairs, targetLang);
+  }
+
   function getImagePath(imageName: string | null): string {
     if (!imageName) return '';
     return `/images/${imageName}.png`;
@@ -251,9 +276,6 @@ const speak = (text: string, langCode: string = "EN") => {
         <option value="DE" onMouseEnter={() => ttsEnabled && speak("German", lang)}>
           German
         </option>
-        <option value="DU" onMouseEnter={() => ttsEnabled && speak("Dutch", lang)}>
-          Dutch
-        </option>
         <option value="EN" onMouseEnter={() => ttsEnabled && speak("English", lang)}>
           English
         </option>
@@ -263,7 +285,7 @@ const speak = (text: string, langCode: string = "EN") => {
         <option value="FR" onMouseEnter={() => ttsEnabled && speak("French", lang)}>
           French
         </option>
-        <option value="GR" onMouseEnter={() => ttsEnabled && speak("Greek", lang)}>
+        <option value="EL" onMouseEnter={() => ttsEnabled && speak("Greek", lang)}>
           Greek
         </option>
         <option value="GU" onMouseEnter={() => ttsEnabled && speak("Gujarati", lang)}>
@@ -32,11 +32,37 @@ const KitchenView: React.FC = () => {
     setOrders(prev => prev.filter(o => o.id !== orderId));
   };
 
-  // fetch orders on component mount and set up refresh interval
+  // stream order updates from the api, falling back to polling if the stream is unavailable
   useEffect(() => {
-    fetchOrders();
-    const interval = setInterval(fetchOrders, 10000);
-    return () => clearInterval(interval);
+    let interval: ReturnType<typeof setInterval> | undefined;
+    const source = new EventSource(`${import.meta.env.VITE_STREAM_URL ?? import.meta.env.VITE_API_URL}/streamorders`);
+
+    source.addEventListener("snapshot", (event) => {
+      setOrders(JSON.parse((event as MessageEvent).data).orders);
+    });
+
+    source.addEventListener("order_created", (event) => {
+      const order: OrderTicket = JSON.parse((event as MessageEvent).data);
+      setOrders(prev => [...prev.filter(o => o.id !== order.id), order]);
+    });
+
+    source.addEventListener("order_completed", (event) => {
+      const { id } = JSON.parse((event as MessageEvent).data);
+      setOrders(prev => prev.filter(o => o.id !== id));
+    });
+
+    source.onerror = () => {
+      // the browser reconnects on its own unless the server refused the stream
+      if (source.readyState === EventSource.CLOSED && !interval) {
+        fetchOrders();
+        interval = setInterval(fetchOrders, 10000);
+      }
+    };
+
+    return () => {
+      source.close();
+      clearInterval(interval);
+    };
   }, []);
 
   return (
@@ -2,6 +2,7 @@
 import React, { useState, useEffect } from "react";
 import { useNavigate } from "react-router";
 import axios from "axios";
+import { getReport, staleSeconds } from "../utils/getReport";
 import XReport, { ReportData } from "../components/XReport";
 import ZReport from "../components/ZReport";
 import ChartPage from "./ChartPage";
@@ -73,12 +74,12 @@ const Reports: React.FC = () => {
       } else {
         params.timeRange = mapIntervalToTimeRange(interval);
       }
-      const response = await axios.get(
+      const response = await getReport(
         `${import.meta.env.VITE_API_URL}/getxreport`,
         { params }
       );
       if (response.data && response.data.data) {
-        setXReportData(response.data.data);
+        setXReportData({ ...response.data.data, staleSeconds: staleSeconds(response) });
       } else {
         console.error("Invalid response format from X-Report API");
         setXReportData(null);
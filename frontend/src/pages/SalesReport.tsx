@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import axios from "axios";
+import { getReport } from "../utils/getReport";
 
 // interface for sales report item data structure
 interface ISalesReportItem {
@@ -33,7 +33,7 @@ const SalesReportPage: React.FC = () => {
                 params.endDate = formattedEndDate;
             }
 
-            const res = await axios.get(`${import.meta.env.VITE_API_URL}/getsalesreport`, { params });
+            const res = await getReport(`${import.meta.env.VITE_API_URL}/getsalesreport`, { params });
             setItems(res.data.data);
         } catch (error) {
             console.error("Error fetching sales report:", error);
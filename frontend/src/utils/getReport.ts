@@ -0,0 +1,28 @@
+import axios, { AxiosRequestConfig, AxiosResponse } from "axios";
+
+// report endpoints answer 503 with Retry-After while the server is saving its workers for orders
+const MAX_REPORT_RETRIES = 2;
+const DEFAULT_RETRY_AFTER_SECONDS = 5;
+
+// GET a report, waiting as long as the server asks and trying again when it is busy
+export async function getReport<T = any>(url: string, config?: AxiosRequestConfig) {
+    for (let attempt = 0; ; attempt++) {
+        try {
+            return await axios.get<T>(url, config);
+        } catch (error) {
+            if (!axios.isAxiosError(error) || error.response?.status !== 503 || attempt >= MAX_REPORT_RETRIES) {
+                throw error;
+            }
+            const retryAfter = Number(error.response.headers["retry-after"]) || DEFAULT_RETRY_AFTER_SECONDS;
+            await new Promise((resolve) => setTimeout(resolve, retryAfter * 1000));
+        }
+    }
+}
+
+// seconds behind the store a report read from the replica may be, or undefined when it is current
+export function staleSeconds(response: AxiosResponse) {
+    if (response.headers["x-data-stale"] !== "true") {
+        return undefined;
+    }
+    return Number(response.headers["x-data-lag-seconds"]);
+}
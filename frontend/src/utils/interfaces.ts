@@ -32,7 +32,7 @@ export interface IProduct {
   ingredients: IIngredient[];
   image_url?: string;
   alerts: string
-  reviews: IReview[]
+  review_count: number
 }
 
 export interface IProductOrder {
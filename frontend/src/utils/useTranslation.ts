@@ -70,9 +70,21 @@ export const useTranslation = () => {
 		}
 	};
 
+	// store translations the backend already resolved, e.g. from a localized menu
+	const addTranslations = (pairs: Record<string, string>, targetLang: string) => {
+		Object.entries(pairs).forEach(([text, translated]) => {
+			localStorage.setItem(getStorageKey(targetLang, text), translated);
+		});
+
+		setTranslations(prev => ({
+			...prev,
+			...pairs,
+		}));
+	};
+
 	const t = (text: string) => {
 	return translations[text] || text;
 	};
 
-	return { t, translateTexts };
+	return { t, translateTexts, addTranslations };
 };
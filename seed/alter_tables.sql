@@ -0,0 +1,33 @@
+-- Columns added to the SQLAlchemy models after the tables were created. db.create_all() does not
+-- alter existing tables, so run this once against an existing database.
+
+-- Stored review count per product, kept up to date by /addreview and /deletereview
+ALTER TABLE product ADD COLUMN IF NOT EXISTS review_count INTEGER NOT NULL DEFAULT 0;
+UPDATE product SET review_count = (SELECT COUNT(*) FROM product_review WHERE product_review.product_id = product.id);
+
+-- product_review.created_at is the /getreviews page cursor. reviews without one are dated to the epoch,
+-- so they come last, and the column is required from now on
+UPDATE product_review SET created_at = '1970-01-01' WHERE created_at IS NULL;
+ALTER TABLE product_review ALTER COLUMN created_at SET NOT NULL;
+
+-- ordertable.customerid references customer.id, which is TEXT. a UUID column can't carry that
+-- foreign key, so db.create_all() failed on PostgreSQL
+ALTER TABLE ordertable ALTER COLUMN customerid TYPE TEXT USING customerid::text;
+
+-- Kitchen display events, written with each order change and read by every worker's /streamorders poller
+CREATE TABLE IF NOT EXISTS order_event (
+	id BIGSERIAL NOT NULL,
+	event_type TEXT NOT NULL,
+	order_id UUID NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS ix_order_event_created_at ON order_event (created_at);
+
+-- Revision of each past day whose orders were recorded after it was over, the report cache of every
+-- worker compares it before reusing that day's rows
+CREATE TABLE IF NOT EXISTS report_revision (
+	day TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	revision INTEGER NOT NULL,
+	PRIMARY KEY (day)
+);
@@ -0,0 +1,16 @@
+-- Indexes declared on the SQLAlchemy models. db.create_all() only creates indexes for new
+-- tables, so run this once against an existing database.
+
+-- Kitchen queue: open orders, oldest first
+CREATE INDEX IF NOT EXISTS ix_ordertable_completed_order_date ON ordertable (completed, order_date);
+
+-- Report range scans and line item joins
+CREATE INDEX IF NOT EXISTS ix_ordertable_order_date ON ordertable (order_date);
+CREATE INDEX IF NOT EXISTS ix_product_order_orderid ON product_order (orderid);
+CREATE INDEX IF NOT EXISTS ix_product_order_productid ON product_order (productid);
+
+-- Newest-first review pages per product
+CREATE INDEX IF NOT EXISTS ix_product_review_product_id_created_at_id ON product_review (product_id, created_at, id);
+
+-- Employee login lookup, customer.email is already indexed by its unique constraint
+CREATE INDEX IF NOT EXISTS ix_employee_email ON employee (email);
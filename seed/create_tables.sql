@@ -1,70 +1,171 @@
--- Drop tables if they exist to avoid conflicts
-DROP TABLE IF EXISTS product_order;
-DROP TABLE IF EXISTS ordertable;
-DROP TABLE IF EXISTS product_ingredient;
-DROP TABLE IF EXISTS product;
-DROP TABLE IF EXISTS ingredient;
-DROP TABLE IF EXISTS employee;
-
--- Employee Table
+-- Generated from the SQLAlchemy models in backend/database.py by `flask --app app schema-sql`,
+-- regenerate it after changing a model. `flask --app app seed-db` creates the same schema and loads
+-- seed/data.
+
+CREATE TABLE customer (
+	id TEXT NOT NULL,
+	name VARCHAR(100) NOT NULL,
+	email VARCHAR(255) NOT NULL,
+	birthday DATE,
+	points INTEGER,
+	created_at TIMESTAMP WITHOUT TIME ZONE,
+	updated_at TIMESTAMP WITHOUT TIME ZONE,
+	PRIMARY KEY (id),
+	UNIQUE (email)
+);
+
 CREATE TABLE employee (
-    id TEXT PRIMARY KEY,
-    name VARCHAR(255) NOT NULL,
-    role VARCHAR(100) NOT NULL,
-    hire_date DATE NOT NULL
+	id UUID NOT NULL,
+	name TEXT NOT NULL,
+	is_manager BOOLEAN NOT NULL,
+	email TEXT NOT NULL,
+	PRIMARY KEY (id)
+);
+
+CREATE INDEX ix_employee_email ON employee (email);
+
+CREATE TABLE ingredient (
+	id UUID NOT NULL,
+	name TEXT NOT NULL,
+	quantity INTEGER NOT NULL,
+	supplier TEXT NOT NULL,
+	expiration DATE NOT NULL,
+	PRIMARY KEY (id),
+	CONSTRAINT ingredient_name_key UNIQUE (name)
+);
+
+CREATE TABLE order_event (
+	id BIGSERIAL NOT NULL,
+	event_type TEXT NOT NULL,
+	order_id UUID NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	PRIMARY KEY (id)
 );
 
--- Product Table
+CREATE INDEX ix_order_event_created_at ON order_event (created_at);
+
 CREATE TABLE product (
-    id TEXT PRIMARY KEY,
-    name VARCHAR(255) UNIQUE NOT NULL,
-    description TEXT NOT NULL,
-    price NUMERIC(10, 2) NOT NULL,
-    has_boba BOOLEAN NOT NULL DEFAULT FALSE,
-    is_seasonal BOOLEAN NOT NULL DEFAULT FALSE
+	id UUID NOT NULL,
+	name TEXT NOT NULL,
+	description TEXT NOT NULL,
+	price NUMERIC(10, 2) NOT NULL,
+	customizations TEXT,
+	has_boba BOOLEAN NOT NULL,
+	is_seasonal BOOLEAN NOT NULL,
+	alerts TEXT,
+	review_count INTEGER DEFAULT '0' NOT NULL,
+	image_url TEXT,
+	PRIMARY KEY (id)
 );
 
--- Ingredient Table
-CREATE TABLE ingredient (
-    id TEXT PRIMARY KEY,
-    name VARCHAR(255) UNIQUE NOT NULL,
-    quantity INT NOT NULL,
-    supplier VARCHAR(255) NOT NULL,
-    expiration DATE NOT NULL
+CREATE TABLE report_revision (
+	day TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	revision INTEGER NOT NULL,
+	PRIMARY KEY (day)
 );
 
--- Product_Ingredient Table (Many-to-Many Relationship between Products & Ingredients)
-CREATE TABLE product_ingredient (
-    id TEXT PRIMARY KEY,
-    productid TEXT NOT NULL REFERENCES product(id) ON DELETE CASCADE,
-    ingredientid TEXT NOT NULL REFERENCES ingredient(id) ON DELETE CASCADE,
-    quantity INT NOT NULL
+CREATE TABLE translation (
+	text_hash TEXT NOT NULL,
+	target_lang TEXT NOT NULL,
+	source_text TEXT NOT NULL,
+	translated_text TEXT NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	PRIMARY KEY (text_hash, target_lang)
 );
 
--- Order Table
+CREATE TABLE z_report_snapshot (
+	id UUID NOT NULL,
+	time_range TEXT NOT NULL,
+	start_date DATE NOT NULL,
+	end_date DATE NOT NULL,
+	total_orders INTEGER NOT NULL,
+	subtotal NUMERIC(12, 2) NOT NULL,
+	total_tax NUMERIC(12, 2) NOT NULL,
+	total_sales NUMERIC(12, 2) NOT NULL,
+	ingredients_used JSON NOT NULL,
+	sales_per_employee JSON NOT NULL,
+	generated_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	PRIMARY KEY (id),
+	CONSTRAINT z_report_snapshot_period_key UNIQUE (time_range, start_date, end_date)
+);
+
+CREATE INDEX ix_z_report_snapshot_time_range_end_date ON z_report_snapshot (time_range, end_date);
+
 CREATE TABLE ordertable (
-    id TEXT PRIMARY KEY,
-    employeeid TEXT NOT NULL REFERENCES employee(id) ON DELETE SET NULL,
-    total NUMERIC(10, 2) NOT NULL,
-    order_date DATE NOT NULL
+	id UUID NOT NULL,
+	employeeid UUID NOT NULL,
+	customerid TEXT,
+	total NUMERIC(10, 2) NOT NULL,
+	order_date TIMESTAMP WITHOUT TIME ZONE,
+	completed BOOLEAN NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(employeeid) REFERENCES employee (id) ON DELETE CASCADE,
+	FOREIGN KEY(customerid) REFERENCES customer (id) ON DELETE CASCADE
 );
 
--- Product_Order Table (Many-to-Many Relationship between Orders & Products)
-CREATE TABLE product_order (
-    id TEXT PRIMARY KEY,
-    orderid TEXT NOT NULL REFERENCES ordertable(id) ON DELETE CASCADE,
-    productid TEXT NOT NULL REFERENCES product(id) ON DELETE CASCADE,
-    quantity INT NOT NULL
+CREATE INDEX ix_ordertable_completed_order_date ON ordertable (completed, order_date);
+
+CREATE INDEX ix_ordertable_order_date ON ordertable (order_date);
+
+CREATE TABLE product_ingredient (
+	id UUID NOT NULL,
+	productid UUID NOT NULL,
+	ingredientid UUID NOT NULL,
+	quantity INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(productid) REFERENCES product (id) ON DELETE CASCADE,
+	FOREIGN KEY(ingredientid) REFERENCES ingredient (id) ON DELETE CASCADE
+);
+
+CREATE TABLE product_review (
+	id UUID NOT NULL,
+	product_id UUID NOT NULL,
+	customer_id TEXT NOT NULL,
+	review_text TEXT NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(product_id) REFERENCES product (id) ON DELETE CASCADE,
+	FOREIGN KEY(customer_id) REFERENCES customer (id) ON DELETE CASCADE
+);
+
+CREATE INDEX ix_product_review_product_id_created_at_id ON product_review (product_id, created_at, id);
+
+CREATE TABLE product_sales_rollup (
+	bucket TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	productid UUID NOT NULL,
+	quantity INTEGER NOT NULL,
+	sales NUMERIC(12, 2) NOT NULL,
+	PRIMARY KEY (bucket, productid),
+	FOREIGN KEY(productid) REFERENCES product (id) ON DELETE CASCADE
 );
 
-CREATE TABLE Customer (
-    id SERIAL PRIMARY KEY,
-    name VARCHAR(100) NOT NULL,
-    email VARCHAR(255) UNIQUE NOT NULL,
-    password TEXT NOT NULL,
-    birthday DATE,
-    orders INTEGER DEFAULT 0,
-    points INTEGER DEFAULT 0,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+CREATE TABLE sales_rollup (
+	bucket TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+	employeeid UUID NOT NULL,
+	order_count INTEGER NOT NULL,
+	sales NUMERIC(12, 2) NOT NULL,
+	PRIMARY KEY (bucket, employeeid),
+	FOREIGN KEY(employeeid) REFERENCES employee (id) ON DELETE CASCADE
 );
+
+CREATE TABLE order_idempotency_key (
+	key TEXT NOT NULL,
+	order_id UUID NOT NULL,
+	created_at TIMESTAMP WITHOUT TIME ZONE,
+	PRIMARY KEY (key),
+	FOREIGN KEY(order_id) REFERENCES ordertable (id) ON DELETE CASCADE
+);
+
+CREATE TABLE product_order (
+	id UUID NOT NULL,
+	orderid UUID NOT NULL,
+	productid UUID NOT NULL,
+	quantity INTEGER NOT NULL,
+	PRIMARY KEY (id),
+	FOREIGN KEY(orderid) REFERENCES ordertable (id) ON DELETE CASCADE,
+	FOREIGN KEY(productid) REFERENCES product (id) ON DELETE CASCADE
+);
+
+CREATE INDEX ix_product_order_orderid ON product_order (orderid);
+
+CREATE INDEX ix_product_order_productid ON product_order (productid);